@@ -4,13 +4,13 @@ import readline
 class TabCompleter:
     """
     This class is used to provide tab completion for the user in the client.
-    Completes database names and table names periodically.
+    Completes database names, table names and the commands periodically.
     In the first iteration, it completes database names, after that, it completes table names, and so on.
     """
     __database_names = []
     __table_names = []
     # __column_names = []
-    # __commands = ["use", "create", "drop", "alter", "insert", "select", "update", "delete", "exit"]
+    __commands = ["use", "create", "drop", "alter", "insert", "select", "update", "delete", "analyze", "exit"]
 
     def __init__(self):
         readline.parse_and_bind("tab: complete")
@@ -52,7 +52,11 @@ class TabCompleter:
             options = [tb for tb in self.__table_names if tb.startswith(text)]
             if state < len(options):
                 return options[state]
-
+            else:  # complete commands
+                state = state - len(options)
+                options = [cmd for cmd in self.__commands if cmd.startswith(text)]
+                if state < len(options):
+                    return options[state]
 
     # def complete_column(self, text, state):
     #     options = [col for col in self.__column_names if col.startswith(text)]
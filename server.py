@@ -162,6 +162,8 @@ def main():
     print("Server stopped")
 
 
-main()
+# the worker processes of parallel queries import this module too, they must not start a server
+if __name__ == "__main__":
+    main()
 
 # client should send the buffer size and the data after
@@ -0,0 +1,56 @@
+"""
+Settings of the server side.
+Change them before starting the server.
+"""
+import os
+from server_side import __working_dir__
+
+# the storage engine used by the DbManager: "mongo" or "embedded"
+STORAGE_ENGINE: str = "mongo"
+
+# host string of the MongoDB server, used by the "mongo" storage engine
+MONGO_HOST: str = "mongodb://localhost:27017"
+
+# directory of the data files, used by the "embedded" storage engine
+EMBEDDED_DATA_DIR: str = os.path.join(__working_dir__, "embedded_data")
+
+# the number of record keys stored in one document of a non-unique index, more keys are split into more documents
+INDEX_BUCKET_SIZE: int = 1000
+
+# the number of documents read from the storage at once when the rows of a table are streamed
+READ_BATCH_SIZE: int = 1000
+
+# the number of identity values a session reserves ahead and keeps in memory, 0 turns the cache off
+# (the reserved values that are not used before the server stops are lost, leaving gaps in the identity values)
+IDENTITY_CACHE_SIZE: int = 0
+
+# the most memory in bytes the hash table of a join may take, larger joins are partitioned to temporary files
+JOIN_MEMORY_BUDGET: int = 64 * 1024 * 1024
+
+# the most memory in bytes the hash set of a DISTINCT may take, larger ones are partitioned to temporary files
+DISTINCT_MEMORY_BUDGET: int = 64 * 1024 * 1024
+
+# the most memory in bytes the records of a sort may take, larger sorts write sorted runs to temporary files and merge
+# them
+SORT_MEMORY_BUDGET: int = 64 * 1024 * 1024
+
+# directory of the temporary files of operators that do not fit into memory, the system default if None
+SPILL_DIR: str | None = None
+
+# the number of rows sampled to compute the statistics of a table
+STATISTICS_SAMPLE_SIZE: int = 30000
+
+# the number of buckets of the histogram of a column
+STATISTICS_HISTOGRAM_BUCKETS: int = 100
+
+# the statistics of a table are computed again when more rows than
+# AUTO_ANALYZE_THRESHOLD + AUTO_ANALYZE_SCALE_FACTOR * <rows at the last analysis> were inserted or deleted since
+AUTO_ANALYZE_THRESHOLD: int = 50
+AUTO_ANALYZE_SCALE_FACTOR: float = 0.1
+
+# the most worker processes that evaluate a query in parallel, 0 for the number of processors; with 1 every query is
+# evaluated by the server's process alone. A query can ask for another number with OPTION (MAXDOP <n>)
+MAX_DEGREE_OF_PARALLELISM: int = 0
+
+# a query is evaluated in parallel only if it reads at least this many rows of a table
+PARALLEL_MIN_ROWS: int = 100000
@@ -10,5 +10,9 @@ from .primary_key import PrimaryKey
 from .foreign_key import ForeignKey
 from .unique import Unique
 from .check import Check
+from .storage_engine import StorageEngine, DuplicateKeyError, create_storage_engine
+from .statistics import TableStatistics, ColumnStatistics
+from . import key_codec
 from . import mongo_db
+from . import embedded_db
 
@@ -12,6 +12,8 @@ class Database(Dbo):
             tables = list()
         self.__name = name
         self.__tables = tables
+        # [key=<table name>, value=<position of the table>]
+        self.__table_positions: dict[str, int] = _build_positions(self.__tables)
 
     def __dict__(self) -> dict:
         return {
@@ -22,6 +24,7 @@ class Database(Dbo):
     def from_dict(self, data: dict) -> 'Database':
         self.__name = data.get("name", "")
         self.__tables = [Table().from_dict(table) for table in data.get("tables", [])]
+        self.__table_positions = _build_positions(self.__tables)
         return self
 
     def get_tables(self) -> list[Table]:
@@ -35,15 +38,27 @@ class Database(Dbo):
 
     def add_table(self, table: Table):
         self.__tables.append(table)
+        self.__table_positions.setdefault(table.get_name(), len(self.__tables) - 1)
 
     def get_table(self, name: str) -> Table | None:
-        for table in self.__tables:
-            if table.get_name() == name:
-                return table
-        return None
+        idx = self.__table_positions.get(name)
+        return self.__tables[idx] if idx is not None else None
+
+    def find_table(self, name: str) -> int:
+        """
+        Returns the position of the table with the given name, -1 if there is no such table.
+        """
+        return self.__table_positions.get(name, -1)
 
     def remove_table(self, name: str):
-        for idx, table in enumerate(self.__tables):
-            if table.get_name() == name:
-                self.__tables.pop(idx)
-                return
+        idx = self.__table_positions.get(name)
+        if idx is not None:
+            self.__tables.pop(idx)
+            self.__table_positions = _build_positions(self.__tables)
+
+
+def _build_positions(tables: list[Table]) -> dict[str, int]:
+    positions = {}
+    for idx, table in enumerate(tables):
+        positions.setdefault(table.get_name(), idx)
+    return positions
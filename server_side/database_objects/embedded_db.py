@@ -0,0 +1,476 @@
+import copy
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
+
+from server_side.database_objects.storage_engine import StorageEngine, DuplicateKeyError
+
+# comparison operators of the query language that have an SQL equivalent
+_SQL_OPERATORS = {"$eq": "=", "$ne": "!=", "$lt": "<", "$lte": "<=", "$gt": ">", "$gte": ">="}
+# the most values bound to a single SQL statement (SQLite has a limit on the number of parameters)
+_MAX_PARAMETERS = 500
+
+
+class EmbeddedEngine(StorageEngine):
+    """
+    Storage engine that keeps the data on the local disk, inside the server's process, no database server is needed.
+
+    Every database is an SQLite file in the data directory and every collection is a table in that file.
+    A table has two columns: "_id" (its primary key) and "document" (the rest of the document's fields as JSON).
+    The documents are ordered by their keys, so conditions on "_id" are answered by the primary key of the table,
+    conditions on other fields are evaluated in Python.
+    """
+
+    def __init__(self, data_dir: str):
+        self.__data_dir = data_dir
+        self.__connections: dict[str, sqlite3.Connection] | None = None
+
+    def __reduce__(self):
+        # a copy is made of the settings alone and is closed, e.g. in a worker process that opens its own connections
+        return EmbeddedEngine, (self.__data_dir,)
+
+    def set_up(self):
+        if self.__connections is not None:
+            raise ConnectionError("Embedded storage is already open. Close it first.")
+        os.makedirs(self.__data_dir, exist_ok=True)
+        self.__connections = {}
+
+    def close_down(self):
+        if self.__connections is not None:
+            for connection in self.__connections.values():
+                connection.close()
+            self.__connections = None
+
+    def insert_one(self, db_name: str, collection_name: str, key_value_pair: tuple[str, str]) -> str:
+        key, value = key_value_pair
+        try:
+            self.__insert(db_name, collection_name, [{"_id": key, "value": value}])
+        except sqlite3.IntegrityError:
+            raise DuplicateKeyError(collection_name, key)
+        return key
+
+    def insert_many(self, db_name: str, collection_name: str, documents: list[dict]) -> list:
+        try:
+            self.__insert(db_name, collection_name, documents)
+        except sqlite3.IntegrityError:
+            # the batch is inserted in a single transaction, so none of the documents are inserted
+            index = self.__find_duplicate(db_name, collection_name, documents)
+            raise DuplicateKeyError(collection_name, documents[index]["_id"], index)
+        return [doc["_id"] for doc in documents]
+
+    def insert_one_int(self, db_name: str, collection_name: str, key_value_pair: tuple[str, int]) -> str:
+        key, value = key_value_pair
+        self.__insert(db_name, collection_name, [{"_id": key, "value": value}])
+        return key
+
+    def create_collection(self, db_name: str, collection_name: str):
+        connection = self.__connect(db_name, create=True)
+        if self.__has_collection(connection, collection_name):
+            raise ValueError(f"Collection [{collection_name}] already exists in database [{db_name}]")
+        self.__create_table(connection, collection_name)
+
+    def drop_database(self, db_name: str):
+        connection = self.__connections.pop(db_name, None)
+        if connection is not None:
+            connection.close()
+        path = self.__db_path(db_name)
+        for file_path in (path, path + "-wal", path + "-shm"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def drop_collection(self, db_name: str, collection_name: str):
+        connection = self.__connect(db_name)
+        if connection is not None:
+            connection.execute(f"DROP TABLE IF EXISTS {_quote(collection_name)}")
+
+    def delete(self, db_name: str, collection_name: str, query: dict) -> int:
+        connection = self.__connect(db_name)
+        if connection is None or not self.__has_collection(connection, collection_name):
+            return 0
+        key_condition, rest = _split_selection(query)
+        if rest:
+            # the documents are filtered in Python, delete them one by one by their keys
+            keys = [doc["_id"] for doc in self.__find(connection, collection_name, query)]
+            key_condition = {"$in": keys}
+        deleted_count = 0
+        with _transaction(connection):
+            for where, params in _compile_key_condition(key_condition):
+                cursor = connection.execute(f"DELETE FROM {_quote(collection_name)}{where}", params)
+                deleted_count += cursor.rowcount
+        return deleted_count
+
+    def get_database_names(self) -> list[str]:
+        if not os.path.isdir(self.__data_dir):
+            return []
+        return [file_name[:-3] for file_name in os.listdir(self.__data_dir) if file_name.endswith(".db")]
+
+    def get_collection_names(self, db_name: str) -> list[str]:
+        connection = self.__connect(db_name)
+        if connection is None:
+            return []
+        return [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+
+    def select(self, db_name: str, collection_name: str, selection: dict = None,
+               projection: list[str] = None) -> list[dict]:
+        connection = self.__connect(db_name)
+        if connection is None or not self.__has_collection(connection, collection_name):
+            return []
+        return list(self.__find(connection, collection_name, selection, projection))
+
+    def select_iter(self, db_name: str, collection_name: str, selection: dict = None, projection: list[str] = None,
+                    batch_size: int = 1000) -> Iterator[dict]:
+        connection = self.__connect(db_name)
+        if connection is None or not self.__has_collection(connection, collection_name):
+            return iter([])
+        return self.__find(connection, collection_name, selection, projection, batch_size)
+
+    def find_one(self, db_name: str, collection_name: str, selection: dict = None,
+                 projection: list[str] = None) -> dict | None:
+        connection = self.__connect(db_name)
+        if connection is None or not self.__has_collection(connection, collection_name):
+            return None
+        # the generator is left at the first match, the rest of the documents are not read
+        return next(self.__find(connection, collection_name, selection, projection), None)
+
+    def count(self, db_name: str, collection_name: str, selection: dict = None) -> int:
+        connection = self.__connect(db_name)
+        if connection is None or not self.__has_collection(connection, collection_name):
+            return 0
+        key_condition, rest = _split_selection(selection)
+        clauses = _compile_key_condition(key_condition)
+        if not rest and len(clauses) == 1:
+            # the whole selection is evaluated by SQLite, the documents are not read
+            where, params = clauses[0]
+            return connection.execute(f"SELECT COUNT(*) FROM {_quote(collection_name)}{where}", params).fetchone()[0]
+        return sum(1 for _ in self.__find(connection, collection_name, selection, []))
+
+    def sample(self, db_name: str, collection_name: str, size: int) -> list[dict]:
+        connection = self.__connect(db_name)
+        if connection is None or not self.__has_collection(connection, collection_name):
+            return []
+        # SQLite keeps only the 'size' rows with the smallest random numbers while it scans the table
+        sql = f"SELECT _id, document FROM {_quote(collection_name)} ORDER BY random() LIMIT ?"
+        documents = []
+        for key, fields in connection.execute(sql, (size,)):
+            document = {"_id": key}
+            document.update(json.loads(fields))
+            documents.append(document)
+        return documents
+
+    def increment_identity(self, db_name: str, table_name: str, increment_by: int):
+        collection_name = "__next_identity"
+        matched_count = self.__update_one(db_name, collection_name, {"_id": table_name}, {"$inc": {"value": increment_by}})
+        if matched_count == 0:
+            raise ValueError(
+                f"Failed to increment next identity value in collection [{collection_name}] for table [{table_name}]."
+            )
+
+    def update_one(self, db_name: str, collection_name: str, query: dict, update: dict):
+        self.__update_one(db_name, collection_name, query, update)
+
+    def find_one_and_update(self, db_name: str, collection_name: str, query: dict, update: dict) -> dict | None:
+        connection = self.__connect(db_name)
+        if connection is None or not self.__has_collection(connection, collection_name):
+            return None
+        # the write lock is taken before the read, so no other connection can update the document in between
+        with _transaction(connection, immediate=True):
+            document = next(self.__find(connection, collection_name, query), None)
+            if document is None:
+                return None
+            updated_document = copy.deepcopy(document)
+            _apply_update(updated_document, update)
+            connection.execute(f"UPDATE {_quote(collection_name)} SET document = ? WHERE _id = ?",
+                               (_dump_fields(updated_document), document["_id"]))
+        return document
+
+    def replace_many(self, db_name: str, collection_name: str, documents: list[dict]):
+        self.__insert(db_name, collection_name, documents, replace=True)
+
+    def __db_path(self, db_name: str) -> str:
+        return os.path.join(self.__data_dir, db_name + ".db")
+
+    def __connect(self, db_name: str, create: bool = False) -> sqlite3.Connection | None:
+        """
+        Get the connection to the file of a database.
+        If the file does not exist, create it only if 'create' is set, else return None.
+        """
+        if self.__connections is None:
+            raise ConnectionError("Embedded storage is not open.")
+        connection = self.__connections.get(db_name)
+        if connection is not None:
+            return connection
+        path = self.__db_path(db_name)
+        if not create and not os.path.exists(path):
+            return None
+        # autocommit mode, transactions are started explicitly
+        connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        self.__connections[db_name] = connection
+        return connection
+
+    def __has_collection(self, connection: sqlite3.Connection, collection_name: str) -> bool:
+        row = connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                 (collection_name,)).fetchone()
+        return row is not None
+
+    def __create_table(self, connection: sqlite3.Connection, collection_name: str):
+        connection.execute(
+            f"CREATE TABLE {_quote(collection_name)} (_id PRIMARY KEY NOT NULL, document TEXT NOT NULL) WITHOUT ROWID"
+        )
+
+    def __insert(self, db_name: str, collection_name: str, documents: list[dict], replace: bool = False):
+        """
+        Insert the documents in a single transaction. Like in MongoDB, a missing collection is created on insert.
+        :param replace: overwrite the documents with the same keys instead of failing
+        """
+        connection = self.__connect(db_name, create=True)
+        if not self.__has_collection(connection, collection_name):
+            self.__create_table(connection, collection_name)
+        rows = [(doc["_id"], _dump_fields(doc)) for doc in documents]
+        with _transaction(connection):
+            command = "INSERT OR REPLACE" if replace else "INSERT"
+            connection.executemany(f"{command} INTO {_quote(collection_name)} (_id, document) VALUES (?, ?)", rows)
+
+    def __find_duplicate(self, db_name: str, collection_name: str, documents: list[dict]) -> int:
+        """
+        Find the position of the first document whose key is already in the collection or earlier in the batch.
+        """
+        keys = [doc["_id"] for doc in documents]
+        existing_keys = {doc["_id"] for doc in self.select(db_name, collection_name, {"_id": {"$in": keys}})}
+        seen_keys = set()
+        for i, key in enumerate(keys):
+            if key in existing_keys or key in seen_keys:
+                return i
+            seen_keys.add(key)
+        return 0
+
+    def __find(self, connection: sqlite3.Connection, collection_name: str, selection: dict | None,
+               projection: list[str] | None = None, batch_size: int = 1000):
+        """
+        Generator of the documents matching the selection, the collection must exist.
+        The condition on "_id" is evaluated by SQLite, the rest of the selection in Python.
+        If only some fields are projected and the whole selection is evaluated by SQLite, the fields are extracted by
+        SQLite too, without parsing the whole document.
+        The rows are fetched from SQLite in batches of 'batch_size'.
+        """
+        key_condition, rest = _split_selection(selection)
+        if projection is not None and not rest:
+            yield from self.__find_projected(connection, collection_name, key_condition, projection, batch_size)
+            return
+        seen_keys = set()  # the branches of an "$or" may overlap
+        for where, params in _compile_key_condition(key_condition):
+            sql = f"SELECT _id, document FROM {_quote(collection_name)}{where} ORDER BY _id"
+            for key, fields in _fetch_in_batches(connection.execute(sql, params), batch_size):
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                document = {"_id": key}
+                document.update(json.loads(fields))
+                if not rest or _matches(document, rest):
+                    if projection is not None:
+                        document = {field: document.get(field) for field in ["_id"] + projection if field in document}
+                    yield document
+
+    def __find_projected(self, connection: sqlite3.Connection, collection_name: str, key_condition,
+                         projection: list[str], batch_size: int):
+        paths = [_json_path(field) for field in projection]
+        extracted = "".join(", json_extract(document, ?), json_type(document, ?)" for _ in projection)
+        seen_keys = set()  # the branches of an "$or" may overlap
+        for where, params in _compile_key_condition(key_condition):
+            sql = f"SELECT _id{extracted} FROM {_quote(collection_name)}{where} ORDER BY _id"
+            cursor = connection.execute(sql, [p for path in paths for p in (path, path)] + params)
+            for row in _fetch_in_batches(cursor, batch_size):
+                if row[0] in seen_keys:
+                    continue
+                seen_keys.add(row[0])
+                document = {"_id": row[0]}
+                for i, field in enumerate(projection):
+                    value, json_type = row[1 + 2 * i], row[2 + 2 * i]
+                    if json_type is None:  # the field is missing
+                        continue
+                    # arrays and objects are extracted as JSON text
+                    document[field] = json.loads(value) if json_type in ("array", "object") else value
+                yield document
+
+    def __update_one(self, db_name: str, collection_name: str, query: dict, update: dict) -> int:
+        """
+        Update the first document matching the query.
+        :return: the number of matched documents (0 or 1)
+        """
+        return 0 if self.find_one_and_update(db_name, collection_name, query, update) is None else 1
+
+
+@contextmanager
+def _transaction(connection: sqlite3.Connection, immediate: bool = False):
+    """
+    :param immediate: take the write lock at the start of the transaction instead of at its first write
+    """
+    connection.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def _fetch_in_batches(cursor: sqlite3.Cursor, batch_size: int):
+    """
+    Generator of the rows of a cursor, fetched 'batch_size' rows at a time.
+    """
+    rows = cursor.fetchmany(batch_size)
+    while rows:
+        yield from rows
+        rows = cursor.fetchmany(batch_size)
+
+
+def _quote(name: str) -> str:
+    """
+    Quote a collection name to be used as an SQL table name.
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _dump_fields(document: dict) -> str:
+    """
+    Serialize every field of a document except its key.
+    """
+    return json.dumps({field: value for field, value in document.items() if field != "_id"})
+
+
+def _json_path(field: str) -> str:
+    """
+    JSON path of a top level field, for the SQLite JSON functions.
+    """
+    return '$."' + field.replace('"', '\\"') + '"'
+
+
+def _split_selection(selection: dict | None) -> tuple:
+    """
+    Split a selection into the condition on the "_id" field and the rest of the selection.
+    An "$or" of key equalities is turned into an "$in" condition, an "$or" of other key conditions is kept as an "$or"
+    of the conditions.
+    """
+    if not selection:
+        return None, {}
+    if "_id" in selection:
+        rest = {field: condition for field, condition in selection.items() if field != "_id"}
+        return selection["_id"], rest
+    branches = selection.get("$or")
+    if len(selection) == 1 and branches is not None:
+        if all(list(branch.keys()) == ["_id"] for branch in branches):
+            if not any(isinstance(branch["_id"], dict) for branch in branches):
+                return {"$in": [branch["_id"] for branch in branches]}, {}
+            return {"$or": [branch["_id"] for branch in branches]}, {}
+    return None, selection
+
+
+def _compile_key_condition(condition) -> list[tuple[str, list]]:
+    """
+    Translate a condition on the "_id" field into SQL WHERE clauses with their parameters.
+    Long "$in" conditions are split into more clauses, and an "$or" of conditions gives a clause for each of them; each
+    clause has to be executed.
+    """
+    if condition is None:
+        return [("", [])]
+    if not isinstance(condition, dict):
+        return [(" WHERE _id = ?", [condition])]
+    if list(condition.keys()) == ["$or"]:
+        return [clause for branch in condition["$or"] for clause in _compile_key_condition(branch)]
+    if list(condition.keys()) == ["$in"]:
+        values = list(condition["$in"])
+        chunks = [values[i:i + _MAX_PARAMETERS] for i in range(0, len(values), _MAX_PARAMETERS)]
+        return [(f" WHERE _id IN ({', '.join('?' * len(chunk))})", chunk) for chunk in chunks]
+    clauses = []
+    params = []
+    for op, operand in condition.items():
+        if op in _SQL_OPERATORS:
+            clauses.append(f"_id {_SQL_OPERATORS[op]} ?")
+            params.append(operand)
+        elif op in ("$in", "$nin"):
+            negation = "NOT " if op == "$nin" else ""
+            clauses.append(f"_id {negation}IN ({', '.join('?' * len(operand))})")
+            params.extend(operand)
+        else:
+            raise ValueError(f"Unsupported query operator '{op}'")
+    return [(" WHERE " + " AND ".join(clauses), params)]
+
+
+def _matches(document: dict, query: dict) -> bool:
+    """
+    Check if a document matches a query written in the MongoDB query language.
+    """
+    for field, condition in query.items():
+        match field:
+            case "$or":
+                if not any(_matches(document, branch) for branch in condition):
+                    return False
+            case "$and":
+                if not all(_matches(document, branch) for branch in condition):
+                    return False
+            case _:
+                if not _matches_condition(document.get(field), condition):
+                    return False
+    return True
+
+
+def _matches_condition(value, condition) -> bool:
+    if isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+        return all(_compare(value, op, operand) for op, operand in condition.items())
+    return _compare(value, "$eq", condition)
+
+
+def _compare(value, op: str, operand) -> bool:
+    if isinstance(value, list) and op not in ("$ne", "$nin"):
+        # an array matches if the whole array or any of its elements matches
+        if op == "$eq" and value == operand:
+            return True
+        return any(_compare(element, op, operand) for element in value)
+    try:
+        match op:
+            case "$eq":
+                return value == operand
+            case "$ne":
+                return not _compare(value, "$eq", operand)
+            case "$lt":
+                return value < operand
+            case "$lte":
+                return value <= operand
+            case "$gt":
+                return value > operand
+            case "$gte":
+                return value >= operand
+            case "$in":
+                return value in operand
+            case "$nin":
+                return not _compare(value, "$in", operand)
+            case _:
+                raise ValueError(f"Unsupported query operator '{op}'")
+    except TypeError:
+        # values of different types never match, like in MongoDB
+        return False
+
+
+def _apply_update(document: dict, update: dict):
+    """
+    Apply the operators of an update written in the MongoDB query language on a document.
+    """
+    for op, fields in update.items():
+        match op:
+            case "$set":
+                document.update(fields)
+            case "$inc":
+                for field, increment in fields.items():
+                    document[field] = document.get(field, 0) + increment
+            case "$push":
+                for field, value in fields.items():
+                    values = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                    document[field] = document.get(field, []) + list(values)
+            case "$pull":
+                for field, condition in fields.items():
+                    document[field] = [v for v in document.get(field, []) if not _matches_condition(v, condition)]
+            case _:
+                raise ValueError(f"Unsupported update operator '{op}'")
@@ -44,7 +44,5 @@ class Index(Dbo):
         for uq in table.get_unique_keys():
             if i_col_names == uq.get_column_names():
                 return True
-        # compare with primary key
-        if table.get_primary_key().get_column_names():
-            return True
-        return True
+        # the keys of the primary key are unique too
+        return table.has_primary_key() and i_col_names == table.get_primary_key().get_column_names()
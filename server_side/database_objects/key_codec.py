@@ -0,0 +1,156 @@
+"""
+Order-preserving encoding of keys.
+
+The values of the key columns are encoded by their column types into a byte string, so that comparing two encoded keys
+byte by byte gives the same result as comparing the values column by column. The bytes are stored as a string (one
+character per byte), which keeps the order both in MongoDB and in SQLite.
+
+Layout of an encoded value:
+    - null:     0x00
+    - int:      0x01 + 8 bytes big-endian with the sign bit flipped
+    - float:    0x01 + 8 bytes of the IEEE 754 double, with the sign bit flipped for positive numbers and every bit
+                flipped for negative numbers
+    - varchar:  0x01 + the UTF-8 bytes with every 0x00 escaped as 0x00 0xFF, terminated by 0x00 0x01
+
+A key is the concatenation of the encoded values. Encoded values are self-delimiting, so keys can be concatenated and
+split again without a separator, and the keys starting with the encoding of some values are exactly the keys whose
+first columns hold those values.
+"""
+import struct
+
+_NULL = b"\x00"
+_NOT_NULL = b"\x01"
+_ESCAPED_ZERO = b"\x00\xff"
+_TERMINATOR = b"\x00\x01"
+_SIGN_BIT = 1 << 63
+_ALL_BITS = (1 << 64) - 1
+
+
+def encode_key(values: list, types: list[str]) -> str:
+    """
+    Encode the values of the key columns into a key.
+
+    Example:
+        - input: [2, "'horse'"], ["int", "varchar"]
+        - output: "\\x01\\x80\\x00\\x00\\x00\\x00\\x00\\x00\\x02\\x01'horse'\\x00\\x01"
+
+    :param values: the values of the columns, they are cast to the type of their column
+    :param types: the datatypes of the columns
+    """
+    if len(values) != len(types):
+        raise ValueError(f"Expected {len(types)} key values, got {len(values)}")
+    encoded = b"".join(_encode_value(value, datatype) for value, datatype in zip(values, types))
+    return encoded.decode("latin-1")
+
+
+def decode_key(key: str, types: list[str]) -> list:
+    """
+    Decode a key into the values of the key columns.
+    """
+    values, end = _decode_values(key.encode("latin-1"), 0, types)
+    if end != len(key):
+        raise ValueError(f"Key {key!r} does not match the types {types}")
+    return values
+
+
+def split_keys(concatenated: str, types: list[str]) -> list[str]:
+    """
+    Split concatenated keys of the given column types into separate keys.
+    """
+    data = concatenated.encode("latin-1")
+    keys: list[str] = []
+    start = 0
+    while start < len(data):
+        _, end = _decode_values(data, start, types)
+        keys.append(concatenated[start:end])
+        start = end
+    return keys
+
+
+def prefix_successor(key: str) -> str | None:
+    """
+    The smallest string that is greater than every string starting with the given key.
+    Returns None if there is no such string.
+    """
+    stripped = key.rstrip("\xff")
+    if not stripped:
+        return None
+    return stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+
+def key_range_condition(logical_op: str, key: str) -> dict:
+    """
+    Translate a comparison of the first key columns into a condition on the encoded keys, in the MongoDB query language.
+
+    :param logical_op: one of "<", ">", "<=", ">=", "="
+    :param key: the encoded values that the first key columns are compared with
+    """
+    successor = prefix_successor(key)
+    match logical_op:
+        case "=":
+            return {"$gte": key, "$lt": successor} if successor is not None else {"$gte": key}
+        case "<":
+            return {"$lt": key}
+        case "<=":
+            return {"$lt": successor} if successor is not None else {"$gte": ""}
+        case ">":
+            return {"$gte": successor} if successor is not None else {"$lt": ""}
+        case ">=":
+            return {"$gte": key}
+        case _:
+            raise NotImplementedError(f"Invalid operator'{logical_op}'")
+
+
+def _encode_value(value, datatype: str) -> bytes:
+    if value is None:
+        return _NULL
+    match datatype:
+        case "int":
+            value = int(value)
+            if not -_SIGN_BIT <= value < _SIGN_BIT:
+                raise ValueError(f"Value {value} is out of the range of int")
+            return _NOT_NULL + struct.pack(">Q", value + _SIGN_BIT)
+        case "float":
+            bits = struct.unpack(">Q", struct.pack(">d", float(value)))[0]
+            bits = bits ^ _ALL_BITS if bits & _SIGN_BIT else bits | _SIGN_BIT
+            return _NOT_NULL + struct.pack(">Q", bits)
+        case "varchar":
+            return _NOT_NULL + str(value).encode("utf-8").replace(b"\x00", _ESCAPED_ZERO) + _TERMINATOR
+        case _:
+            raise ValueError(f"Unknown datatype '{datatype}'.")
+
+
+def _decode_values(data: bytes, start: int, types: list[str]) -> tuple[list, int]:
+    """
+    Decode the values of the given types starting at the given position.
+    :return: the values and the position after the last one
+    """
+    values = []
+    pos = start
+    for datatype in types:
+        if pos >= len(data):
+            raise ValueError(f"Key {data!r} is too short for the types {types}")
+        tag = data[pos:pos + 1]
+        pos += 1
+        if tag == _NULL:
+            values.append(None)
+            continue
+        match datatype:
+            case "int":
+                values.append(struct.unpack(">Q", data[pos:pos + 8])[0] - _SIGN_BIT)
+                pos += 8
+            case "float":
+                bits = struct.unpack(">Q", data[pos:pos + 8])[0]
+                bits = bits ^ _SIGN_BIT if bits & _SIGN_BIT else bits ^ _ALL_BITS
+                values.append(struct.unpack(">d", struct.pack(">Q", bits))[0])
+                pos += 8
+            case "varchar":
+                # an escaped 0x00 is always followed by 0xFF, so the first 0x00 0x01 is the terminator
+                end = data.find(_TERMINATOR, pos)
+                if end == -1:
+                    raise ValueError(f"Unterminated varchar in key {data!r}")
+                values.append(data[pos:end].replace(_ESCAPED_ZERO, b"\x00").decode("utf-8"))
+                pos = end + len(_TERMINATOR)
+            case _:
+                raise ValueError(f"Unknown datatype '{datatype}'.")
+    return values, pos
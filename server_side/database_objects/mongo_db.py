@@ -1,5 +1,9 @@
+from typing import Iterator
+
 import pymongo
 
+from server_side.database_objects.storage_engine import StorageEngine, DuplicateKeyError
+
 # MongoDB client, no outside access is allowed.
 __client__: pymongo.MongoClient | None = None
 
@@ -40,10 +44,32 @@ def insert_one(db_name: str, collection_name: str, key_value_pair: tuple[str, st
         collection.insert_one({"_id": key, "value": value})  # insert a key-value pair into mongoDB collection
     except pymongo.errors.DuplicateKeyError:
         # catch the error if there are duplicate keys
-        raise ValueError(f"Duplicate key [{key}] in collection [{collection_name}]")
+        raise DuplicateKeyError(collection_name, key)
     return key
 
 
+def insert_many(db_name: str, collection_name: str, documents: list[dict]) -> list:
+    """
+    Insert documents into a collection in one ordered batch, without any validation.
+    Returns the keys of the inserted documents on success.
+    """
+    global __client__
+    if not documents:
+        return []
+    collection = __client__[db_name][collection_name]
+    # noinspection PyUnresolvedReferences
+    try:
+        collection.insert_many(documents, ordered=True)
+    except pymongo.errors.BulkWriteError as e:
+        # an ordered batch stops at the first error, the documents before it are inserted
+        error = e.details["writeErrors"][0]
+        if error.get("code") == 11000:  # duplicate key error code
+            index = error["index"]
+            raise DuplicateKeyError(collection_name, documents[index]["_id"], index)
+        raise
+    return [doc["_id"] for doc in documents]
+
+
 def insert_one_int(db_name: str, collection_name: str, key_value_pair: tuple[str, int]) -> str:
     """
     Insert a document into a collection with the value part as an integer.
@@ -113,20 +139,76 @@ def get_collection_names(db_name: str) -> list[str]:
     return db.list_collection_names()
 
 
-def select(db_name: str, collection_name: str, selection: dict = None) -> list[dict]:
+def select(db_name: str, collection_name: str, selection: dict = None, projection: list[str] = None) -> list[dict]:
     """
     Sends the query to the database and returns a key-value based dictionary.
     :param db_name: name of the database
     :param collection_name: name of the collection
     :param selection: query to filter the documents
+    :param projection: the fields to return besides "_id", all fields if not given
     """
     global __client__
     db = __client__[db_name]
     collection: pymongo.collection.Collection = db[collection_name]
-    result = collection.find(selection if not None else {}, {"_id": 1, "value": 1})
+    fields = {"_id": 1, **{field: 1 for field in projection}} if projection is not None else None
+    result = collection.find(selection if selection is not None else {}, fields)
     return list(result)
 
 
+def select_iter(db_name: str, collection_name: str, selection: dict = None, projection: list[str] = None,
+                batch_size: int = 1000) -> Iterator[dict]:
+    """
+    Sends the query to the database and returns a cursor over the matching documents in the order of their keys, which
+    fetches them in batches.
+    :param db_name: name of the database
+    :param collection_name: name of the collection
+    :param selection: query to filter the documents
+    :param projection: the fields to return besides "_id", all fields if not given
+    :param batch_size: the number of documents fetched from the server at once
+    """
+    global __client__
+    db = __client__[db_name]
+    collection: pymongo.collection.Collection = db[collection_name]
+    fields = {"_id": 1, **{field: 1 for field in projection}} if projection is not None else None
+    cursor = collection.find(selection if selection is not None else {}, fields)
+    return cursor.sort("_id", pymongo.ASCENDING).batch_size(batch_size)
+
+
+def find_one(db_name: str, collection_name: str, selection: dict = None, projection: list[str] = None) -> dict | None:
+    """
+    Sends the query to the database and returns the first matching document, or None.
+    :param db_name: name of the database
+    :param collection_name: name of the collection
+    :param selection: query to filter the documents
+    :param projection: the fields to return besides "_id", all fields if not given
+    """
+    global __client__
+    db = __client__[db_name]
+    collection: pymongo.collection.Collection = db[collection_name]
+    fields = {"_id": 1, **{field: 1 for field in projection}} if projection is not None else None
+    return collection.find_one(selection if selection is not None else {}, fields)
+
+
+def sample(db_name: str, collection_name: str, size: int) -> list[dict]:
+    """
+    Returns a random sample of the documents of a collection, all of them if there are no more than 'size'.
+    """
+    global __client__
+    db = __client__[db_name]
+    collection: pymongo.collection.Collection = db[collection_name]
+    return list(collection.aggregate([{"$sample": {"size": size}}]))
+
+
+def count(db_name: str, collection_name: str, selection: dict = None) -> int:
+    """
+    Returns the number of documents matching the selection.
+    """
+    global __client__
+    db = __client__[db_name]
+    collection: pymongo.collection.Collection = db[collection_name]
+    return collection.count_documents(selection if selection is not None else {})
+
+
 def increment_identity(db_name: str, table_name: str, increment_by: int):
     """
     Increment the next identity value of a table in the __next_identity collection of the given database.
@@ -155,33 +237,101 @@ def update_one(db_name: str, collection_name: str, query: dict, update: dict):
     collection.update_one(query, update)
 
 
-def overwrite_collection(db_from: str, collection_from: str, db_to: str, collection_to: str):
+def find_one_and_update(db_name: str, collection_name: str, query: dict, update: dict) -> dict | None:
     """
-    Overwrite the collection in db_to with the collection in db_from.
-    It works even if db_to and collection_to do not exist.
-    Can be used to force copy a collection from one database to another.
-    :param db_from: source database name
-    :param collection_from: source collection name
-    :param db_to: destination database name
-    :param collection_to: destination collection name
+    Update a document in a collection atomically and return it as it was before the update.
+    No validation is performed.
     """
     global __client__
-    __client__[db_from][collection_from].aggregate([{"$out": {"db": db_to, "coll": collection_to}}])
+    db = __client__[db_name]
+    collection = db[collection_name]
+    return collection.find_one_and_update(query, update, return_document=pymongo.ReturnDocument.BEFORE)
 
 
-def save_collection(db_name: str, collection_name: str):
+def replace_many(db_name: str, collection_name: str, documents: list[dict]):
     """
-    Save the collection to a temporary database.
-    Only saves the collection if it isn't already in the temporary database.
-    The collection is saved in a temporary database with the name _temp.
-    The collection is saved with the name like: __dbname#collname.
+    Write the documents as they are: replace the documents that have the same keys, insert the rest.
+    No validation is performed.
     """
     global __client__
-    db = __client__[db_name]
-    collection = db[collection_name]
-    temp_db_name = "_temp"
-    temp_coll_name = f"__{db_name}#{collection_name}"
-    if temp_coll_name in __client__[temp_db_name].list_collection_names():
+    if not documents:
         return
-    collection.aggregate([{"$out": {"db": temp_db_name, "coll": temp_coll_name}}])
+    collection = __client__[db_name][collection_name]
+    requests = [pymongo.ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in documents]
+    collection.bulk_write(requests, ordered=False)
+
+
+class MongoEngine(StorageEngine):
+    """
+    Storage engine that keeps the data in a MongoDB server, using the functions of this module.
+    """
+
+    def __init__(self, host_str: str | None = None):
+        self.__host_str = host_str
+
+    def __reduce__(self):
+        # a copy is made of the settings alone and is closed, e.g. in a worker process that opens its own connection
+        return MongoEngine, (self.__host_str,)
+
+    def set_up(self):
+        set_up(self.__host_str)
+
+    def close_down(self):
+        close_down()
+
+    def insert_one(self, db_name: str, collection_name: str, key_value_pair: tuple[str, str]) -> str:
+        return insert_one(db_name, collection_name, key_value_pair)
+
+    def insert_many(self, db_name: str, collection_name: str, documents: list[dict]) -> list:
+        return insert_many(db_name, collection_name, documents)
+
+    def insert_one_int(self, db_name: str, collection_name: str, key_value_pair: tuple[str, int]) -> str:
+        return insert_one_int(db_name, collection_name, key_value_pair)
+
+    def create_collection(self, db_name: str, collection_name: str):
+        create_collection(db_name, collection_name)
+
+    def drop_database(self, db_name: str):
+        drop_database(db_name)
+
+    def drop_collection(self, db_name: str, collection_name: str):
+        drop_collection(db_name, collection_name)
+
+    def delete(self, db_name: str, collection_name: str, query: dict) -> int:
+        return delete(db_name, collection_name, query)
+
+    def get_database_names(self) -> list[str]:
+        return get_database_names()
+
+    def get_collection_names(self, db_name: str) -> list[str]:
+        return get_collection_names(db_name)
+
+    def select(self, db_name: str, collection_name: str, selection: dict = None,
+               projection: list[str] = None) -> list[dict]:
+        return select(db_name, collection_name, selection, projection)
+
+    def select_iter(self, db_name: str, collection_name: str, selection: dict = None, projection: list[str] = None,
+                    batch_size: int = 1000) -> Iterator[dict]:
+        return select_iter(db_name, collection_name, selection, projection, batch_size)
+
+    def find_one(self, db_name: str, collection_name: str, selection: dict = None,
+                 projection: list[str] = None) -> dict | None:
+        return find_one(db_name, collection_name, selection, projection)
+
+    def count(self, db_name: str, collection_name: str, selection: dict = None) -> int:
+        return count(db_name, collection_name, selection)
+
+    def sample(self, db_name: str, collection_name: str, size: int) -> list[dict]:
+        return sample(db_name, collection_name, size)
+
+    def increment_identity(self, db_name: str, table_name: str, increment_by: int):
+        increment_identity(db_name, table_name, increment_by)
+
+    def update_one(self, db_name: str, collection_name: str, query: dict, update: dict):
+        update_one(db_name, collection_name, query, update)
+
+    def find_one_and_update(self, db_name: str, collection_name: str, query: dict, update: dict) -> dict | None:
+        return find_one_and_update(db_name, collection_name, query, update)
 
+    def replace_many(self, db_name: str, collection_name: str, documents: list[dict]):
+        replace_many(db_name, collection_name, documents)
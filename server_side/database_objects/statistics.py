@@ -0,0 +1,217 @@
+"""
+Statistics of the tables, used to estimate how many rows a condition or a join matches.
+
+The statistics are computed from a random sample of the rows of a table: the number of distinct values of a column is
+extrapolated from the sample, and the equi-depth histogram splits the sorted values of the sample into buckets holding
+the same number of values, so the buckets of a skewed column are narrow where the values are dense.
+"""
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import groupby
+
+_DEFAULT_EQUALITY_SELECTIVITY = 0.1  # used when a value can't be placed into the histogram
+_DEFAULT_RANGE_SELECTIVITY = 1 / 3
+
+
+class ColumnStatistics:
+    def __init__(self, distinct_count: float = 0.0, null_fraction: float = 0.0, histogram: list | None = None):
+        """
+        :param distinct_count: the estimated number of distinct non-null values of the column
+        :param null_fraction: the estimated fraction of rows where the column is null
+        :param histogram: the bounds of the equi-depth histogram of the non-null values, from the smallest value to the
+            largest; each pair of neighbouring bounds holds the same fraction of the values
+        """
+        self.__distinct_count = distinct_count
+        self.__null_fraction = null_fraction
+        self.__histogram = histogram if histogram is not None else []
+
+    def __dict__(self) -> dict:
+        return {
+            "distinct_count": self.__distinct_count,
+            "null_fraction": self.__null_fraction,
+            "histogram": self.__histogram
+        }
+
+    def from_dict(self, data: dict) -> 'ColumnStatistics':
+        self.__distinct_count = data.get("distinct_count", 0.0)
+        self.__null_fraction = data.get("null_fraction", 0.0)
+        self.__histogram = data.get("histogram", [])
+        return self
+
+    def get_distinct_count(self) -> float:
+        return self.__distinct_count
+
+    def get_null_fraction(self) -> float:
+        return self.__null_fraction
+
+    def get_histogram(self) -> list:
+        return self.__histogram
+
+    def estimate_selectivity(self, op: str, value) -> float:
+        """
+        The estimated fraction of the rows of the table where "<column> <op> <value>" holds.
+        Nulls never match.
+        """
+        not_null = 1.0 - self.__null_fraction
+        try:
+            equal = self.__equal_fraction(value)
+            match op:
+                case "=":
+                    fraction = equal
+                case "!=" | "<>":
+                    fraction = 1.0 - equal
+                case "<":
+                    fraction = self.__less_fraction(value)
+                case "<=":
+                    fraction = self.__less_fraction(value) + equal
+                case ">":
+                    fraction = 1.0 - self.__less_fraction(value) - equal
+                case ">=":
+                    fraction = 1.0 - self.__less_fraction(value)
+                case _:
+                    fraction = _DEFAULT_RANGE_SELECTIVITY
+        except TypeError:
+            # the value can't be compared with the values of the column
+            fraction = _DEFAULT_EQUALITY_SELECTIVITY if op == "=" else _DEFAULT_RANGE_SELECTIVITY
+        return not_null * min(max(fraction, 0.0), 1.0)
+
+    def __equal_fraction(self, value) -> float:
+        """
+        The fraction of the non-null values that are equal to the value.
+        A value repeated over several bounds of the histogram is frequent: it fills the buckets between them. The rest
+        of the values share the rest of the rows evenly.
+        """
+        histogram = self.__histogram
+        if not histogram:
+            return 1.0 / self.__distinct_count if self.__distinct_count else 0.0
+        if value < histogram[0] or value > histogram[-1]:
+            return 0.0
+        bucket_count = len(histogram) - 1
+        repeats = bisect_right(histogram, value) - bisect_left(histogram, value)
+        if repeats > 1:
+            return (repeats - 1) / bucket_count
+        frequent_count, frequent_fraction = 0, 0.0
+        for _, group in groupby(histogram):
+            group_repeats = sum(1 for _ in group)
+            if group_repeats > 1:
+                frequent_count += 1
+                frequent_fraction += (group_repeats - 1) / bucket_count
+        rare_count = self.__distinct_count - frequent_count
+        if rare_count < 1:
+            return 1.0 / max(self.__distinct_count, 1.0)
+        return max(1.0 - frequent_fraction, 0.0) / rare_count
+
+    def __less_fraction(self, value) -> float:
+        """
+        The fraction of the non-null values that are smaller than the value, interpolated inside a bucket of numbers.
+        """
+        histogram = self.__histogram
+        if not histogram:
+            return _DEFAULT_RANGE_SELECTIVITY
+        if value <= histogram[0]:
+            return 0.0
+        if value > histogram[-1]:
+            return 1.0
+        bucket_count = len(histogram) - 1
+        if bucket_count == 0:
+            return 0.0
+        position = bisect_left(histogram, value)
+        if histogram[position] == value:
+            return position / bucket_count
+        low, high = histogram[position - 1], histogram[position]
+        if isinstance(value, (int, float)) and isinstance(low, (int, float)) and isinstance(high, (int, float)):
+            inside = (value - low) / (high - low)
+        else:
+            inside = 0.5
+        return (position - 1 + inside) / bucket_count
+
+
+class TableStatistics:
+    def __init__(self, row_count: int = 0, columns: dict[str, ColumnStatistics] | None = None):
+        """
+        :param row_count: the number of rows of the table when the statistics were computed
+        :param columns: the statistics of the columns by column name
+        """
+        self.__row_count = row_count
+        self.__columns = columns if columns is not None else {}
+
+    def __dict__(self) -> dict:
+        return {
+            "row_count": self.__row_count,
+            "columns": {name: column.__dict__() for name, column in self.__columns.items()}
+        }
+
+    def from_dict(self, data: dict) -> 'TableStatistics':
+        self.__row_count = data.get("row_count", 0)
+        self.__columns = {name: ColumnStatistics().from_dict(column)
+                          for name, column in data.get("columns", {}).items()}
+        return self
+
+    def get_row_count(self) -> int:
+        return self.__row_count
+
+    def get_column(self, column_name: str) -> ColumnStatistics | None:
+        return self.__columns.get(column_name)
+
+    def estimate_selectivity(self, column_name: str, op: str, value) -> float | None:
+        """
+        The estimated fraction of the rows where "<column> <op> <value>" holds, None if the column has no statistics.
+        """
+        column = self.__columns.get(column_name)
+        if column is None:
+            return None
+        return column.estimate_selectivity(op, value)
+
+
+def build_table_statistics(column_names: list[str], sample: list[list], row_count: int,
+                           bucket_count: int) -> TableStatistics:
+    """
+    Compute the statistics of a table from a random sample of its rows.
+
+    :param column_names: the names of the columns, in the order of the values of the sampled records
+    :param sample: the sampled records, lists of values
+    :param row_count: the number of rows of the whole table
+    :param bucket_count: the number of buckets of the histograms
+    """
+    columns = {}
+    for position, column_name in enumerate(column_names):
+        values = [record[position] for record in sample]
+        not_null = sorted(value for value in values if value is not None)
+        null_fraction = (len(values) - len(not_null)) / len(values) if values else 0.0
+        distinct_count = _estimate_distinct_count(not_null, row_count * (1.0 - null_fraction))
+        columns[column_name] = ColumnStatistics(distinct_count, null_fraction, _equi_depth_bounds(not_null, bucket_count))
+    return TableStatistics(row_count, columns)
+
+
+def _estimate_distinct_count(values: list, total_count: float) -> float:
+    """
+    The number of distinct values of the whole column, estimated from the values in a sample of it with the Duj1
+    estimator of Haas and Stokes: the values seen only once in the sample hint how many values were not sampled.
+    :param total_count: the number of non-null values in the whole column
+    """
+    sample_count = len(values)
+    if sample_count == 0:
+        return 0.0
+    counts = Counter(values)
+    distinct = len(counts)
+    if sample_count >= total_count:
+        # the whole column was read
+        return float(distinct)
+    seen_once = sum(1 for count in counts.values() if count == 1)
+    if seen_once == sample_count:
+        # every sampled value is different, the column is most probably unique
+        return float(total_count)
+    estimate = sample_count * distinct / (sample_count - seen_once + seen_once * sample_count / total_count)
+    return float(min(max(estimate, distinct), total_count))
+
+
+def _equi_depth_bounds(sorted_values: list, bucket_count: int) -> list:
+    """
+    The bounds of the equi-depth histogram of sorted values: the smallest value, the values at every 1/bucket_count of
+    them, and the largest value.
+    """
+    if not sorted_values:
+        return []
+    last = len(sorted_values) - 1
+    bucket_count = min(bucket_count, max(last, 1))
+    return [sorted_values[round(i * last / bucket_count)] for i in range(bucket_count + 1)]
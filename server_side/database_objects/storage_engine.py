@@ -0,0 +1,215 @@
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+
+class DuplicateKeyError(ValueError):
+    """
+    Raised when a document is inserted with a key that already exists in the collection.
+    """
+
+    def __init__(self, collection_name: str, key, index: int = 0):
+        """
+        :param index: the position of the offending document in the inserted batch
+        """
+        super().__init__(f"Duplicate key [{key}] in collection [{collection_name}]")
+        self.__key = key
+        self.__index = index
+
+    def get_key(self):
+        return self.__key
+
+    def get_index(self) -> int:
+        return self.__index
+
+
+class StorageEngine(ABC):
+    """
+    Interface of the key-value storage that the DbManager talks to.
+
+    A storage engine is made of databases, a database is made of collections and a collection is made of documents.
+    Every document has a unique key stored under "_id", the rest of the fields make up its value.
+
+    Queries and updates are given as dictionaries in the MongoDB query language. Engines that are not MongoDB only need
+    to understand the subset of it that the DbManager uses:
+        - queries: field equality, "$eq", "$ne", "$lt", "$lte", "$gt", "$gte", "$in", "$nin", "$or", "$and"
+        - updates: "$set", "$inc", "$push" (also with "$each"), "$pull" (also with "$in")
+    """
+
+    @abstractmethod
+    def set_up(self):
+        """
+        Open the connection to the storage.
+        """
+        pass
+
+    @abstractmethod
+    def close_down(self):
+        """
+        Close the connection to the storage. Does nothing if it is not open.
+        """
+        pass
+
+    @abstractmethod
+    def insert_one(self, db_name: str, collection_name: str, key_value_pair: tuple[str, str]) -> str:
+        """
+        Insert a document into a collection without any validation.
+        Raises DuplicateKeyError if the key already exists.
+        Returns the key of the inserted document on success.
+        """
+        pass
+
+    @abstractmethod
+    def insert_many(self, db_name: str, collection_name: str, documents: list[dict]) -> list:
+        """
+        Insert documents into a collection in one ordered batch, without any validation.
+        Raises DuplicateKeyError for the first document whose key already exists, the documents before it may or may
+        not have been inserted.
+        Returns the keys of the inserted documents on success.
+        """
+        pass
+
+    @abstractmethod
+    def insert_one_int(self, db_name: str, collection_name: str, key_value_pair: tuple[str, int]) -> str:
+        """
+        Insert a document into a collection with the value part as an integer.
+        """
+        pass
+
+    @abstractmethod
+    def create_collection(self, db_name: str, collection_name: str):
+        """
+        Create new collection in a database.
+        """
+        pass
+
+    @abstractmethod
+    def drop_database(self, db_name: str):
+        """
+        Deletes a database only if it exists.
+        """
+        pass
+
+    @abstractmethod
+    def drop_collection(self, db_name: str, collection_name: str):
+        """
+        Deletes a collection.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, db_name: str, collection_name: str, query: dict) -> int:
+        """
+        Deletes documents from a collection, without any validation.
+        Returns the number of deleted documents.
+        """
+        pass
+
+    @abstractmethod
+    def get_database_names(self) -> list[str]:
+        """
+        Get a list of database names.
+        """
+        pass
+
+    @abstractmethod
+    def get_collection_names(self, db_name: str) -> list[str]:
+        """
+        Get a list of collection names in a database.
+        """
+        pass
+
+    @abstractmethod
+    def select(self, db_name: str, collection_name: str, selection: dict = None,
+               projection: list[str] = None) -> list[dict]:
+        """
+        Returns the documents of a collection that match the selection.
+        :param db_name: name of the database
+        :param collection_name: name of the collection
+        :param selection: query to filter the documents
+        :param projection: the fields to return besides "_id", all fields if not given
+        """
+        pass
+
+    @abstractmethod
+    def select_iter(self, db_name: str, collection_name: str, selection: dict = None, projection: list[str] = None,
+                    batch_size: int = 1000) -> Iterator[dict]:
+        """
+        Like select, but the documents are yielded one by one as they are read, and they are read from the storage in
+        batches, so only a batch of documents is held in memory at a time.
+        The documents come in the order of their keys.
+        :param batch_size: the number of documents read from the storage at once
+        """
+        pass
+
+    @abstractmethod
+    def find_one(self, db_name: str, collection_name: str, selection: dict = None,
+                 projection: list[str] = None) -> dict | None:
+        """
+        Returns the first document of a collection that matches the selection, or None if there is no such document.
+        The search stops at the first match.
+        :param projection: the fields to return besides "_id", all fields if not given
+        """
+        pass
+
+    @abstractmethod
+    def count(self, db_name: str, collection_name: str, selection: dict = None) -> int:
+        """
+        Returns the number of documents of a collection that match the selection.
+        """
+        pass
+
+    @abstractmethod
+    def sample(self, db_name: str, collection_name: str, size: int) -> list[dict]:
+        """
+        Returns a random sample of the documents of a collection, all of them if there are no more than 'size'.
+        """
+        pass
+
+    @abstractmethod
+    def increment_identity(self, db_name: str, table_name: str, increment_by: int):
+        """
+        Increment the next identity value of a table in the __next_identity collection of the given database.
+        """
+        pass
+
+    @abstractmethod
+    def update_one(self, db_name: str, collection_name: str, query: dict, update: dict):
+        """
+        Update a document in a collection.
+        No validation is performed.
+        """
+        pass
+
+    @abstractmethod
+    def find_one_and_update(self, db_name: str, collection_name: str, query: dict, update: dict) -> dict | None:
+        """
+        Update the first document matching the query atomically, no other update can come in between the read and the
+        write. No validation is performed.
+        Returns the document as it was before the update, or None if no document matches the query.
+        """
+        pass
+
+    @abstractmethod
+    def replace_many(self, db_name: str, collection_name: str, documents: list[dict]):
+        """
+        Write the documents as they are: replace the documents that have the same keys, insert the rest.
+        No validation is performed.
+        """
+        pass
+
+
+def create_storage_engine(engine_name: str) -> StorageEngine:
+    """
+    Create the storage engine with the given name: "mongo" or "embedded".
+    The settings of the engines are read from the config module.
+    """
+    from server_side import config
+    match engine_name:
+        case "mongo":
+            from server_side.database_objects.mongo_db import MongoEngine
+            return MongoEngine(config.MONGO_HOST)
+        case "embedded":
+            from server_side.database_objects.embedded_db import EmbeddedEngine
+            return EmbeddedEngine(config.EMBEDDED_DATA_DIR)
+        case _:
+            raise ValueError(f"Unknown storage engine '{engine_name}'")
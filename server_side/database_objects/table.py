@@ -34,6 +34,12 @@ class Table(Dbo):
         self.__foreign_keys = foreign_keys if foreign_keys else []
         self.__unique_keys = unique_keys if unique_keys else []
         self.__checks = checks if checks else []
+        # lookup structures built from the columns and indexes on first use, dropped whenever those change
+        self.__column_names: list[str] | None = None
+        self.__column_positions: dict[str, int] | None = None  # [key=<column name>, value=<position>]
+        self.__indexes_by_name: dict[str, Index] | None = None
+        self.__indexes_by_columns: dict[tuple, Index] | None = None  # [key=tuple(<column names>), value=<index>]
+        self.__indexed_column_names: set[str] | None = None
 
     def __dict__(self) -> dict:
         return {
@@ -55,28 +61,47 @@ class Table(Dbo):
         self.__foreign_keys = [ForeignKey().from_dict(fk) for fk in data.get("foreign_keys", [])]
         self.__unique_keys = [Unique().from_dict(uk) for uk in data.get("unique_keys", [])]
         self.__checks = [Check().from_dict(c) for c in data.get("checks", [])]
+        self.__invalidate_lookups()
         return self
 
+    def __invalidate_lookups(self):
+        """
+        Drop the lookup structures, they are rebuilt on first use. Must be called whenever the columns or the indexes
+        change.
+        """
+        self.__column_names = None
+        self.__column_positions = None
+        self.__indexes_by_name = None
+        self.__indexes_by_columns = None
+        self.__indexed_column_names = None
+
+    def __get_column_positions(self) -> dict[str, int]:
+        if self.__column_positions is None:
+            self.__column_positions = {col.get_name(): i for i, col in enumerate(self.__columns)}
+        return self.__column_positions
+
+    def __get_indexes_by_columns(self) -> dict[tuple, Index]:
+        if self.__indexes_by_columns is None:
+            self.__indexes_by_columns = {}
+            for index in self.__indexes:
+                # the first index on the columns is kept, as with a scan from the front
+                self.__indexes_by_columns.setdefault(tuple(index.get_column_names()), index)
+        return self.__indexes_by_columns
+
     def get_name(self) -> str:
         return self.__name
 
     def get_column(self, col_name):
-        for col in self.__columns:
-            if col.get_name() == col_name:
-                return col
-        raise ValueError(f"Column {col_name} not found")
+        position = self.__get_column_positions().get(col_name)
+        if position is None:
+            raise ValueError(f"Column {col_name} not found")
+        return self.__columns[position]
 
     def find_column(self, col_name):
-        for i, col in enumerate(self.__columns):
-            if col.get_name() == col_name:
-                return i
-        return -1
+        return self.__get_column_positions().get(col_name, -1)
 
     def exists_column(self, col_name):
-        for col in self.__columns:
-            if col.get_name() == col_name:
-                return True
-        return False
+        return col_name in self.__get_column_positions()
 
     def get_columns(self) -> list[Column]:
         return self.__columns
@@ -85,10 +110,9 @@ class Table(Dbo):
         return self.__indexes
 
     def has_index_with(self, column_name: str) -> bool:
-        for index in self.get_indexes():
-            if column_name in index.get_column_names():
-                return True
-        return False
+        if self.__indexed_column_names is None:
+            self.__indexed_column_names = {col_name for index in self.__indexes for col_name in index.get_column_names()}
+        return column_name in self.__indexed_column_names
 
     def column_is_indexed(self, column_name: str) -> bool:
         """Returns True if the column is indexed or is the primary key."""
@@ -101,29 +125,52 @@ class Table(Dbo):
 
     def set_columns(self, columns: list[Column]):
         self.__columns = columns
+        self.__invalidate_lookups()
 
     def set_indexes(self, indexes: list[Index]):
         self.__indexes = indexes
+        self.__invalidate_lookups()
 
     def get_index(self, index_name: str) -> Index | None:
-        for index in self.__indexes:
-            if index.get_name() == index_name:
-                return index
-        return None
+        if self.__indexes_by_name is None:
+            self.__indexes_by_name = {}
+            for index in self.__indexes:
+                self.__indexes_by_name.setdefault(index.get_name(), index)
+        return self.__indexes_by_name.get(index_name)
 
     def get_index_by_column_names(self, column_names) -> Index | None:
-        for index in self.get_indexes():
-            if index.get_column_names() == column_names:
+        return self.__get_indexes_by_columns().get(tuple(column_names))
+
+    def get_index_by_leading_column(self, column_name: str) -> Index | None:
+        """
+        Returns an index whose first column is the given one, preferring the index on that column alone.
+        """
+        index = self.get_index_by_column_names([column_name])
+        if index is not None:
+            return index
+        for column_names, index in self.__get_indexes_by_columns().items():
+            if column_names and column_names[0] == column_name:
                 return index
         return None
 
+    def is_leading_indexed(self, column_name: str) -> bool:
+        """
+        Returns True if the records can be looked up by the column: it is the first column of the primary key or of an
+        index.
+        """
+        if self.__primary_key is not None and self.__primary_key.get_column_names()[0] == column_name:
+            return True
+        return self.get_index_by_leading_column(column_name) is not None
+
     def add_column(self, column: Column):
         # TO-DO: check if the column already exists
         self.__columns.append(column)
+        self.__invalidate_lookups()
 
     def add_index(self, index: Index):
         # TO-DO: check if the index already exists
         self.__indexes.append(index)
+        self.__invalidate_lookups()
 
     def get_primary_key(self) -> PrimaryKey:
         return self.__primary_key
@@ -132,14 +179,22 @@ class Table(Dbo):
         self.__primary_key = primary_key
 
     def get_column_names(self) -> list[str]:
-        return [col.get_name() for col in self.__columns]
+        """
+        Returns the column names in the order of the columns. The list is shared between the calls, it must not be
+        modified.
+        """
+        if self.__column_names is None:
+            self.__column_names = [col.get_name() for col in self.__columns]
+        return self.__column_names
+
+    def get_column_types(self, column_names: list[str]) -> list[str]:
+        """Returns the datatypes of the given columns, in the given order."""
+        return [self.get_column(col_name).get_type() for col_name in column_names]
 
     def get_column_positions(self, column_names: list[str]) -> list[int]:
-        positions = []
-        for i, col_name in enumerate(self.get_column_names()):
-            if col_name in column_names:
-                positions.append(i)
-        return positions
+        """Returns the positions of the given columns, in the order of the columns of the table."""
+        column_positions = self.__get_column_positions()
+        return sorted(column_positions[col_name] for col_name in set(column_names) if col_name in column_positions)
 
     def has_primary_key(self) -> bool:
         return self.__primary_key is not None
@@ -180,7 +235,7 @@ class Table(Dbo):
             col_names: str = self.concatenate_names(key.get_column_names())
             idx_name = f"i_pk_{self.get_name()}_{col_names}"
             index = Index(idx_name, key.get_column_names())
-            self.__indexes.append(index)
+            self.add_index(index)
         elif isinstance(key, ForeignKeyCObj):
             self.__foreign_keys.append(ForeignKey(key))
             # create index for the FK
@@ -188,14 +243,14 @@ class Table(Dbo):
             ref_col_names: str = self.concatenate_names(key.get_referenced_column_names())
             idx_name = f"i_fk_{self.get_name()}_{src_col_names}_{key.get_referenced_table_name()}_{ref_col_names}"
             index = Index(idx_name, key.get_source_column_names())
-            self.__indexes.append(index)
+            self.add_index(index)
         elif isinstance(key, UniqueCObj):
             self.__unique_keys.append(Unique(key))
             # create index for the UQ
             col_names: str = self.concatenate_names(key.get_column_names())
             idx_name = f"i_uq_{self.get_name()}_{col_names}"
             index = Index(idx_name, key.get_column_names())
-            self.__indexes.append(index)
+            self.add_index(index)
         else:
             raise ValueError(f"Invalid key type: {type(key)}")
 
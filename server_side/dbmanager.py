@@ -1,11 +1,34 @@
 import json
 import os
-
-from server_side.database_objects import Database, Table, Column, Index, PrimaryKey, ForeignKey, mongo_db
-from server_side import __working_dir__
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+from server_side.database_objects import (
+    Database,
+    Table,
+    Column,
+    Index,
+    PrimaryKey,
+    ForeignKey,
+    StorageEngine,
+    key_codec,
+    DuplicateKeyError,
+    create_storage_engine,
+    TableStatistics
+)
+from server_side import __working_dir__, config
+from server_side.undo_log import UndoLog
+from server_side.execution.access_path import AccessPath
+from server_side.database_objects.statistics import build_table_statistics
 from server_side.interpreter import datatypes
 
 
+_BUCKET_NR_LENGTH = 9  # length of an encoded bucket number: a tag and 8 bytes
+_PARTITION_SAMPLES = 64  # the number of keys sampled for each part when a range of keys is split
+# the layout of the stored rows and keys: 1 was '#'-joined strings, 2 is typed documents under order-preserving keys
+_STORAGE_FORMAT_VERSION = 2
+
+
 class DbManager:
     __dbs: list[Database] = []
     __working_db = 0  # the index of the database we're currently using
@@ -13,10 +36,34 @@ class DbManager:
     # the file where the database sceleton is stored:
     __db_file: str = os.path.join(__working_dir__, "databases.json")
 
-    def __init__(self):
-        mongo_db.close_down()  # close the MongoDB client if it's open
-        mongo_db.set_up()  # start the new MongoDB client
+    def __init__(self, engine: StorageEngine | None = None, db_file: str | None = None):
+        """
+        :param engine: the storage engine that keeps the data, by default the one set in the config module
+        :param db_file: the file where the database skeleton is stored, by default databases.json
+        """
+        if engine is None:
+            engine = create_storage_engine(config.STORAGE_ENGINE)
+        if db_file is not None:
+            self.__db_file = db_file
+        self.__engine: StorageEngine = engine
+        self.__undo_log: UndoLog = UndoLog()  # changes of the current request in the storage
+        # identity values reserved ahead, not given out yet: [key=(<db_name>, <table_name>), value=list[<value>]]
+        self.__identity_cache: dict[tuple[str, str], list[int]] = {}
+        # the database structure as it was last saved, and its version
+        self.__committed_dbs: list[Database] = []
+        self.__catalog_version: int = 0
+        self.__committed_catalog_version: int = 0
+        self.__db_positions: dict[str, int] = {}  # [key=<database name>, value=<position of the database>]
+        # the statistics of the tables, kept in a file next to the structure file:
+        # [key=(<db_name>, <table_name>), value=<statistics>]
+        self.__statistics_file: str = os.path.join(os.path.dirname(self.__db_file), "statistics.json")
+        self.__statistics: dict[tuple[str, str], TableStatistics] = {}
+        # rows inserted or deleted since the statistics were computed: [key=(<db_name>, <table_name>), value=<count>]
+        self.__modified_rows: dict[tuple[str, str], int] = {}
+        self.__engine.close_down()  # close the connection to the storage if it's open
+        self.__engine.set_up()  # open the new connection
         self.load_databases()
+        self.load_statistics()
 
     def __dict__(self) -> dict:
         return {
@@ -26,15 +73,20 @@ class DbManager:
 
     def load_databases(self):
         if os.path.exists(self.__db_file):
-            self.__dbs = self.get_previous_state()
+            self.__set_databases(self.get_previous_state())
+            self.check_storage_format()
         else:
-            with open(self.__db_file, "w") as f:
-                self.__dbs = self.create_default_databases()
-                json.dump([db.__dict__() for db in self.__dbs], f, indent=4)
+            self.__set_databases(self.create_default_databases())
+            self.update_db_structure_file()
+        self.__committed_dbs = _copy_databases(self.__dbs)
+        self.__committed_catalog_version = self.__catalog_version
 
     def update_db_structure_file(self):
-        with open(self.__db_file, "w") as f:
-            json.dump([db.__dict__() for db in self.__dbs], f, indent=4)
+        """
+        Write the database structure into the structure file atomically: the file is written under a temporary name
+        and renamed over the old one, so a crash leaves either the old or the new structure, never a part of it.
+        """
+        _write_json_file(self.__db_file, [db.__dict__() for db in self.__dbs])
 
     def get_previous_state(self) -> list[Database]:
         """
@@ -46,42 +98,130 @@ class DbManager:
                 return [Database().from_dict(db) for db in data]
         raise FileNotFoundError("Database structure file not found.")
 
+    def check_storage_format(self):
+        """
+        Make sure that the data of every database is stored in the format this server reads.
+        The format is recorded in the __storage_format collection of the database. A database without it was stored in
+        the first format, which is only accepted if its tables are empty; its format is recorded then.
+        :raises ValueError: if a database holds data stored in another format
+        """
+        for db in self.__dbs:
+            db_name = db.get_name()
+            document = self.__engine.find_one(db_name, "__storage_format", {"_id": "version"})
+            version = document.get("value") if document is not None else 1
+            if version == 1 and all(self.__engine.count(db_name, table.get_name()) == 0 for table in db.get_tables()):
+                self.__engine.create_collection(db_name, "__storage_format")
+                self.__engine.insert_one_int(db_name, "__storage_format", ("version", _STORAGE_FORMAT_VERSION))
+            elif version != _STORAGE_FORMAT_VERSION:
+                raise ValueError(f"Database [{db_name}] is stored in format version {version}, the server reads version "
+                                 f"{_STORAGE_FORMAT_VERSION}. Export its data with the server it was created by, then "
+                                 f"drop the database and load the data again.")
+
+    def load_statistics(self):
+        """
+        Load the statistics of the tables from the statistics file, if it exists.
+        """
+        self.__statistics = {}
+        if os.path.exists(self.__statistics_file):
+            with open(self.__statistics_file, "r") as f:
+                data: dict[str, dict[str, dict]] = json.load(f)
+            for db_name, tables in data.items():
+                for table_name, statistics in tables.items():
+                    self.__statistics[(db_name, table_name)] = TableStatistics().from_dict(statistics)
+
+    def update_statistics_file(self):
+        """
+        Write the statistics of the tables into the statistics file atomically.
+        """
+        data: dict[str, dict[str, dict]] = {}
+        for (db_name, table_name), statistics in self.__statistics.items():
+            data.setdefault(db_name, {})[table_name] = statistics.__dict__()
+        _write_json_file(self.__statistics_file, data)
+
+    def analyze_table(self, db_name: str, table_name: str) -> TableStatistics:
+        """
+        Compute the statistics of a table from a random sample of STATISTICS_SAMPLE_SIZE rows and save them.
+        """
+        table = self.get_table(self.find_database(db_name), table_name)
+        if table is None:
+            raise ValueError(f"Table [{table_name}] not found")
+        row_count = self.__engine.count(db_name, table_name)
+        documents = self.__engine.sample(db_name, table_name, config.STATISTICS_SAMPLE_SIZE)
+        sample = [_record_values(document, table) for document in documents]
+        statistics = build_table_statistics(table.get_column_names(), sample, row_count,
+                                            config.STATISTICS_HISTOGRAM_BUCKETS)
+        self.__statistics[(db_name, table_name)] = statistics
+        self.__modified_rows.pop((db_name, table_name), None)
+        self.update_statistics_file()
+        return statistics
+
+    def get_table_statistics(self, db_name: str, table_name: str) -> TableStatistics:
+        """
+        The statistics of a table. They are computed first if the table has none yet, or if more rows were inserted or
+        deleted since they were computed than AUTO_ANALYZE_THRESHOLD + AUTO_ANALYZE_SCALE_FACTOR * <rows then>.
+        """
+        statistics = self.__statistics.get((db_name, table_name))
+        if statistics is None:
+            return self.analyze_table(db_name, table_name)
+        modified_rows = self.__modified_rows.get((db_name, table_name), 0)
+        if modified_rows > config.AUTO_ANALYZE_THRESHOLD + config.AUTO_ANALYZE_SCALE_FACTOR * statistics.get_row_count():
+            return self.analyze_table(db_name, table_name)
+        return statistics
+
+    def __count_modified_rows(self, db_name: str, table_name: str, count: int):
+        self.__modified_rows[(db_name, table_name)] = self.__modified_rows.get((db_name, table_name), 0) + count
+
+    def __forget_statistics(self, db_name: str, table_name: str | None = None):
+        """
+        Remove the statistics of a table, or of all the tables of a database if no table is given.
+        """
+        cache_keys = [cache_key for cache_key in self.__statistics
+                      if cache_key[0] == db_name and (table_name is None or cache_key[1] == table_name)]
+        for cache_key in cache_keys:
+            del self.__statistics[cache_key]
+            self.__modified_rows.pop(cache_key, None)
+        if cache_keys:
+            self.update_statistics_file()
+
+    def get_catalog_version(self) -> int:
+        """
+        The version of the database structure, it grows with every change of the structure (DDL).
+        """
+        return self.__catalog_version
+
+    def catalog_changed(self) -> bool:
+        """
+        Check if the database structure changed since the last saved state.
+        """
+        return self.__catalog_version != self.__committed_catalog_version
+
     def revert_changes(self):
-        prev_dbs: list[Database] = self.get_previous_state()
-        # resetting mongo can cause problems that the structure sync can fix, so we do it first
-        self.reset_mongo_modifications()
-        self.sync_structure_with_mongo(prev_dbs, self.get_databases())
-        self.__dbs = prev_dbs
+        # undoing the changes can cause problems that the structure sync can fix, so we do it first
+        self.__undo_log.rollback(self.__engine)
+        if self.catalog_changed():
+            self.sync_structure_with_storage(self.__committed_dbs, self.get_databases())
+            # the saved state is kept untouched, the databases are a copy of it
+            self.__set_databases(_copy_databases(self.__committed_dbs))
+            self.__catalog_version = self.__committed_catalog_version
         self.__working_db = self.__prev_working_db
         print("Changes reverted.")
 
     def save_changes(self):
         """
-        Compare the previous state of the structure file with the current state.
-        If anything has changed, save the changes to the database too.
-        Then update the structure file.
+        Make the changes of the request permanent.
+        If the database structure has changed, sync it with the storage, write the structure file and keep the new
+        state in memory as the last saved state. Otherwise, nothing is read or written.
         """
-        prev_dbs: list[Database] = self.get_previous_state()  # load the previous state of the structure file
-        self.sync_structure_with_mongo(self.get_databases(), prev_dbs)  # sync the structure file with the database
-        mongo_db.drop_database("_temp")  # drop the temporary database used for the transaction
-        self.update_db_structure_file()  # update the structure file
+        if self.catalog_changed():
+            self.sync_structure_with_storage(self.get_databases(), self.__committed_dbs)
+            self.update_db_structure_file()  # update the structure file
+            self.__committed_dbs = _copy_databases(self.__dbs)
+            self.__committed_catalog_version = self.__catalog_version
+        self.__undo_log.clear()  # the changes of the request are permanent, they can't be undone anymore
         self.__prev_working_db = self.__working_db
         print("Changes saved.")
 
-    def reset_mongo_modifications(self):
-        """
-        Load collections from the _temp database into their original, then drop the _temp database.
-        """
-        temp_db_name: str = "_temp"
-        temp_coll_names: list[str] = mongo_db.get_collection_names(temp_db_name)
-        # each collection in the temporary database has a name like: __dbname#tablename
-        for temp_coll_name in temp_coll_names:
-            db_name, table_name = temp_coll_name[2:].split("#")  # remove the first two characters and split by '#'
-            mongo_db.overwrite_collection(temp_db_name, temp_coll_name, db_name, table_name)
-        mongo_db.drop_database(temp_db_name)  # drop the temporary database
-        print("MongoDB modifications reset.")
-
-    def sync_structure_with_mongo(self, next_dbs: list[Database], prev_dbs: list[Database]):
+    def sync_structure_with_storage(self, next_dbs: list[Database], prev_dbs: list[Database]):
         """
         Sync two states of the structure file with the database.
         Whatever is in the next state but not in the previous state nor in the database, will be created.
@@ -90,47 +230,49 @@ class DbManager:
         :return:
         """
         for db in next_dbs:
-            self.sync_database_with_mongo(db)
+            self.sync_database_with_storage(db)
         prev_db_names: list[str] = [db.get_name() for db in prev_dbs]
         next_db_names: list[str] = [db.get_name() for db in next_dbs]
         # drop databases that we don't want in the next state of our database structure
         old_db_names: list[str] = [prev_db for prev_db in prev_db_names if prev_db not in next_db_names]
         for db in old_db_names:
-            mongo_db.drop_database(db)
+            self.__engine.drop_database(db)
 
-    def sync_database_with_mongo(self, db: Database):
+    def sync_database_with_storage(self, db: Database):
         """
-        Create tables and indexes that are in the database object but not in MongoDB.
-        Drop tables and indexes that are in MongoDB but not in the database object.
+        Create tables and indexes that are in the database object but not in the storage.
+        Drop tables and indexes that are in the storage but not in the database object.
         """
         curr_tables: list[Table] = db.get_tables()
-        # table and index collection names in MongoDB:
-        mongo_coll_names: list[str] = mongo_db.get_collection_names(db.get_name())
+        # table and index collection names in the storage:
+        stored_coll_names: list[str] = self.__engine.get_collection_names(db.get_name())
         curr_index_coll_names: list[str] = []
         for table in curr_tables:  # create tables, and it's index collections if they are not present
-            if table.get_name() not in mongo_coll_names:
-                mongo_db.create_collection(db.get_name(), table.get_name())
+            if table.get_name() not in stored_coll_names:
+                self.__engine.create_collection(db.get_name(), table.get_name())
             else:
-                mongo_coll_names.remove(table.get_name())
+                stored_coll_names.remove(table.get_name())
             # index collections should be made by this stage, but if not, create them
             for index in table.get_indexes():
                 coll_name = _build_collection_name_for_index(table.get_name(), index.get_name())
                 curr_index_coll_names.append(coll_name)  # store the index collection names
-                if coll_name not in mongo_coll_names:
-                    mongo_db.create_collection(db.get_name(), coll_name)
+                if coll_name not in stored_coll_names:
+                    self.__engine.create_collection(db.get_name(), coll_name)
                 else:
-                    mongo_coll_names.remove(coll_name)
+                    stored_coll_names.remove(coll_name)
 
         curr_table_names: list[str] = [table.get_name() for table in curr_tables]
-        mongo_coll_names.remove("__next_identity")
-        # drop tables and index collections that are in MongoDB but not in the database object
-        for coll_name in mongo_coll_names:
+        stored_coll_names.remove("__next_identity")
+        stored_coll_names.remove("__storage_format")
+        # drop tables and index collections that are in the storage but not in the database object
+        for coll_name in stored_coll_names:
             if coll_name not in curr_table_names or coll_name not in curr_index_coll_names:
-                mongo_db.drop_collection(db.get_name(), coll_name)
+                self.__engine.drop_collection(db.get_name(), coll_name)
 
     def create_table(self, table: Table):
-        # create collection in MongoDB
-        mongo_db.create_collection(self.get_working_db().get_name(), table.get_name())
+        # create collection in the storage
+        self.__engine.create_collection(self.get_working_db().get_name(), table.get_name())
+        self.__undo_log.log_create_collection(self.get_working_db().get_name(), table.get_name())
 
         # create document in '__next_identity' collection, storing the next identity value of this table
         # (only if it has an identity column)
@@ -138,81 +280,88 @@ class DbManager:
         if identity_col:
             seed = identity_col.get_identity_seed()
             identity_collection_name: str = "__next_identity"
-            mongo_db.save_collection(self.get_working_db().get_name(), identity_collection_name)
-            mongo_db.insert_one_int(self.get_working_db().get_name(),
-                                    identity_collection_name,
-                                    (table.get_name(), seed))
+            self.__engine.insert_one_int(self.get_working_db().get_name(),
+                                         identity_collection_name,
+                                         (table.get_name(), seed))
+            self.__undo_log.log_insert(self.get_working_db().get_name(), identity_collection_name, [table.get_name()])
 
         # update structure file
         self.get_working_db().add_table(table)
-        # self.update_db_structure_file()
+        self.__catalog_version += 1
 
     def create_index(self, index: Index, table_name: str):
         table: Table = self.get_table(self.get_working_db_index(), table_name)
-        pr_key_names: list[str] = table.get_primary_key().get_column_names()
-        column_names: list[str] = table.get_column_names()
 
         # create a collection with concatenated table name and index name that starts with an '__'
         coll_name: str = _build_collection_name_for_index(table_name, index.get_name())  # collection name
-        mongo_db.create_collection(self.get_working_db().get_name(), coll_name)
-        selection: dict = {}
-        kv_pairs: list[dict] = mongo_db.select(self.get_working_db().get_name(), table_name, selection)
-
-        records: list[dict] = []
-        for kv_pair in kv_pairs:  # rebuild records from key-value pairs
-            records.append(split_key_value_pair(kv_pair, column_names, pr_key_names))
-
+        self.__engine.create_collection(self.get_working_db().get_name(), coll_name)
+        self.__undo_log.log_create_collection(self.get_working_db().get_name(), coll_name)
         index_column_names: list[str] = index.get_column_names()
-        used_column_names = index_column_names + pr_key_names  # columns that are used in the index
+        index_column_types: list[str] = table.get_column_types(index_column_names)
+        # only the index columns are read from the stored records
+        documents: list[dict] = self.__engine.select(self.get_working_db().get_name(), table_name, {},
+                                                     index_column_names)
 
+        # pair the index key (encoded values of the index columns) with the key of the record
         idx_kv_pairs: list[tuple[str, str]] = []
-        for record in records:
-            key, value = build_key_value_pair(record, used_column_names, index_column_names)
-            idx_kv_pairs.append((key, value))
+        for document in documents:
+            record = split_document(document, table)
+            key = key_codec.encode_key([record.get(n) for n in index_column_names], index_column_types)
+            idx_kv_pairs.append((key, document.get("_id")))
 
-        if not table.is_unique(index_column_names):  # if the column names are not unique concatenate repeating values
-            idx_kv_pairs = concatenate_repeating(idx_kv_pairs)
+        if index.is_unique_index(table):
+            index_documents = [{"_id": key, "value": value} for key, value in idx_kv_pairs]
+        else:
+            # if the column names are not unique, the keys of the records are gathered into posting lists
+            index_documents = []
+            for key, record_keys in group_repeating(idx_kv_pairs):
+                index_documents.extend(_build_posting_buckets(key, record_keys))
 
-        # insert the key-value pairs into the index collection
-        mongo_db.save_collection(self.get_working_db().get_name(), coll_name)
-        for key_value_pair in idx_kv_pairs:
-            try:
-                mongo_db.insert_one(self.get_working_db().get_name(), coll_name, key_value_pair)
-            except ValueError:
-                raise
+        # insert the documents into the index collection in one batch
+        self.__engine.insert_many(self.get_working_db().get_name(), coll_name, index_documents)
 
         # update structure file
         table.add_index(index)
-        # self.update_db_structure_file()
+        self.__catalog_version += 1
 
     def drop_database(self, db_name):
-        # delete db in MongoDB
-        mongo_db.drop_database(db_name)
+        # delete db in the storage
+        self.__engine.drop_database(db_name)
+        for cache_key in [cache_key for cache_key in self.__identity_cache if cache_key[0] == db_name]:
+            del self.__identity_cache[cache_key]
+        self.__forget_statistics(db_name)
 
         # update json structure
         self.__dbs.pop(self.get_db_index(db_name))
-        # self.update_db_structure_file()
+        self.__set_databases(self.__dbs)
+        self.__catalog_version += 1
 
     def drop_table(self, table_name):
         """
         Delete index collections if they exist.
-        Delete collection in MongoDB.
+        Delete collection in the storage.
         Delete identity value from the __next_identity collection if identity is set.
         """
         for index in self.get_working_db().get_table(table_name).get_indexes():
             coll_name = _build_collection_name_for_index(table_name, index.get_name())
-            mongo_db.drop_collection(self.get_working_db().get_name(), coll_name)
-        mongo_db.drop_collection(self.get_working_db().get_name(), table_name)
+            self.__engine.drop_collection(self.get_working_db().get_name(), coll_name)
+        self.__engine.drop_collection(self.get_working_db().get_name(), table_name)
 
         # delete identity value from the __next_identity collection if identity is set
         identity_col = self.get_table(self.get_working_db_index(), table_name).get_identity_column()
         if identity_col:
-            mongo_db.save_collection(self.get_working_db().get_name(), "__next_identity")
-            mongo_db.delete(self.get_working_db().get_name(), "__next_identity", {"_id": table_name})
+            db_name = self.get_working_db().get_name()
+            identity_documents = self.__engine.select(db_name, "__next_identity", {"_id": table_name})
+            self.__engine.delete(db_name, "__next_identity", {"_id": table_name})
+            self.__undo_log.log_delete(db_name, "__next_identity", identity_documents)
+            self.__identity_cache.pop((db_name, table_name), None)
+
+        self.__forget_statistics(self.get_working_db().get_name(), table_name)
 
         # update structure, this should be done in the end because the table is needed for other operations
         db = self.get_working_db()
         db.remove_table(table_name)
+        self.__catalog_version += 1
 
     def get_default_database_names(self) -> list[str]:
         return ["master"]
@@ -220,10 +369,14 @@ class DbManager:
     def get_databases(self) -> list[Database]:
         return self.__dbs
 
+    def __set_databases(self, dbs: list[Database]):
+        self.__dbs = dbs
+        self.__db_positions = {}
+        for idx, db in enumerate(dbs):
+            self.__db_positions.setdefault(db.get_name(), idx)
+
     def get_db_index(self, db_name):
-        for (idx, db) in enumerate(self.__dbs):
-            if db.get_name() == db_name:
-                return idx
+        return self.__db_positions.get(db_name)
 
     def get_working_db_index(self) -> int:
         return self.__working_db
@@ -235,22 +388,13 @@ class DbManager:
         return self.get_databases()[self.get_working_db_index()]
 
     def find_database(self, name: str) -> int:
-        for (idx, db) in enumerate(self.get_databases()):
-            if db.get_name() == name:
-                return idx
-        return -1
+        return self.__db_positions.get(name, -1)
 
     def find_table(self, db_idx: int, table_name: str) -> int:
-        for (idx, tb) in enumerate(self.get_databases()[db_idx].get_tables()):
-            if tb.get_name() == table_name:
-                return idx
-        return -1
+        return self.get_databases()[db_idx].find_table(table_name)
 
     def get_table(self, db_idx: int, table_name: str) -> Table | None:
-        for tb in self.get_databases()[db_idx].get_tables():
-            if tb.get_name() == table_name:
-                return tb
-        return None
+        return self.get_databases()[db_idx].get_table(table_name)
 
     def get_database_names(self) -> list[str]:
         return [db.get_name() for db in self.get_databases()]
@@ -259,7 +403,7 @@ class DbManager:
         return [tb.get_name() for tb in self.get_databases()[db_idx].get_tables()]
 
     def get_column_names(self, db_idx, table_idx) -> list[str]:
-        return [col.get_name() for col in self.get_databases()[db_idx].get_tables()[table_idx].get_columns()]
+        return self.get_databases()[db_idx].get_tables()[table_idx].get_column_names()
 
     def get_index_name(self, db_name, table_name, col_name):
         table: Table = self.get_table(self.get_db_index(db_name), table_name)
@@ -270,33 +414,66 @@ class DbManager:
         Retrieves the next identity value of a table and increments that value inside the __next_identity collection.
         :return: the next identity value of the given table
         """
-        document = mongo_db.select(db_name, "__next_identity", {"_id": table_name})[0]
-        next_identity = document.get("value")
-        identity_increment = self.get_table(
-            self.find_database(db_name),
-            table_name
-        ).get_identity_column().get_identity_increment()
-        mongo_db.increment_identity(db_name, table_name, identity_increment)
-        return next_identity
+        return self.reserve_identity_values(db_name, table_name, 1)[0]
 
-    def add_database(self, db: Database):
+    def reserve_identity_values(self, db_name: str, table_name: str, count: int) -> list[int]:
         """
-        Add new database to the list of databases.
+        Reserves the next 'count' identity values of a table, they are never given out again.
 
-        Create a default collection in the database (this information is only visible inside MongoDB) which stores the
-        last identity value of every table with an identity column.
-        Each document in the collection contains the table name and its last identity value.
+        The values are taken from the identity cache first. The missing ones are reserved in the __next_identity
+        collection with a single atomic increment, together with IDENTITY_CACHE_SIZE more values that are kept in the
+        cache for the next calls.
+        :return: the reserved identity values in increasing order of reservation
+        """
+        cached_values = self.__identity_cache.setdefault((db_name, table_name), [])
+        values = cached_values[:count]
+        del cached_values[:count]
+        missing = count - len(values)
+        if missing > 0:
+            identity_increment = self.get_table(
+                self.find_database(db_name),
+                table_name
+            ).get_identity_column().get_identity_increment()
+            reserved_count = missing + config.IDENTITY_CACHE_SIZE
+            # not recorded in the undo log: an identity value is never given out twice, even if the request fails
+            document = self.__engine.find_one_and_update(db_name, "__next_identity", {"_id": table_name},
+                                                         {"$inc": {"value": reserved_count * identity_increment}})
+            if document is None:
+                raise ValueError(f"Table [{table_name}] has no next identity value in database [{db_name}]")
+            reserved = [document.get("value") + i * identity_increment for i in range(reserved_count)]
+            values.extend(reserved[:missing])
+            cached_values.extend(reserved[missing:])
+        return values
+
+    def add_database(self, db: Database):
+        """
+        Add new database to the list of databases, and create its default collections in the storage.
         """
         self.__dbs.append(db)
-        mongo_db.create_collection(db.get_name(), "__next_identity")
+        self.__db_positions.setdefault(db.get_name(), len(self.__dbs) - 1)
+        self.__catalog_version += 1
+        self.__create_default_collections(db.get_name())
+
+    def __create_default_collections(self, db_name: str):
+        """
+        Create the default collections of a database, this information is only visible inside the storage.
+        The __next_identity collection stores the last identity value of every table with an identity column: each
+        document in the collection contains the table name and its last identity value.
+        The __storage_format collection stores the version of the format the data of the database is stored in.
+        """
+        self.__engine.create_collection(db_name, "__next_identity")
+        self.__engine.create_collection(db_name, "__storage_format")
+        self.__engine.insert_one_int(db_name, "__storage_format", ("version", _STORAGE_FORMAT_VERSION))
 
     def insert(self, db: Database, tb: Table, records: list[dict]) -> list[str]:
         """
         Inserts records into a table creating key-value pairs.
         Inserts records into the index collections if they exist.
         Checks if the database and table exist.
-        !Right now it inserts only one record at a time and if it fails it raises an exception,
-        but keeps the ones inserted before and ignores the rest.!
+
+        The records are written in one ordered batch into the table and one batch into each index collection.
+        If a key is duplicated an exception is raised naming the offending record, the records written before it are
+        undone together with the rest of the request.
         """
         # TO-DO: check if the record has the correct types
         db_idx = self.find_database(db.get_name())
@@ -308,54 +485,108 @@ class DbManager:
         pr = tb.get_primary_key()
         if not pr:
             raise ValueError(f"Table [{tb.get_name()}] has no primary key")
-        primary_key_names = pr.get_column_names()
         if len(column_names) == 0:
             # cannot insert a record into a table with no columns
             raise ValueError(f"Table [{tb.get_name()}] has no columns")
         if len(records) == 0:
             # cannot insert an empty record
             raise ValueError("Record is empty")
-        key_value_pairs: list[tuple[str, str]] = []
-        for record in records:
-            key, value = build_key_value_pair(record, column_names, primary_key_names)
-            key_value_pairs.append((key, value))
-        inserted_keys = []
-        indexes: list[Index] = tb.get_indexes()
-        mongo_db.save_collection(db.get_name(), tb.get_name())
-        for key_value_pair, record in zip(key_value_pairs, records):
-            try:
-                inserted_keys.append(mongo_db.insert_one(db.get_name(), tb.get_name(), key_value_pair))
-                for index in indexes:
-                    i_col_names: list[str] = index.get_column_names()
-                    # get the values for the index columns and concatenate them
-                    coll_keys: list[str] = [record[n] for n in i_col_names]
-                    coll_key = string_from_values(coll_keys)  # collection key
-                    coll_name = _build_collection_name_for_index(tb.get_name(), index.get_name())
-                    mongo_db.save_collection(db.get_name(), coll_name)
-                    # get the record from the index collection if it exists
-                    result = mongo_db.select(db.get_name(), coll_name, {"_id": coll_key})
-                    if tb.is_unique(i_col_names):
-                        # if the column names for the index are unique insert the record into the index collection
-                        # for insertion use the key part of the inserted record as value
-                        # and the collection key generated for the index as key
-                        mongo_db.insert_one(db.get_name(), coll_name, (coll_key, key_value_pair[0]))
-                    else:
-                        # if the column names for the index are not unique update the index collection if the key exists
-                        if result:
-                            # if the key exists in the index collection update the value
-                            new_value: str = string_from_values([result[0].get("value"), key_value_pair[0]])
-                            mongo_db.update_one(db.get_name(),
-                                                coll_name,
-                                                {"_id": coll_key},
-                                                {"$set": {"value": new_value}})
-                        else:
-                            # if the key does not exist in the index collection insert the record
-                            mongo_db.insert_one(db.get_name(), coll_name, (coll_key, key_value_pair[0]))
-
-            except ValueError:
-                raise
+        documents: list[dict] = [build_document(record, tb) for record in records]
+        inserted_keys = [document["_id"] for document in documents]
+        pk_col_names = pr.get_column_names()
+        self.__insert_batch(db.get_name(), tb.get_name(), documents, records,
+                            f"the primary key of table [{tb.get_name()}]", pk_col_names, tb.get_column_types(pk_col_names))
+        for index in tb.get_indexes():
+            i_col_names: list[str] = index.get_column_names()
+            i_col_types: list[str] = tb.get_column_types(i_col_names)
+            coll_name = _build_collection_name_for_index(tb.get_name(), index.get_name())
+            # pair the index key (encoded values of the index columns) with the key of the inserted record
+            index_pairs: list[tuple[str, str]] = []
+            for record, key in zip(records, inserted_keys):
+                index_pairs.append((key_codec.encode_key([record.get(n) for n in i_col_names], i_col_types), key))
+            if index.is_unique_index(tb):
+                # if the column names for the index are unique insert the pairs into the index collection
+                self.__insert_batch(db.get_name(),
+                                    coll_name,
+                                    [{"_id": coll_key, "value": key} for coll_key, key in index_pairs],
+                                    records, f"the unique index [{index.get_name()}]", i_col_names, i_col_types)
+            else:
+                # if the column names for the index are not unique add the keys to the posting lists
+                self.__add_postings(db.get_name(), coll_name, index_pairs)
+        self.__count_modified_rows(db.get_name(), tb.get_name(), len(inserted_keys))
         return inserted_keys
 
+    def __insert_batch(self, db_name: str, coll_name: str, documents: list[dict], records: list[dict], key_name: str,
+                       key_col_names: list[str], key_col_types: list[str]):
+        """
+        Insert documents into a collection in one ordered batch and record them in the undo log.
+        The document at each position was built from the record at the same position, a duplicate key is reported
+        against that record, with the decoded values of the key.
+
+        :param key_name: the primary key or the unique index the keys of the collection belong to, as it is reported
+        :param key_col_names: the columns of the keys
+        :param key_col_types: the types of the columns of the keys
+        """
+        try:
+            self.__engine.insert_many(db_name, coll_name, documents)
+        except DuplicateKeyError as e:
+            # the documents before the offending one may have been inserted
+            self.__undo_log.log_insert(db_name, coll_name, [doc["_id"] for doc in documents[:e.get_index()]])
+            key_values = key_codec.decode_key(e.get_key(), key_col_types)
+            raise ValueError(f"Cannot insert record {records[e.get_index()]}: duplicate value "
+                             f"({', '.join(str(value) for value in key_values)}) of the columns "
+                             f"({', '.join(key_col_names)}) in {key_name}")
+        self.__undo_log.log_insert(db_name, coll_name, [doc["_id"] for doc in documents])
+
+    def __add_postings(self, db_name: str, coll_name: str, index_pairs: list[tuple[str, str]]):
+        """
+        Add keys of records to the posting lists of a non-unique index.
+        The keys belonging to the same index key are pushed into the last bucket of its posting list while it has room,
+        the rest of them start new buckets. Only the sizes of the buckets are read, the posting lists are not.
+        """
+        grouped_pairs = group_repeating(list(index_pairs))
+        bucket_ranges = [{"_id": key_codec.key_range_condition("=", index_key)} for index_key, _ in grouped_pairs]
+        last_buckets: dict = {}  # (<bucket number>, <size>) of the last bucket of each index key
+        for document in self.__engine.select(db_name, coll_name, {"$or": bucket_ranges}, ["n"]):
+            index_key, bucket_nr = _split_bucket_id(document["_id"])
+            if index_key not in last_buckets or last_buckets[index_key][0] < bucket_nr:
+                last_buckets[index_key] = (bucket_nr, document["n"])
+
+        bucket_size = config.INDEX_BUCKET_SIZE
+        new_documents: list[dict] = []
+        for index_key, record_keys in grouped_pairs:
+            bucket_nr, size = last_buckets.get(index_key, (-1, bucket_size))
+            if size < bucket_size:
+                pushed_keys = record_keys[:bucket_size - size]
+                record_keys = record_keys[bucket_size - size:]
+                bucket_id = _build_bucket_id(index_key, bucket_nr)
+                self.__engine.update_one(db_name, coll_name, {"_id": bucket_id},
+                                         {"$push": {"value": {"$each": pushed_keys}}, "$inc": {"n": len(pushed_keys)}})
+                self.__undo_log.log_update_in_place(db_name, coll_name, bucket_id,
+                                                    {"$pull": {"value": {"$in": pushed_keys}},
+                                                     "$inc": {"n": -len(pushed_keys)}})
+            new_documents.extend(_build_posting_buckets(index_key, record_keys, bucket_nr + 1))
+        if new_documents:
+            self.__engine.insert_many(db_name, coll_name, new_documents)
+            self.__undo_log.log_insert(db_name, coll_name, [doc["_id"] for doc in new_documents])
+
+    def __read_index_entries(self, db_name: str, table: Table, index: Index, selection: dict) -> list[tuple[str, list]]:
+        """
+        Read the entries of an index whose documents match the selection.
+        The buckets of the posting list of a non-unique index key are merged into one entry.
+
+        :return: a list of (<index key>, <list of keys of the records>) pairs
+        """
+        coll_name = _build_collection_name_for_index(table.get_name(), index.get_name())
+        documents = self.__engine.select(db_name, coll_name, selection)
+        if index.is_unique_index(table):
+            return [(doc["_id"], [doc["value"]]) for doc in documents]
+        entries: dict = {}
+        for doc in documents:
+            index_key, _ = _split_bucket_id(doc["_id"])
+            entries.setdefault(index_key, []).extend(doc["value"])
+        return list(entries.items())
+
     def delete(self, db: Database, tb: Table, key: str) -> int:
         """
         Deletes records from index collections if they exist.
@@ -376,64 +607,66 @@ class DbManager:
         tb = self.get_databases()[db_idx].get_tables()[tb_idx]
         if not tb.has_primary_key():  # check if the table has a primary key because we can only delete by primary key
             raise ValueError(f"Table [{tb.get_name()}] has no primary key")
-        results = mongo_db.select(db.get_name(), tb.get_name(), {"_id": key})
+        results = self.__engine.select(db.get_name(), tb.get_name(), {"_id": key})
         if len(results) == 0:
             return 0
         result = results[0]
-        record: dict = split_key_value_pair(result, tb.get_column_names(), tb.get_primary_key().get_column_names())
+        record: dict = split_document(result, tb)
         indexes = tb.get_indexes()
         for index in indexes:
             i_col_names: list[str] = index.get_column_names()
             coll_name = _build_collection_name_for_index(tb.get_name(), index.get_name())
-            mongo_db.save_collection(db.get_name(), coll_name)
-            if tb.is_unique(i_col_names):
-                coll_key = string_from_values([record.get(n) for n in i_col_names])
-                mongo_db.delete(db.get_name(), coll_name, {"_id": coll_key})
+            coll_key = key_codec.encode_key([record.get(n) for n in i_col_names], tb.get_column_types(i_col_names))
+            if index.is_unique_index(tb):
+                self.__engine.delete(db.get_name(), coll_name, {"_id": coll_key})
+                # the deleted index entry points to the deleted record
+                self.__undo_log.log_delete(db.get_name(), coll_name, [{"_id": coll_key, "value": key}])
             else:
-                coll_key = string_from_values([record.get(n) for n in i_col_names])
-                index_result = mongo_db.select(db.get_name(), coll_name, {"_id": coll_key})
-                if index_result[0].get("value") == key:
-                    mongo_db.delete(db.get_name(), coll_name, {"_id": coll_key})
+                # find the bucket of the posting list that holds the key of the record
+                selection = {"_id": key_codec.key_range_condition("=", coll_key), "value": key}
+                bucket = self.__engine.select(db.get_name(), coll_name, selection, ["n"])[0]
+                if bucket["n"] == 1:
+                    self.__engine.delete(db.get_name(), coll_name, {"_id": bucket["_id"]})
+                    self.__undo_log.log_delete(db.get_name(), coll_name, [{"_id": bucket["_id"], "value": [key], "n": 1}])
                 else:
-                    values = values_from_string(index_result[0].get("value"))
-                    values.remove(key)
-                    new_value = string_from_values(values)
-                    mongo_db.update_one(db.get_name(), coll_name, {"_id": coll_key}, {"$set": {"value": new_value}})
-        mongo_db.save_collection(db.get_name(), tb.get_name())
-        del_count = mongo_db.delete(db.get_name(), tb.get_name(), {"_id": key})
+                    self.__engine.update_one(db.get_name(), coll_name, {"_id": bucket["_id"]},
+                                             {"$pull": {"value": key}, "$inc": {"n": -1}})
+                    self.__undo_log.log_update_in_place(db.get_name(), coll_name, bucket["_id"],
+                                                        {"$push": {"value": key}, "$inc": {"n": 1}})
+        del_count = self.__engine.delete(db.get_name(), tb.get_name(), {"_id": key})
+        self.__undo_log.log_delete(db.get_name(), tb.get_name(), results)
+        self.__count_modified_rows(db.get_name(), tb.get_name(), del_count)
         return del_count
 
-    def find_by_primary_key(self, db_name: str, table_name: str, pk_column_values: list) -> str | None:
+    def find_by_primary_key(self, db_name: str, table_name: str, pk_column_values: list) -> dict | None:
         """
         Find a record in a table by its primary key.
         The columns need to be part of the primary key.
 
-        Separator character between (attribute) values inside a record is '#'.
+        The key is encoded from the values with the order-preserving key encoding.
 
         Parameters are not validated here.
 
-        :return: a string consisting of the values corresponding to the primary key if the given key exists, else None
+        :return: the key-value pair of the record if the given key exists, else None
         """
-        key = string_from_values(pk_column_values)  # concatenate the column values
-        values = mongo_db.select(db_name, table_name, {"_id": key})
-        return values[0] if values else None
+        table = self.get_table(self.find_database(db_name), table_name)
+        pk_types = table.get_column_types(table.get_primary_key().get_column_names())
+        key = key_codec.encode_key(pk_column_values, pk_types)
+        return self.__engine.find_one(db_name, table_name, {"_id": key})
 
-    def find_by_primary_keys(self, db_name: str, table_name: str, pks: list[str]) -> list[list]:
+    def find_by_primary_keys(self, db_name: str, table_name: str, pks: list[str]) -> Iterator[list]:
         """
-        Only works for single primary key tables.
+        Find the records of a table by their keys.
+        The records are streamed from the storage, read in batches of READ_BATCH_SIZE.
+
+        :param pks: keys in the order-preserving key encoding
+        :return: an iterator of records where a record is a list of values
         """
-        or_conds: list[dict] = []
-        for pk in pks:
-            or_conds.append({"_id": pk})
-        result = []
-        for kv in mongo_db.select(db_name, table_name, {"$or": or_conds}):
-            k = kv.get("_id").split("#")
-            v = kv.get("value").split("#")
-            if v[-1] == "":
-                v = v[:-1]
-            kv_list = k + v
-            result.append(kv_list)
-        return result
+        table = self.get_table(self.find_database(db_name), table_name)
+        documents = self.__engine.select_iter(db_name, table_name, {"_id": {"$in": pks}},
+                                              batch_size=config.READ_BATCH_SIZE)
+        for kv in documents:
+            yield _record_values(kv, table)
 
     def find_by_value(self,
                       db_name: str,
@@ -441,42 +674,56 @@ class DbManager:
                       column_names: list[str],
                       column_values: list) -> str | None:
         """
-        Find the primary key that the given value belong to in a table.
-        If the given value is a non-unique value, then find all primary keys that belong to the given value.
-        The columns need to be part of the same unique key.
+        Find a primary key that the given values belong to in a table.
+
+        If there is an index on exactly the given columns, a single document of the index is looked up by its key.
+        Otherwise, the storage filters the records and stops at the first match.
 
-        Separator character between column values inside a primary key is '#'.
-        Separator character between primary keys is also '#' (no difference).
+        The primary key is in the order-preserving key encoding.
 
-        :return: a string: the primary key corresponding to the given value(s) if they exist, else None
+        :return: a string: a primary key corresponding to the given value(s) if they exist, else None
         """
-        value = string_from_values(column_values)  # column values concatenated into a '#' separated string
         table = self.get_table(self.find_database(db_name), table_name)
         index = table.get_index_by_column_names(column_names)
         if index:
             # for both single and compound values only if there is an index created on all columns, use those to search
-            index_collection_name = _build_collection_name_for_index(table_name, index.get_name())
-            for kv in mongo_db.select(db_name, index_collection_name):
-                if kv.get("_id") == value:
-                    return kv.get("value")
-        else:
-            # get the column positions (a.k.a. indexes) in the table's column list
-            col_pos = table.get_column_positions(column_names)
-
-            # iterate through the collection (table)
-            for kv in mongo_db.select(db_name, table_name):
-                kv_list = kv.get("_id").split("#") + kv.get("value").split("#")
-                found = True
-                for i in range(len(column_values)):
-                    if column_values[i] != kv_list[col_pos[i]]:
-                        found = False
-                        break
-                if found:
-                    return kv.get("_id")
+            value = key_codec.encode_key(column_values, table.get_column_types(column_names))
+            coll_name = _build_collection_name_for_index(table_name, index.get_name())
+            if index.is_unique_index(table):
+                document = self.__engine.find_one(db_name, coll_name, {"_id": value})
+                return document.get("value") if document else None
+            # any bucket of the posting list will do, a bucket is never empty
+            document = self.__engine.find_one(db_name, coll_name, {"_id": key_codec.key_range_condition("=", value)})
+            return document.get("value")[0] if document else None
+
+        types = table.get_column_types(column_names)
+        values: dict = {}
+        for name, value, col_type in zip(column_names, column_values, types):
+            values[name] = datatypes.cast_value(value, col_type) if value is not None else None
+        pk_names: list[str] = table.get_primary_key().get_column_names()
+        # the columns outside the primary key are filtered by the storage
+        selection: dict = {name: value for name, value in values.items() if name not in pk_names}
+        searched_pk_names = [name for name in pk_names if name in values]
+        # the searched primary key columns that are the first ones filter by the range of keys they start
+        prefix_names = []
+        for name in pk_names:
+            if name not in values:
+                break
+            prefix_names.append(name)
+        if prefix_names:
+            prefix = key_codec.encode_key([values[n] for n in prefix_names], table.get_column_types(prefix_names))
+            selection["_id"] = key_codec.key_range_condition("=", prefix)
+        if len(prefix_names) == len(searched_pk_names):
+            document = self.__engine.find_one(db_name, table_name, selection, [])
+            return document.get("_id") if document else None
+        # the other primary key columns are compared after decoding the keys, the read stops at the first match
+        for document in self.__engine.select_iter(db_name, table_name, selection, [],
+                                                  batch_size=config.READ_BATCH_SIZE):
+            record = split_document(document, table)
+            if all(record.get(name) == values[name] for name in searched_pk_names):
+                return document.get("_id")
         return None
 
-
-
     def find_conditional_indexed_by_primary_key(self,
                                                 db_name: str,
                                                 table_name: str,
@@ -484,18 +731,19 @@ class DbManager:
                                                 condition_value) -> list:
         """
         Find those primary keys and values that fulfill the condition USING the built-in INDEXES.
+        The condition is on the first primary key column, it is evaluated as a range of encoded keys by the storage.
 
         ! Currently, condition is always evaluated in the order: <column> <op> <value>
 
-        :param column_name: the column to compare
-        :param column_type: the datatype of the column
         :param logical_op: the logical operator used for comparing
         :param condition_value: the value the column is being compared with
-        :return: a list of records that fulfill the condition
+        :return: a list of key-value pairs of the records that fulfill the condition
         """
-        mongo_op = self.__logical_op_to_mongo_op(logical_op)
-        selection = {"_id": {mongo_op: condition_value}}
-        values = mongo_db.select(db_name, table_name, selection)
+        table = self.get_table(self.find_database(db_name), table_name)
+        first_pk_name = table.get_primary_key().get_column_names()[0]
+        key = key_codec.encode_key([condition_value], table.get_column_types([first_pk_name]))
+        selection = {"_id": key_codec.key_range_condition(logical_op, key)}
+        values = self.__engine.select(db_name, table_name, selection)
         return values
 
     def find_conditional_indexed_by_value(self,
@@ -507,6 +755,7 @@ class DbManager:
                                           condition_value) -> list:
         """
         Find those values that fulfill the condition USING INDEXES.
+        The condition is evaluated as a range of encoded keys by the storage.
 
         ! Currently, condition is always evaluated in the order: <column> <op> <value>
 
@@ -514,121 +763,235 @@ class DbManager:
         :param column_type: the datatype of the column
         :param logical_op: the logical operator used for comparing
         :param condition_value: the value the column is being compared with
-        :return: a list of primary keys (not in concatenated format) of records that fulfill the condition
+        :return: a list of primary keys (as lists of column values) of records that fulfill the condition
         """
         result = []
         table = self.get_table(self.find_database(db_name), table_name)
-        pk_length = len(table.get_primary_key().get_column_names())
+        pk_types = table.get_column_types(table.get_primary_key().get_column_names())
         index = table.get_index_by_column_names([column_name])
-        index_collection_name = _build_collection_name_for_index(table_name, index.get_name())
-        for kv in mongo_db.select(db_name, index_collection_name):
-            k = kv.get("_id").split("#")[0]  # [0] for now
-            k = datatypes.cast_value(k, column_type)
-            fulfills = datatypes.eval_logical_expression(k, logical_op, condition_value)
-            if not fulfills:
-                continue
-            v = kv.get("value").split("#")
-            for i in range(0, len(v), pk_length):
-                # take out length of primary key number of elements from the list with values to get one primary key
-                result.append(v[i:i + pk_length])
+        key = key_codec.encode_key([condition_value], [column_type])
+        selection = {"_id": key_codec.key_range_condition(logical_op, key)}
+        for _, record_keys in self.__read_index_entries(db_name, table, index, selection):
+            for pk in record_keys:
+                result.append(key_codec.decode_key(pk, pk_types))
         return result
 
-    def __logical_op_to_mongo_op(self, op: str):
-        match op:
-            case "<":
-                return "$lt"
-            case ">":
-                return "$gt"
-            case "<=":
-                return "$lte"
-            case ">=":
-                return "$gte"
-            case "=":
-                return "$eq"
-            case _:
-                raise NotImplementedError(f"Invalid operator'{op}'")
-
-    def find_all(self, db_name: str, table_name: str) -> list[list]:
+    def find_all(self, db_name: str, table_name: str, column_names: list[str] | None = None) -> Iterator[list]:
         """
         Find all records in a table.
+        The records are streamed from the storage, read in batches of READ_BATCH_SIZE, in the order of their primary
+        keys.
 
-        :return: a list of records where a record is a list of values
+        :param column_names: the columns to read, all of them if not given; the other columns are not loaded
+        :return: an iterator of records where a record is a list of values, in the order of the (given) columns
         """
-        result = []
-        for kv in mongo_db.select(db_name, table_name):
-            k = kv.get("_id").split("#")
-            v = kv.get("value").split("#")
-            if v[-1] == "":
-                v = v[:-1]
-            kv_list = k + v
-            result.append(kv_list)
-        return result
+        table = self.get_table(self.find_database(db_name), table_name)
+        documents = self.__engine.select_iter(db_name, table_name, {}, column_names, config.READ_BATCH_SIZE)
+        for kv in documents:
+            yield _record_values(kv, table, column_names)
 
-    def query_index_collection(self, db_name, table_name, col_name, op, cond_val: str) -> list[tuple] | None:
+    def partition_key_range(self, db_name: str, table_name: str, partition_count: int,
+                            key_condition: dict | None = None) -> list[dict]:
         """
-        :return:
+        Split a range of the primary keys of a table into ranges holding about the same number of records, so they can
+        be read separately. The bounds are taken from a random sample of the keys.
+
+        :param key_condition: the range to split, in the MongoDB query language; all the keys if not given
+        :return: the conditions of at most 'partition_count' ranges, which cover the range one after the other
         """
-        idx_name = self.get_index_name(db_name, table_name, col_name)
-        collection_name = _build_collection_name_for_index(table_name, idx_name)
-        mongo_op = self.__logical_op_to_mongo_op(op)
-        selection = {"_id": {mongo_op: str(cond_val)}}
-        kv_pairs: list[dict] = mongo_db.select(db_name, collection_name, selection)
-        if len(kv_pairs) == 0:
-            return None
-        result: list[tuple] = []
-        for kv_p in kv_pairs:
-            key = kv_p.get("_id")
-            val = kv_p.get("value")
-            if "#" in key:
-                raise NotImplementedError("Composite indexes are not supported")
-            result.append((key, val.split('#')))
-        return result
+        key_condition = key_condition if key_condition else {}
+        lower, upper = key_condition.get("$gte"), key_condition.get("$lt")
+        documents = self.__engine.sample(db_name, table_name, partition_count * _PARTITION_SAMPLES)
+        keys = sorted(key for key in (document["_id"] for document in documents)
+                      if (lower is None or key > lower) and (upper is None or key < upper))
+        bounds = sorted(set(keys[len(keys) * i // partition_count] for i in range(1, partition_count) if keys))
+        ranges = []
+        for bound in bounds + [upper]:
+            condition = {}
+            if lower is not None:
+                condition["$gte"] = lower
+            if bound is not None:
+                condition["$lt"] = bound
+            ranges.append(condition)
+            lower = bound
+        return ranges
+
+    def get_storage_engine(self) -> StorageEngine:
+        return self.__engine
+
+    def find_by_access_path(self, db_name: str, table_name: str, access_path: AccessPath) -> Iterator[list]:
+        """
+        Find the records of a table in the key range of an access path: the records of a range of the primary key, or
+        the records that the entries of a range of an index point to; all the records for a full scan.
+        For an index-only access path, the records are built from the index entries and hold only the values of the
+        index and primary key columns.
+        The records are streamed from the storage, read in batches of READ_BATCH_SIZE.
+
+        :return: an iterator of records where a record is a list of values
+        """
+        table = self.get_table(self.find_database(db_name), table_name)
+        match access_path.get_method():
+            case "full_scan":
+                yield from self.find_all(db_name, table_name)
+            case "primary_key":
+                documents = self.__engine.select_iter(db_name, table_name, {"_id": access_path.get_key_condition()},
+                                                      batch_size=config.READ_BATCH_SIZE)
+                for kv in documents:
+                    yield _record_values(kv, table)
+            case "index":
+                entries = self.__read_index_entries(db_name, table, access_path.get_index(),
+                                                    {"_id": access_path.get_key_condition()})
+                record_keys = [record_key for _, entry_keys in entries for record_key in entry_keys]
+                for keys in _in_blocks(record_keys, config.READ_BATCH_SIZE):
+                    yield from self.find_by_primary_keys(db_name, table_name, keys)
+            case "index_only":
+                # without a key condition the whole index is read
+                selection = {"_id": access_path.get_key_condition()} if access_path.get_key_condition() else {}
+                yield from self.__scan_index_only(db_name, table, access_path.get_index(), selection)
+
+    def __scan_index_only(self, db_name: str, table: Table, index: Index, selection: dict) -> Iterator[list]:
+        """
+        Build the records from the entries of an index whose documents match the selection, the table is not read.
+        Only the columns of the index and of the primary key have values, the rest are None.
+        The entries are streamed from the storage in the order of their keys, read in batches of READ_BATCH_SIZE.
+        """
+        index_col_names = index.get_column_names()
+        index_col_types = table.get_column_types(index_col_names)
+        pk_col_names = table.get_primary_key().get_column_names()
+        pk_col_types = table.get_column_types(pk_col_names)
+        index_positions = [table.find_column(name) for name in index_col_names]
+        pk_positions = [table.find_column(name) for name in pk_col_names]
+        unique = index.is_unique_index(table)
+        column_count = len(table.get_column_names())
+        coll_name = _build_collection_name_for_index(table.get_name(), index.get_name())
+        for doc in self.__engine.select_iter(db_name, coll_name, selection, batch_size=config.READ_BATCH_SIZE):
+            if unique:
+                index_key, record_keys = doc["_id"], [doc["value"]]
+            else:
+                index_key, record_keys = _split_bucket_id(doc["_id"])[0], doc["value"]
+            index_values = key_codec.decode_key(index_key, index_col_types)
+            for record_key in record_keys:
+                record = [None] * column_count
+                for position, value in zip(index_positions, index_values):
+                    record[position] = value
+                for position, value in zip(pk_positions, key_codec.decode_key(record_key, pk_col_types)):
+                    record[position] = value
+                yield record
 
     def create_default_databases(self) -> list[Database]:
         dbs: list[Database] = []
         for name in self.get_default_database_names():
             db = Database(name=name)
             dbs.append(db)
-            mongo_db.create_collection(db.get_name(), "__next_identity")
+            self.__create_default_collections(db.get_name())
         return dbs
 
-    def join_tables(self, db_idx: int, tb_1: Table, tb_2: Table, op: str, col_name_1: str, col_name_2: str) ->list[list]:
-        """ """
-        if op != "=":
-            raise NotImplementedError(f"Join operation '{op}' not implemented")
-        outer = tb_1.get_name()
-        outer_col = col_name_1
-        outer_idx = tb_1.find_column(col_name_1)
-        inner = tb_2.get_name()
-        inner_col = col_name_2
-        inner_idx = tb_2.find_column(col_name_2)
-
-        # if not tb_1.column_is_indexed(col_name_1) and not tb_2.column_is_indexed(col_name_2):
-            # nested loop join
-        outer_records: list[list] = self.find_all(self.get_databases()[db_idx].get_name(), outer)
-        inner_records: list[list] = self.find_all(self.get_databases()[db_idx].get_name(), inner)
-        result: list[list] = []
-        for o_rec in outer_records:
-            for i_rec in inner_records:
-                if o_rec[outer_idx] == i_rec[inner_idx]:  # join condition is met (only '=' works)
-                    result.append(o_rec + i_rec)
-        return result
-        # swap: bool = False
-        # if tb_1.column_is_indexed(col_name_1) and not tb_2.column_is_indexed(col_name_2):
-        #     # swap them so that the indexed one is the inner table
-        #     outer, inner = inner, outer
-        #     outer_col, inner_col = inner_col, outer_col
-        #     swap = True
-        #     outer_records: list[list] = self.find_all(self.get_databases()[db_idx].get_name(), outer)
-        #     for o_rec in outer_records:
-        #         raise NotImplementedError("Join operation not implemented for indexed columns")
-        #         i_key = o_rec[outer_idx]
-        #         i_rec = self.find_by_value(self.get_databases()[db_idx].get_name(), inner, inner_col, i_key)
-        #         if i_rec:
-        #             result.append(o_rec + i_rec)
+    def index_nested_loop_join(self,
+                               db_name: str,
+                               outer_records: Iterable[list],
+                               outer_position: int,
+                               inner: Table,
+                               inner_col_name: str,
+                               inner_filter: Callable[[list], bool] | None = None) -> Iterator[list]:
+        """
+        Stream the outer records in blocks of READ_BATCH_SIZE and look up the matching records of the inner table for
+        each block at once, through the primary key or an index of the inner table. The inner table is not scanned.
+        The joined records come in the order of the outer records.
+
+        :param outer_records: the records to join, they can be the result of another join
+        :param outer_position: the position of the join value in the outer records
+        :param inner: the table that is looked up, the join column has to be the first column of its primary key or of
+        one of its indexes
+        :param inner_col_name: the join column of the inner table
+        :param inner_filter: only the inner records it accepts are joined
+        """
+        inner_position = inner.find_column(inner_col_name)
+        inner_type = inner.get_column(inner_col_name).get_type()
+        for block in _in_blocks(outer_records, config.READ_BATCH_SIZE):
+            keys = set()
+            for record in block:
+                value = record[outer_position]
+                if value is None:
+                    continue
+                try:
+                    keys.add(key_codec.encode_key([value], [inner_type]))
+                except (ValueError, OverflowError):
+                    continue  # the value cannot be a value of the inner column
+            matches: dict = {}  # [key=<join value>, value=list[<inner record>]]
+            for inner_record in self.__probe_leading_column(db_name, inner, inner_col_name, sorted(keys)):
+                if inner_filter is None or inner_filter(inner_record):
+                    matches.setdefault(inner_record[inner_position], []).append(inner_record)
+            for record in block:
+                value = record[outer_position]
+                if value is None:
+                    continue
+                for match in matches.get(value, ()):
+                    yield record + match
+
+    def __probe_leading_column(self, db_name: str, table: Table, column_name: str, keys: list[str]) -> Iterator[list]:
+        """
+        Find the records of a table whose given column has one of the given values, without scanning the table.
+        The column has to be the first column of the primary key or of an index of the table.
+        :param keys: the encoded values of the column
+        """
+        if not keys:
+            return iter([])
+        pk_column_names = table.get_primary_key().get_column_names() if table.has_primary_key() else []
+        if pk_column_names and pk_column_names[0] == column_name:
+            selection = _build_probe_selection(keys, exact=len(pk_column_names) == 1)
+            documents = self.__engine.select_iter(db_name, table.get_name(), selection,
+                                                  batch_size=config.READ_BATCH_SIZE)
+            return (_record_values(document, table) for document in documents)
+        index = table.get_index_by_leading_column(column_name)
+        index_column_names = index.get_column_names()
+        exact = len(index_column_names) == 1 and index.is_unique_index(table)
+        entries = self.__read_index_entries(db_name, table, index, _build_probe_selection(keys, exact))
+        record_keys = sorted({record_key for _, entry_keys in entries for record_key in entry_keys})
+        return self.find_by_primary_keys(db_name, table.get_name(), record_keys)
+
+    def count_records(self, db_name: str, table_name: str) -> int:
+        return self.__engine.count(db_name, table_name)
+
+
+def _build_probe_selection(keys: list[str], exact: bool) -> dict:
+    """
+    Selection of the documents whose keys are the given keys (exact), or start with one of them.
+    """
+    if exact:
+        return {"_id": {"$in": keys}}
+    return {"$or": [{"_id": key_codec.key_range_condition("=", key)} for key in keys]}
+
 
+def _in_blocks(iterable: Iterable, size: int) -> Iterator[list]:
+    """
+    Split the items of an iterable into lists of the given size, the last one may be shorter.
+    """
+    iterator = iter(iterable)
+    block = list(islice(iterator, size))
+    while block:
+        yield block
+        block = list(islice(iterator, size))
 
 
+def _write_json_file(path: str, data):
+    """
+    Write data into a JSON file atomically: the file is written under a temporary name and renamed over the old one,
+    so a crash leaves either the old or the new content, never a part of it.
+    """
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def _copy_databases(dbs: list[Database]) -> list[Database]:
+    """
+    Deep copy of the database structure, made the same way as it is saved and loaded.
+    """
+    return [Database().from_dict(db.__dict__()) for db in dbs]
+
 
 def create_empty_database() -> Database:
     return Database()
@@ -654,52 +1017,66 @@ def create_empty_primary_key() -> PrimaryKey:
     return PrimaryKey()
 
 
-def build_key_value_pair(record: dict, all_names: list[str], key_names: list[str]) -> tuple[str, str]:
+def build_document(record: dict, table: Table) -> dict:
     """
-    Build a key-value pair, from a record in a table.
-    Concatenates the values of the primary key columns into the key.
-    Concatenate other colum values into the value.
-    Only keeps the values that belong to existing table names.
-    Ignores non-existent names.
-    Separator character is "#".
+    Build the document that stores a record of a table.
+    Encodes the values of the primary key columns into the key ("_id") with the order-preserving key encoding.
+    Stores every other column as a field of its own, with the value cast to the type of the column.
+    Missing columns are stored as null.
     """
-    key: str = str()
-    value: str = str()
-    separator_char = "#"
-    for name in all_names:
-        part: str = f'{record.get(name, "")}{separator_char}'
-        if name in key_names:
-            key += part
-        else:
-            value += part
-    return key[:-1], value[:-1]  # don't add the separator character at the end
+    key_names: list[str] = table.get_primary_key().get_column_names()
+    key = key_codec.encode_key([record.get(name) for name in key_names], table.get_column_types(key_names))
+    document: dict = {"_id": key}
+    for column in table.get_columns():
+        name = column.get_name()
+        if name not in key_names:
+            value = record.get(name)
+            document[name] = datatypes.cast_value(value, column.get_type()) if value is not None else None
+    return document
+
+
+def split_document(document: dict, table: Table) -> dict:
+    """
+    Split the document of a record into the record.
+    Decodes the primary key column values from the key, the other values are taken from the fields as they are.
+    Only the columns present in the document are in the record (the key columns are always present).
+    """
+    key_names: list[str] = table.get_primary_key().get_column_names()
+    key_values: list = key_codec.decode_key(document.get("_id"), table.get_column_types(key_names))
+    record: dict = dict(zip(key_names, key_values))
+    for name, value in document.items():
+        if name != "_id":
+            record[name] = value
+    return record
 
 
-def split_key_value_pair(key_value_pair: dict, all_names: list[str], key_names: list[str]) -> dict:
+def _record_values(document: dict, table: Table, column_names: list[str] | None = None) -> list:
     """
-    Split a key-value pair into a record.
-    Splits by the separator character "#".
+    The values of a record from its document, in the order of the columns.
+    :param column_names: the columns to take, all the columns of the table if not given
     """
-    record: dict = {}
-    separator_char = "#"
-    key: str = key_value_pair.get("_id", "")
-    value: str = key_value_pair.get("value", "")
-    key_parts: list[str] = key.split(separator_char)
-    value_parts: list[str] = value.split(separator_char)
-    for col in all_names:
-        if col in key_names:
-            record[col] = key_parts.pop(0)
-        else:
-            record[col] = value_parts.pop(0)
-    return record
+    record: dict = split_document(document, table)
+    if column_names is None:
+        column_names = table.get_column_names()
+    return [record.get(name) for name in column_names]
+
 
+def scan_key_range(engine: StorageEngine, db_name: str, table: Table, key_condition: dict) -> Iterator[list]:
+    """
+    Stream the records of a table in a range of its primary keys straight from a storage engine, for the processes that
+    read the storage without a DbManager.
+    """
+    selection = {"_id": key_condition} if key_condition else {}
+    for document in engine.select_iter(db_name, table.get_name(), selection, batch_size=config.READ_BATCH_SIZE):
+        yield _record_values(document, table)
 
-def concatenate_repeating(kv_pairs: list[tuple[str, str]]) -> list[tuple[str, str]]:
+
+def group_repeating(kv_pairs: list[tuple[str, str]]) -> list[tuple[str, list[str]]]:
     """
-    Concatenate values of repeating keys.
+    Group the values of repeating keys into lists.
     """
     kv_pairs.sort()
-    new_pairs: list[tuple[str, str]] = []
+    new_pairs: list[tuple[str, list[str]]] = []
     i = 0
     length = len(kv_pairs)
     while i < length:
@@ -713,34 +1090,39 @@ def concatenate_repeating(kv_pairs: list[tuple[str, str]]) -> list[tuple[str, st
                 i += 1
             else:
                 break
-        new_pairs.append((key, '#'.join(same_key_values)))
+        new_pairs.append((key, same_key_values))
     return new_pairs
 
 
-def string_from_values(values: list) -> str:
+def _build_posting_buckets(index_key: str, record_keys: list[str], first_bucket_nr: int = 0) -> list[dict]:
     """
-    Converts a list of values of any type to strings and concatenates them separated by '#'.
-
-    Example:
-        - input: [2, "horse", 10]
-        - output: "2#horse#10"
-
-    :return: the concatenated string
+    Split the posting list of an index key into bucket documents of at most INDEX_BUCKET_SIZE record keys.
+    A bucket document: {"_id": <index key><bucket number>, "value": [<record keys>], "n": <number of record keys>}
     """
-    return '#'.join([str(v) for v in values])
+    bucket_size = config.INDEX_BUCKET_SIZE
+    documents: list[dict] = []
+    for i in range(0, len(record_keys), bucket_size):
+        bucket_keys = record_keys[i:i + bucket_size]
+        documents.append({"_id": _build_bucket_id(index_key, first_bucket_nr + i // bucket_size),
+                          "value": bucket_keys,
+                          "n": len(bucket_keys)})
+    return documents
 
 
-def values_from_string(concatenated: str) -> list:
+def _build_bucket_id(index_key: str, bucket_nr: int) -> str:
+    """
+    Append the encoded bucket number to the index key, so the buckets of an index key follow each other in key order.
     """
-    Converts a concatenated string of values separated by '#' to a list of values.
+    return index_key + key_codec.encode_key([bucket_nr], ["int"])
 
-        Example:
-        - input: "2#horse#10"
-        - output: [2, "horse", 10]
 
-    :return: the list of values
+def _split_bucket_id(bucket_id: str) -> tuple[str, int]:
+    """
+    Split the key of a bucket into the index key and the bucket number.
     """
-    return concatenated.split("#")
+    index_key = bucket_id[:-_BUCKET_NR_LENGTH]
+    bucket_nr = key_codec.decode_key(bucket_id[-_BUCKET_NR_LENGTH:], ["int"])[0]
+    return index_key, bucket_nr
 
 
 def _build_collection_name_for_index(table_name: str, index_name: str):
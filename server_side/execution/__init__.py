@@ -0,0 +1,13 @@
+"""
+Operators that evaluate the relational parts of a query over streams of records.
+"""
+from . import spill
+from .hash_join import hash_join
+from .merge_join import merge_join
+from .distinct import hash_distinct, adjacent_distinct
+from .external_sort import external_sort
+from . import join_planner
+from . import access_path
+from . import aggregates
+from . import parallel
+from . import operators
@@ -0,0 +1,227 @@
+"""
+Choice of the way the rows of a single table are read for a query.
+
+The conditions of the query that compare a column with a constant are the candidates to drive the scan. The keys of the
+primary key and of the indexes are ordered by their columns one after the other, so equalities on the first columns of
+a key and a range on the column after them select a single range of keys:
+    - a range of the primary key is a range of the keys of the table itself, the rows in it are read one after the other
+    - a range of an index is a range of the keys of the index; the index entries are read and each row they point to is
+      looked up by its key, which costs more than reading it in a full scan
+    - if the query reads no other columns than the ones of an index and of the primary key, the rows are built from the
+      entries of the index alone; the entries are smaller than the rows and none is looked up, so reading the whole
+      index can be cheaper than reading the whole table
+    - with no range that is selective enough, the whole table is read
+
+Only the single most selective range drives the scan. Every condition is evaluated on the rows that are read.
+
+The rows of the primary key and the entries of an index are read in the order of their keys. If the query needs its
+rows in an order (sorted, or with equal values next to each other), a way of reading that gives the order saves sorting
+or hashing the rows, which is added to the cost of the other ways.
+"""
+from server_side.database_objects import Table, Index, TableStatistics, key_codec
+
+_ROW_LOOKUP_COST = 4.0  # the cost of looking up a row by its key through an index, relative to reading it in a scan
+_INDEX_ENTRY_COST = 0.5  # the cost of reading the index entry of a row, relative to reading the row in a scan
+_EQUALITY_SELECTIVITY = 0.1  # the estimated fraction of rows an equality keeps, without statistics
+_RANGE_SELECTIVITY = 1 / 3  # the estimated fraction of rows any other comparison keeps, without statistics
+_ORDER_COST = 2.0  # the cost of sorting or hashing a row to bring it into an order, relative to reading it in a scan
+_RANGE_OPERATORS = ("=", "<", "<=", ">", ">=")
+
+
+class AccessPath:
+    """
+    The way the rows of a table are read: a full scan, a range of the primary key, a range of an index with a lookup of
+    each row, or a range of an index alone.
+    """
+
+    def __init__(self, method: str, column_names: list[str] | None = None, index: Index | None = None,
+                 key_condition: dict | None = None, selectivity: float = 1.0, cost: float = 0.0,
+                 order: list[str] | None = None, equality_count: int = 0):
+        """
+        :param method: "full_scan", "primary_key", "index" or "index_only"
+        :param column_names: the first columns of the key, whose conditions drive the scan
+        :param index: the index that is read, for the "index" method
+        :param key_condition: the condition on the encoded keys of the table or of the index, in the MongoDB query
+            language
+        :param selectivity: the estimated fraction of the rows that are read
+        :param cost: the estimated cost of reading the rows
+        :param order: the columns the rows are read in the order of, from the most significant; empty if the rows come
+            in no order
+        :param equality_count: the number of the first columns of the order that the key condition fixes to a value
+        """
+        self.__method = method
+        self.__column_names = column_names if column_names is not None else []
+        self.__index = index
+        self.__key_condition = key_condition
+        self.__selectivity = selectivity
+        self.__cost = cost
+        self.__order = order if order is not None else []
+        self.__equality_count = equality_count
+
+    def __repr__(self):
+        return f"AccessPath({self.__method}, {self.__column_names}, {self.__key_condition}, cost={self.__cost:.1f})"
+
+    def get_method(self) -> str:
+        return self.__method
+
+    def get_column_names(self) -> list[str]:
+        return self.__column_names
+
+    def get_index(self) -> Index | None:
+        return self.__index
+
+    def get_key_condition(self) -> dict | None:
+        return self.__key_condition
+
+    def get_selectivity(self) -> float:
+        return self.__selectivity
+
+    def get_cost(self) -> float:
+        return self.__cost
+
+    def get_order(self) -> list[str]:
+        return self.__order
+
+    def gives_order(self, order: list[str] | set[str]) -> bool:
+        """
+        Whether the rows come in the order: sorted by the columns of a list, or, for a set of columns, with the rows
+        that have equal values in all of them next to each other. The columns the key condition fixes to a value don't
+        change the order.
+        """
+        return _gives_order(self.__order, self.__equality_count, order)
+
+
+def choose_access_path(table: Table, conditions: list[tuple[str, str, object]], row_count: int,
+                       statistics: TableStatistics | None = None, column_names: set[str] | None = None,
+                       order: list[str] | set[str] | None = None) -> AccessPath:
+    """
+    The cheapest way to read the rows of a table that may fulfill all the conditions.
+
+    :param conditions: (<column name>, <operator>, <constant>) tuples, read as "<column> <operator> <constant>"
+    :param row_count: the number of rows of the table
+    :param statistics: the statistics of the table, the selectivities are estimated by fixed fractions without them
+    :param column_names: the columns the query reads, all of them if not given
+    :param order: the order the query needs the rows in, see AccessPath.gives_order; any order if not given
+    """
+    primary_key_col_names = table.get_primary_key().get_column_names() if table.get_primary_key() is not None else []
+    row_cost = 1.0 if order is None or _gives_order(primary_key_col_names, 0, order) else 1.0 + _ORDER_COST
+    best = AccessPath("full_scan", cost=row_count * row_cost, order=primary_key_col_names)
+    conditions_by_column: dict[str, list[tuple[str, object]]] = {}
+    for col_name, op, value in conditions:
+        if op in _RANGE_OPERATORS:
+            conditions_by_column.setdefault(col_name, []).append((op, value))
+    keys: list[tuple[str, Index | None, list[str], float]] = []  # (<method>, <index>, <key columns>, <row cost>)
+    if primary_key_col_names:
+        keys.append(("primary_key", None, primary_key_col_names, 1.0))
+    for index in table.get_indexes():
+        if column_names is not None and column_names <= set(index.get_column_names()) | set(primary_key_col_names):
+            keys.append(("index_only", index, index.get_column_names(), _INDEX_ENTRY_COST))
+        else:
+            keys.append(("index", index, index.get_column_names(), _ROW_LOOKUP_COST))
+    for method, index, key_col_names, row_cost in keys:
+        # the equalities on the first columns of the key, then the range on the next one
+        prefix: list[tuple[str, object]] = []  # (<column name>, <value>) pairs
+        for col_name in key_col_names:
+            equal_values = [value for op, value in conditions_by_column.get(col_name, []) if op == "="]
+            if not equal_values:
+                break
+            prefix.append((col_name, equal_values[0]))
+        range_col_name = key_col_names[len(prefix)] if len(prefix) < len(key_col_names) else None
+        range_conditions = conditions_by_column.get(range_col_name, []) if range_col_name is not None else []
+        # the entries of an index are read in the order of their keys, the rows they point to are not
+        key_order = key_col_names if method != "index" else []
+        if not prefix and not range_conditions and method != "index_only":
+            continue
+        key_condition = _build_key_condition(prefix, range_col_name, range_conditions,
+                                             table.get_column_types(key_col_names))
+        if key_condition is None:
+            continue
+        selectivity = 1.0
+        for col_name, value in prefix:
+            selectivity *= _estimate_selectivity(table, col_name, [("=", value)], row_count, statistics)
+        if range_conditions:
+            selectivity *= _estimate_selectivity(table, range_col_name, range_conditions, row_count, statistics)
+        if len(prefix) == len(key_col_names) and (method == "primary_key" or table.is_unique(key_col_names)):
+            # a single row at most
+            selectivity = min(selectivity, 1 / max(row_count, 1))
+        equality_count = len(prefix) if key_order else 0
+        if order is not None and not _gives_order(key_order, equality_count, order):
+            row_cost += _ORDER_COST
+        cost = selectivity * row_count * row_cost
+        if cost < best.get_cost():
+            path_col_names = [col_name for col_name, _ in prefix] + ([range_col_name] if range_conditions else [])
+            best = AccessPath(method, path_col_names, index, key_condition, selectivity, cost, key_order,
+                              equality_count)
+    return best
+
+
+def _gives_order(key_order: list[str], equality_count: int, order: list[str] | set[str]) -> bool:
+    """
+    Whether rows read in the order of the key columns come in the order, see AccessPath.gives_order.
+    :param equality_count: the number of the first key columns that are fixed to a value
+    """
+    fixed = set(key_order[:equality_count])
+    remaining = [col_name for col_name in order if col_name not in fixed]
+    head = key_order[equality_count:][:len(remaining)]
+    if isinstance(order, set):
+        return set(head) == set(remaining)
+    return head == remaining
+
+
+def _build_key_condition(prefix: list[tuple[str, object]], range_col_name: str | None,
+                         range_conditions: list[tuple[str, object]], col_types: list[str]) -> dict | None:
+    """
+    The range of encoded keys that start with the values of the prefix and whose next column fulfills all the range
+    conditions. None if a value can't be encoded with the type of its column.
+    """
+    prefix_values = [value for _, value in prefix]
+    try:
+        bounds = []
+        if prefix:
+            bounds.append(key_codec.key_range_condition(
+                "=", key_codec.encode_key(prefix_values, col_types[:len(prefix)])))
+        for op, value in range_conditions:
+            key = key_codec.encode_key(prefix_values + [value], col_types[:len(prefix) + 1])
+            bounds.append(key_codec.key_range_condition(op, key))
+    except (ValueError, OverflowError):
+        return None
+    lower, upper = None, None  # the bounds of the range: keys >= lower and < upper
+    for condition in bounds:
+        if "$gte" in condition and (lower is None or condition["$gte"] > lower):
+            lower = condition["$gte"]
+        if "$lt" in condition and (upper is None or condition["$lt"] < upper):
+            upper = condition["$lt"]
+    key_condition = {}
+    if lower is not None:
+        key_condition["$gte"] = lower
+    if upper is not None:
+        key_condition["$lt"] = upper
+    return key_condition
+
+
+def _estimate_selectivity(table: Table, col_name: str, conditions: list[tuple[str, object]], row_count: int,
+                          statistics: TableStatistics | None) -> float:
+    """
+    The estimated fraction of the rows that fulfill all the conditions on a column.
+    The conditions on one column are not independent: a lower and an upper bound select the rows between them.
+    """
+    selectivities = []
+    for op, value in conditions:
+        selectivity = statistics.estimate_selectivity(col_name, op, value) if statistics is not None else None
+        if selectivity is None:
+            if op != "=":
+                selectivity = _RANGE_SELECTIVITY
+            elif table.is_unique([col_name]) or table.is_primary_key([col_name]):
+                selectivity = 1 / max(row_count, 1)
+            else:
+                selectivity = _EQUALITY_SELECTIVITY
+        selectivities.append((op, selectivity))
+    equalities = [selectivity for op, selectivity in selectivities if op == "="]
+    if equalities:
+        return min(equalities)
+    lower = min((selectivity for op, selectivity in selectivities if op in (">", ">=")), default=1.0)
+    upper = min((selectivity for op, selectivity in selectivities if op in ("<", "<=")), default=1.0)
+    if lower < 1.0 and upper < 1.0:
+        # the rows above the lower bound and below the upper bound overlap in the range
+        return max(lower + upper - 1.0, 1 / max(row_count, 1))
+    return min(lower, upper)
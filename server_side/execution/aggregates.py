@@ -0,0 +1,191 @@
+"""
+Accumulators of the aggregate functions.
+
+An accumulator holds the state of one aggregate function over one group of records: it is updated with the values of
+the group one by one and gives the result at the end, so a group takes the same memory whatever its number of records.
+Null values are ignored, as in SQL; the result over no values is null, except for COUNT which is 0.
+
+The accumulators of the same function over two parts of a group can be merged, so the parts can be aggregated
+separately, in parallel, and their partial states combined.
+"""
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+
+class Accumulator(ABC):
+    @abstractmethod
+    def add(self, value):
+        """
+        Update the state with the next value of the group.
+        """
+        pass
+
+    @abstractmethod
+    def merge(self, other: 'Accumulator'):
+        """
+        Update the state with the state of an accumulator of the same function over another part of the group.
+        """
+        pass
+
+    @abstractmethod
+    def result(self):
+        pass
+
+
+class CountAccumulator(Accumulator):
+    def __init__(self):
+        self.__count = 0
+
+    def add(self, value):
+        if value is not None:
+            self.__count += 1
+
+    def merge(self, other: 'CountAccumulator'):
+        self.__count += other.__count
+
+    def result(self) -> int:
+        return self.__count
+
+
+class CountRowsAccumulator(Accumulator):
+    """
+    COUNT(*): counts the records, nulls included.
+    """
+
+    def __init__(self):
+        self.__count = 0
+
+    def add(self, value):
+        self.__count += 1
+
+    def merge(self, other: 'CountRowsAccumulator'):
+        self.__count += other.__count
+
+    def result(self) -> int:
+        return self.__count
+
+
+class SumAccumulator(Accumulator):
+    def __init__(self):
+        self.__sum = None
+
+    def add(self, value):
+        if value is not None:
+            self.__sum = value if self.__sum is None else self.__sum + value
+
+    def merge(self, other: 'SumAccumulator'):
+        self.add(other.__sum)
+
+    def result(self):
+        return self.__sum
+
+
+class AvgAccumulator(Accumulator):
+    def __init__(self):
+        self.__sum = 0
+        self.__count = 0
+
+    def add(self, value):
+        if value is not None:
+            self.__sum += value
+            self.__count += 1
+
+    def merge(self, other: 'AvgAccumulator'):
+        self.__sum += other.__sum
+        self.__count += other.__count
+
+    def result(self) -> float | None:
+        return self.__sum / self.__count if self.__count else None
+
+
+class MinAccumulator(Accumulator):
+    def __init__(self):
+        self.__min = None
+
+    def add(self, value):
+        if value is not None and (self.__min is None or value < self.__min):
+            self.__min = value
+
+    def merge(self, other: 'MinAccumulator'):
+        self.add(other.__min)
+
+    def result(self):
+        return self.__min
+
+
+class MaxAccumulator(Accumulator):
+    def __init__(self):
+        self.__max = None
+
+    def add(self, value):
+        if value is not None and (self.__max is None or value > self.__max):
+            self.__max = value
+
+    def merge(self, other: 'MaxAccumulator'):
+        self.add(other.__max)
+
+    def result(self):
+        return self.__max
+
+
+_ACCUMULATORS = {
+    "count": CountAccumulator,
+    "sum": SumAccumulator,
+    "avg": AvgAccumulator,
+    "min": MinAccumulator,
+    "max": MaxAccumulator
+}
+
+
+def create_accumulator(function_name: str, counts_rows: bool = False) -> Accumulator:
+    """
+    :param function_name: the name of the aggregate function, in lowercase
+    :param counts_rows: whether the function takes '*' instead of a column, as in COUNT(*)
+    """
+    if counts_rows:
+        if function_name != "count":
+            raise ValueError(f"Aggregate function '{function_name}' does not take '*'")
+        return CountRowsAccumulator()
+    accumulator_class = _ACCUMULATORS.get(function_name)
+    if accumulator_class is None:
+        raise NotImplementedError(f"Aggregate function '{function_name}' not supported")
+    return accumulator_class()
+
+
+def aggregate_records(records: Iterable[list], key_positions: list[int], aggregates: list[tuple[str, int | None]],
+                      groups: dict[tuple, list[Accumulator]] | None = None) -> dict[tuple, list[Accumulator]]:
+    """
+    Group the records by the values at the key positions and update the accumulators of each group with them.
+
+    :param aggregates: (<function name>, <position of its argument>) pairs, the position is None for COUNT(*)
+    :param groups: the groups to update, a new dict if not given
+    :return: the accumulators of the aggregates by the key values of the groups
+    """
+    if groups is None:
+        groups = {}
+    for record in records:
+        key = tuple(record[position] for position in key_positions)
+        accumulators = groups.get(key)
+        if accumulators is None:
+            accumulators = create_accumulators(aggregates)
+            groups[key] = accumulators
+        for accumulator, (_, position) in zip(accumulators, aggregates):
+            accumulator.add(record[position] if position is not None else None)
+    return groups
+
+
+def merge_groups(groups: dict[tuple, list[Accumulator]], other: dict[tuple, list[Accumulator]]):
+    """
+    Merge the partial states of the groups of another part of the records into the groups.
+    """
+    for key, other_accumulators in other.items():
+        accumulators = groups.get(key)
+        if accumulators is None:
+            groups[key] = other_accumulators
+            continue
+        for accumulator, other_accumulator in zip(accumulators, other_accumulators):
+            accumulator.merge(other_accumulator)
+
+
+def create_accumulators(aggregates: list[tuple[str, int | None]]) -> list[Accumulator]:
+    return [create_accumulator(name, position is None) for name, position in aggregates]
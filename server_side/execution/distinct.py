@@ -0,0 +1,78 @@
+"""
+Removal of the duplicate records of a stream.
+
+Records that are equal value by value are duplicates, nulls are equal to each other.
+
+The records are put into a hash set as they come, and the first of equal records is passed on. The memory taken by the
+set is estimated as it grows. If it goes over the budget, the records already passed on stay in the set, and the rest
+of the input is split by the hash of the records into partitions on the disk, leaving out the records in the set. The
+duplicates end up in the same partition, so the partitions are deduplicated one by one. A partition that is still too
+large is partitioned again with another hash function.
+
+Records that come sorted, or only grouped so that the duplicates follow each other, are deduplicated by comparing each
+record with the one before it, in constant memory.
+"""
+from typing import Iterable, Iterator
+
+from server_side.execution import spill
+
+_PARTITION_COUNT = 16
+_MAX_DEPTH = 4  # the most times a partition is split again, the last level is deduplicated in memory anyway
+
+
+def hash_distinct(records: Iterable[list], memory_budget: int, spill_dir: str | None = None) -> Iterator[list]:
+    """
+    Generator of the records without their duplicates. The records in memory come in the order of their first
+    appearance, the partitions come after them.
+
+    :param memory_budget: the most bytes the hash set may take before the rest of the records are partitioned to the
+        disk
+    :param spill_dir: the directory of the partition files, the system default if not given
+    """
+    return _distinct(iter(records), memory_budget, spill_dir, 0)
+
+
+def adjacent_distinct(records: Iterable[list]) -> Iterator[list]:
+    """
+    Generator of the records without their duplicates, for records whose duplicates follow each other.
+    """
+    previous = None
+    for record in records:
+        if record != previous:
+            previous = record
+            yield record
+
+
+def _distinct(records: Iterator[list], memory_budget: int, spill_dir: str | None, depth: int) -> Iterator[list]:
+    seen: set[tuple] = set()
+    used_memory = 0
+    for record in records:
+        key = tuple(record)
+        if key in seen:
+            continue
+        seen.add(key)
+        used_memory += spill.record_size(record)
+        yield record
+        if used_memory > memory_budget and depth < _MAX_DEPTH:
+            yield from _distinct_partitions(records, seen, memory_budget, spill_dir, depth)
+            return
+
+
+def _distinct_partitions(records: Iterator[list], seen: set[tuple], memory_budget: int, spill_dir: str | None,
+                         depth: int) -> Iterator[list]:
+    """
+    Split the rest of the records into partition files by their hash, leaving out the ones already seen, then
+    deduplicate the partitions one by one.
+    The hash function depends on the depth, so that a partition is split differently than its parent.
+    """
+    with spill.make_spill_dir(spill_dir) as dir_path:
+        writer = spill.SpillWriter(dir_path, "distinct", _PARTITION_COUNT)
+        for record in records:
+            key = tuple(record)
+            if key not in seen:
+                writer.write(hash((depth, key)) % _PARTITION_COUNT, record)
+        paths = writer.close()
+        # the records passed on so far can't appear in the partitions anymore
+        seen.clear()
+        for path in paths:
+            yield from _distinct(spill.read_records(path), memory_budget, spill_dir, depth + 1)
@@ -0,0 +1,116 @@
+"""
+Sorting of a stream of records that may not fit into memory.
+
+The records are collected into a run as they come, and the memory taken by the run is estimated as it grows. If it goes
+over the budget, the run is sorted and written to a file on the disk, and a new run is started. At the end, the runs
+are merged: the next record is always the smallest of the next records of the runs, so the records are read back one
+by one and only one batch per run is in memory. If there are too many runs to open at once, groups of them are merged
+into longer runs first.
+
+Records without a run on the disk are sorted in memory alone. The sort is stable: records with equal keys keep the
+order they came in.
+"""
+import heapq
+import os
+from functools import cmp_to_key
+from typing import Callable, Iterable, Iterator
+
+from server_side.execution import spill
+
+_MERGE_WIDTH = 64  # the most runs merged at once, each one holds an open file and a batch of records
+
+
+def external_sort(records: Iterable[list], keys: list[tuple[int, bool]], memory_budget: int,
+                  spill_dir: str | None = None) -> Iterator[list]:
+    """
+    Generator of the records sorted by the values at the key positions. Nulls are smaller than all the other values.
+
+    :param keys: (<position>, <descending>) pairs, from the most significant
+    :param memory_budget: the most bytes a run may take before it is written to the disk
+    :param spill_dir: the directory of the run files, the system default if not given
+    """
+    sort_key, reverse = _make_sort_key(keys)
+    records = iter(records)
+    run = []
+    used_memory = 0
+    for record in records:
+        run.append(record)
+        used_memory += spill.record_size(record)
+        if used_memory > memory_budget:
+            run.sort(key=sort_key, reverse=reverse)
+            yield from _merge_spilled_runs(run, records, sort_key, reverse, memory_budget, spill_dir)
+            return
+    run.sort(key=sort_key, reverse=reverse)
+    yield from run
+
+
+def _merge_spilled_runs(first_run: list[list], records: Iterator[list], sort_key: Callable, reverse: bool,
+                        memory_budget: int, spill_dir: str | None) -> Iterator[list]:
+    """
+    Write the sorted first run and the runs of the rest of the records to the disk, except the last run, then merge
+    them all.
+    """
+    with spill.make_spill_dir(spill_dir) as dir_path:
+        paths = [_write_run(dir_path, 0, first_run)]
+        run = []
+        used_memory = 0
+        for record in records:
+            run.append(record)
+            used_memory += spill.record_size(record)
+            if used_memory > memory_budget:
+                run.sort(key=sort_key, reverse=reverse)
+                paths.append(_write_run(dir_path, len(paths), run))
+                run = []
+                used_memory = 0
+        run.sort(key=sort_key, reverse=reverse)
+        run_count = len(paths)
+        while len(paths) + 1 > _MERGE_WIDTH:
+            # the runs are merged in the order they were written, which keeps the sort stable
+            merged_paths = []
+            for i in range(0, len(paths), _MERGE_WIDTH):
+                group = paths[i:i + _MERGE_WIDTH]
+                merged = heapq.merge(*(spill.read_records(path) for path in group), key=sort_key, reverse=reverse)
+                merged_paths.append(_write_run(dir_path, run_count, merged))
+                run_count += 1
+                for path in group:
+                    os.remove(path)
+            paths = merged_paths
+        yield from heapq.merge(*(spill.read_records(path) for path in paths), run, key=sort_key, reverse=reverse)
+
+
+def _write_run(dir_path: str, run_nr: int, records: Iterable[list]) -> str:
+    """
+    Write the records of a sorted run to a file.
+    :return: the path of the file
+    """
+    writer = spill.SpillWriter(dir_path, f"run_{run_nr}", 1)
+    for record in records:
+        writer.write(0, record)
+    return writer.close()[0]
+
+
+def _make_sort_key(keys: list[tuple[int, bool]]) -> tuple[Callable, bool]:
+    """
+    The key function of the records and whether it is to be sorted in reverse. Records of keys in a single direction
+    are compared as tuples; the key of mixed directions compares them value by value.
+    """
+    positions = [position for position, _ in keys]
+
+    def values_key(record: list) -> tuple:
+        # a null is smaller than any value, and equal to another null
+        return tuple((record[position] is not None, record[position]) for position in positions)
+
+    directions = {descending for _, descending in keys}
+    if len(directions) <= 1:
+        return values_key, directions == {True}
+    descending_flags = [descending for _, descending in keys]
+
+    def compare(left: tuple, right: tuple) -> int:
+        for left_value, right_value, descending in zip(left, right, descending_flags):
+            if left_value != right_value:
+                result = -1 if left_value < right_value else 1
+                return -result if descending else result
+        return 0
+
+    compare_key = cmp_to_key(compare)
+    return lambda record: compare_key(values_key(record)), False
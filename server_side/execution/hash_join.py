@@ -0,0 +1,105 @@
+"""
+Equi-join of two streams of records with a hash table.
+
+The records of the build input are put into a hash table by their join value, then the records of the probe input are
+streamed and matched against it. The build input should be the smaller one.
+
+The memory taken by the hash table is estimated as it grows. If it goes over the budget, the join turns into a grace
+hash join: both inputs are split by the hash of their join values into partitions on the disk, so that the matching
+records end up in the same partition, and the partitions are joined one by one. A partition that is still too large is
+partitioned again with another hash function.
+"""
+from itertools import chain
+from typing import Iterable, Iterator
+
+from server_side.execution import spill
+
+_PARTITION_COUNT = 16
+_MAX_DEPTH = 4  # the most times a partition is split again, the last level is joined in memory anyway
+
+
+def hash_join(build_records: Iterable[list],
+              probe_records: Iterable[list],
+              build_position: int,
+              probe_position: int,
+              memory_budget: int,
+              build_is_left: bool = False,
+              spill_dir: str | None = None) -> Iterator[list]:
+    """
+    Generator of the joined records: the records of the two inputs with equal values at the given positions, null values
+    never match.
+    A joined record is the left record followed by the right record, the probe input is the left one unless
+    'build_is_left' is set. The records come in the order of the probe input only if the build input fits into the
+    memory budget; once the inputs are partitioned, they come partition by partition, in no order.
+
+    :param build_records: the records put into the hash table
+    :param probe_records: the records matched against the hash table, they are streamed
+    :param build_position: the position of the join value in the build records
+    :param probe_position: the position of the join value in the probe records
+    :param memory_budget: the most bytes the hash table may take before the inputs are partitioned to the disk
+    :param build_is_left: whether the build records come first in the joined records
+    :param spill_dir: the directory of the partition files, the system default if not given
+    """
+    return _join(iter(build_records), probe_records, build_position, probe_position, memory_budget, build_is_left,
+                 spill_dir, 0)
+
+
+def _join(build_records: Iterator[list], probe_records: Iterable[list], build_position: int, probe_position: int,
+          memory_budget: int, build_is_left: bool, spill_dir: str | None, depth: int) -> Iterator[list]:
+    table: dict = {}  # [key=<join value>, value=list[<build record>]]
+    used_memory = 0
+    for record in build_records:
+        value = record[build_position]
+        if value is None:
+            continue
+        bucket = table.get(value)
+        if bucket is None:
+            table[value] = [record]
+        else:
+            bucket.append(record)
+        used_memory += spill.record_size(record)
+        if used_memory > memory_budget and depth < _MAX_DEPTH:
+            # the records read so far go to the partitions first, then the rest of the build input
+            held_records = (held for bucket in table.values() for held in bucket)
+            yield from _grace_join(chain(held_records, build_records), probe_records, build_position,
+                                   probe_position, memory_budget, build_is_left, spill_dir, depth)
+            return
+
+    for record in probe_records:
+        value = record[probe_position]
+        if value is None:
+            continue
+        matches = table.get(value)
+        if matches is None:
+            continue
+        if build_is_left:
+            for match in matches:
+                yield match + record
+        else:
+            for match in matches:
+                yield record + match
+
+
+def _grace_join(build_records: Iterator[list], probe_records: Iterable[list], build_position: int, probe_position: int,
+                memory_budget: int, build_is_left: bool, spill_dir: str | None, depth: int) -> Iterator[list]:
+    with spill.make_spill_dir(spill_dir) as dir_path:
+        build_paths = _partition(build_records, build_position, dir_path, "build", depth)
+        probe_paths = _partition(probe_records, probe_position, dir_path, "probe", depth)
+        for build_path, probe_path in zip(build_paths, probe_paths):
+            yield from _join(spill.read_records(build_path), spill.read_records(probe_path), build_position,
+                             probe_position, memory_budget, build_is_left, spill_dir, depth + 1)
+
+
+def _partition(records: Iterable[list], position: int, dir_path: str, name: str, depth: int) -> list[str]:
+    """
+    Split the records into partition files by the hash of their join value, records with null values are left out.
+    The hash function depends on the depth, so that a partition is split differently than its parent.
+    :return: the paths of the partition files
+    """
+    writer = spill.SpillWriter(dir_path, name, _PARTITION_COUNT)
+    for record in records:
+        value = record[position]
+        if value is not None:
+            writer.write(hash((depth, value)) % _PARTITION_COUNT, record)
+    return writer.close()
+
@@ -0,0 +1,443 @@
+"""
+Planning and evaluation of the inner joins of a query.
+
+The conditions of the ON clauses and of the WHERE clause are handed over together as a list of predicates, for inner
+joins it makes no difference where they were written. A predicate is a (<operand>, <operator>, <operand>) tuple, where
+an operand is either ("column", <relation name>, <column name>) or ("constant", <value>).
+    - a predicate on the columns of a single relation is pushed down to the scan of that relation
+    - an equality between the columns of two relations is a join predicate, it can drive a join
+    - the rest is evaluated right after the join that brings its relations together
+
+The join order and the join methods are chosen by dynamic programming over the subsets of the relations (for many
+relations, greedily). The plans are left-deep, apart from the build input of a hash join, which can be any subplan.
+The numbers of records are estimated from the statistics of the tables where they are given, by fixed fractions
+otherwise. The cost of a plan is the estimated number of records it reads, hashes and produces:
+    - scan:                     every record of the table is read
+    - hash join:                the build input is hashed, the probe input is streamed; more if it does not fit into
+                                JOIN_MEMORY_BUDGET and has to be partitioned to the disk
+    - index nested loop join:   a keyed lookup into the inner table for each outer record, the inner table is not read;
+                                the join column has to be the first column of the primary key or of an index
+    - merge join:               both inputs are read once, only if both are already ordered by their join columns
+    - nested loop join:         every pair of records, only if the relations have no join predicate between them
+"""
+from itertools import combinations
+from typing import Callable, Iterator
+
+from server_side import config
+from server_side.database_objects import Table, TableStatistics
+from server_side.execution.operators import (Operator, Scan, Filter, HashJoin, MergeJoin, IndexNestedLoopJoin,
+                                             NestedLoopJoin)
+from server_side.execution.predicates import compile_condition, compile_conjunction
+
+_MAX_DP_RELATIONS = 8  # above this, the join order is chosen greedily
+_HASH_BUILD_COST = 2.0  # the cost of hashing a record, relative to reading one
+_PRIMARY_KEY_PROBE_COST = 2.0  # the cost of looking up the records of a value by the primary key
+_INDEX_PROBE_COST = 3.0  # the cost of looking up the records of a value through an index
+_VALUE_SIZE = 64  # the estimated memory taken by a value of a record, in bytes
+_EQUALITY_SELECTIVITY = 0.1  # the estimated fraction of records an equality keeps, if the column is not unique
+_RANGE_SELECTIVITY = 1 / 3  # the estimated fraction of records any other comparison keeps
+# the operator that gives the same comparison with the operands swapped
+_MIRRORED_OPERATORS = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+
+class Relation:
+    """
+    A table of the FROM clause, under its alias if it has one.
+    """
+
+    def __init__(self, name: str, table: Table, cardinality: int, statistics: TableStatistics | None = None):
+        """
+        :param name: the alias of the table, or its name if it has no alias
+        :param cardinality: the number of records of the table
+        :param statistics: the statistics of the table, if there are any
+        """
+        self.__name = name
+        self.__table = table
+        self.__cardinality = cardinality
+        self.__statistics = statistics
+
+    def get_name(self) -> str:
+        return self.__name
+
+    def get_table(self) -> Table:
+        return self.__table
+
+    def get_cardinality(self) -> int:
+        return self.__cardinality
+
+    def get_statistics(self) -> TableStatistics | None:
+        return self.__statistics
+
+
+class PlanNode:
+    """
+    A node of a join plan. It produces records made of the columns in its layout, and filters them by its predicates.
+    """
+
+    def __init__(self, relations: frozenset, layout: list[tuple[str, str]], rows: float, cost: float,
+                 order: tuple[str, str] | None, predicates: list[tuple]):
+        """
+        :param relations: the names of the relations whose columns the records have
+        :param layout: the (<relation name>, <column name>) pairs of the record values
+        :param rows: the estimated number of records produced
+        :param cost: the estimated cost of producing them
+        :param order: the column the records are ordered by, None if they are not ordered
+        :param predicates: the predicates evaluated on the records of the node
+        """
+        self.__relations = relations
+        self.__layout = layout
+        self.__rows = rows
+        self.__cost = cost
+        self.__order = order
+        self.__predicates = predicates
+
+    def get_relations(self) -> frozenset:
+        return self.__relations
+
+    def get_layout(self) -> list[tuple[str, str]]:
+        return self.__layout
+
+    def get_rows(self) -> float:
+        return self.__rows
+
+    def get_cost(self) -> float:
+        return self.__cost
+
+    def get_order(self) -> tuple[str, str] | None:
+        return self.__order
+
+    def get_predicates(self) -> list[tuple]:
+        return self.__predicates
+
+
+class ScanNode(PlanNode):
+    """
+    Reads every record of a relation.
+    """
+
+    def __init__(self, relation: Relation, rows: float, predicates: list[tuple]):
+        table = relation.get_table()
+        order = None
+        if table.has_primary_key():
+            # the records are read in the order of their primary keys
+            order = (relation.get_name(), table.get_primary_key().get_column_names()[0])
+        layout = [(relation.get_name(), col_name) for col_name in table.get_column_names()]
+        super().__init__(frozenset([relation.get_name()]), layout, rows, relation.get_cardinality(), order, predicates)
+        self.__relation = relation
+
+    def get_relation(self) -> Relation:
+        return self.__relation
+
+
+class JoinNode(PlanNode):
+    """
+    Joins the records of two subplans: a joined record is the outer record followed by the inner record.
+    """
+
+    def __init__(self, method: str, outer: PlanNode, inner: PlanNode, outer_key: tuple[str, str] | None,
+                 inner_key: tuple[str, str] | None, rows: float, cost: float, predicates: list[tuple]):
+        """
+        :param method: "hash" (the inner input is the build input), "index_nested_loop" (the inner input is a scan that
+        is replaced by lookups), "merge" or "nested_loop"
+        :param outer_key: the join column of the outer input, None for a nested loop join
+        :param inner_key: the join column of the inner input, None for a nested loop join
+        """
+        # a hash join that goes over its memory budget returns the records partition by partition, in no order
+        order = outer.get_order() if method != "hash" else None
+        super().__init__(outer.get_relations() | inner.get_relations(), outer.get_layout() + inner.get_layout(), rows,
+                         cost, order, predicates)
+        self.__method = method
+        self.__outer = outer
+        self.__inner = inner
+        self.__outer_key = outer_key
+        self.__inner_key = inner_key
+
+    def get_method(self) -> str:
+        return self.__method
+
+    def get_outer(self) -> PlanNode:
+        return self.__outer
+
+    def get_inner(self) -> PlanNode:
+        return self.__inner
+
+    def get_outer_key(self) -> tuple[str, str] | None:
+        return self.__outer_key
+
+    def get_inner_key(self) -> tuple[str, str] | None:
+        return self.__inner_key
+
+
+def plan_joins(relations: list[Relation], predicates: list[tuple]) -> PlanNode:
+    """
+    Find the cheapest plan that joins the relations and evaluates the predicates.
+    """
+    planner = _Planner(relations, predicates)
+    return planner.plan()
+
+
+def execute_plan(plan: PlanNode, dbm, db_name: str) -> Iterator[list]:
+    """
+    Evaluate a join plan, the records are streamed.
+    :return: the records of the plan, made of the columns in its layout
+    """
+    return iter(build_operator(plan, dbm, db_name))
+
+
+def build_operator(plan: PlanNode, dbm, db_name: str) -> Operator:
+    """
+    The tree of physical operators that evaluates a join plan. The predicates of every node are evaluated on its
+    records right after it.
+    """
+    if isinstance(plan, ScanNode):
+        operator = Scan(dbm, db_name, plan.get_relation().get_table().get_name())
+        return _filter(operator, compile_predicates(plan.get_predicates(), plan.get_layout()))
+
+    outer, inner = plan.get_outer(), plan.get_inner()
+    outer_position = outer.get_layout().index(plan.get_outer_key()) if plan.get_outer_key() else None
+    inner_position = inner.get_layout().index(plan.get_inner_key()) if plan.get_inner_key() else None
+    match plan.get_method():
+        case "hash":
+            operator = HashJoin(build_operator(outer, dbm, db_name), build_operator(inner, dbm, db_name),
+                                outer_position, inner_position)
+        case "index_nested_loop":
+            inner_filter = compile_predicates(inner.get_predicates(), inner.get_layout())
+            operator = IndexNestedLoopJoin(build_operator(outer, dbm, db_name), dbm, db_name, outer_position,
+                                           inner.get_relation().get_table(), plan.get_inner_key()[1],
+                                           inner_filter=inner_filter)
+        case "merge":
+            operator = MergeJoin(build_operator(outer, dbm, db_name), build_operator(inner, dbm, db_name),
+                                 outer_position, inner_position)
+        case "nested_loop":
+            operator = NestedLoopJoin(build_operator(outer, dbm, db_name), build_operator(inner, dbm, db_name))
+        case _:
+            raise ValueError(f"Unknown join method '{plan.get_method()}'")
+    return _filter(operator, compile_predicates(plan.get_predicates(), plan.get_layout()))
+
+
+def compile_predicates(predicates: list[tuple], layout: list[tuple[str, str]]) -> Callable[[list], bool] | None:
+    """
+    Turn the predicates into a function that tells if a record satisfies all of them.
+    A comparison with a null value is never satisfied.
+    :return: the function, or None if there are no predicates
+    """
+    return compile_conjunction([compile_condition(_compile_operand(left, layout), op, _compile_operand(right, layout))
+                                for left, op, right in predicates])
+
+
+def predicate_relations(predicate: tuple) -> set[str]:
+    """
+    The names of the relations whose columns appear in the predicate.
+    """
+    left, _, right = predicate
+    return {operand[1] for operand in (left, right) if operand[0] == "column"}
+
+
+class _Planner:
+    """
+    Holds the relations and the classified predicates while the plan is searched.
+    """
+
+    def __init__(self, relations: list[Relation], predicates: list[tuple]):
+        self.__relations: dict[str, Relation] = {relation.get_name(): relation for relation in relations}
+        self.__order: list[str] = [relation.get_name() for relation in relations]
+        self.__filters: dict[str, list[tuple]] = {name: [] for name in self.__order}  # pushed down to the scans
+        self.__join_predicates: list[tuple] = []  # equalities between the columns of two relations
+        self.__residual_predicates: list[tuple] = []  # the rest of the predicates on more relations
+        for predicate in predicates:
+            names = predicate_relations(predicate)
+            left, op, right = predicate
+            if not names:
+                # a constant predicate decides for all the records at once, the first scan evaluates it
+                self.__filters[self.__order[0]].append(predicate)
+            elif len(names) == 1:
+                self.__filters[names.pop()].append(predicate)
+            elif op == "=" and left[0] == "column" and right[0] == "column":
+                self.__join_predicates.append(predicate)
+            else:
+                self.__residual_predicates.append(predicate)
+        self.__scans: dict[str, ScanNode] = {name: self.__build_scan(self.__relations[name]) for name in self.__order}
+
+    def plan(self) -> PlanNode:
+        if len(self.__order) <= _MAX_DP_RELATIONS:
+            return self.__plan_dynamic()
+        return self.__plan_greedy()
+
+    def __plan_dynamic(self) -> PlanNode:
+        """
+        The cheapest plan of every subset of the relations is built from the cheapest plans of its subsets that lack
+        one relation.
+        """
+        best: dict[frozenset, PlanNode] = {frozenset([name]): scan for name, scan in self.__scans.items()}
+        for size in range(2, len(self.__order) + 1):
+            for names in combinations(self.__order, size):
+                subset = frozenset(names)
+                best_plan = None
+                for connected_only in (True, False):
+                    for name in names:
+                        candidates = self.__join_candidates(best[subset - {name}], self.__scans[name], connected_only)
+                        best_plan = _cheapest([best_plan] + candidates)
+                    if best_plan is not None:
+                        break
+                best[subset] = best_plan
+        return best[frozenset(self.__order)]
+
+    def __plan_greedy(self) -> PlanNode:
+        """
+        Start from the smallest relation and keep adding the relation that can be joined the cheapest.
+        """
+        plan: PlanNode = min(self.__scans.values(), key=lambda scan: scan.get_rows())
+        while len(plan.get_relations()) < len(self.__order):
+            remaining = [name for name in self.__order if name not in plan.get_relations()]
+            best_plan = None
+            for connected_only in (True, False):
+                for name in remaining:
+                    best_plan = _cheapest([best_plan] + self.__join_candidates(plan, self.__scans[name], connected_only))
+                if best_plan is not None:
+                    break
+            plan = best_plan
+        return plan
+
+    def __build_scan(self, relation: Relation) -> ScanNode:
+        filters = self.__filters[relation.get_name()]
+        rows = float(relation.get_cardinality())
+        for predicate in filters:
+            rows *= self.__filter_selectivity(relation, predicate)
+        return ScanNode(relation, _at_least_one(rows, relation.get_cardinality()), filters)
+
+    def __filter_selectivity(self, relation: Relation, predicate: tuple) -> float:
+        left, op, right = predicate
+        if left[0] != "column" and right[0] != "column":
+            return 1.0
+        if left[0] == "column" and right[0] == "column":
+            return _EQUALITY_SELECTIVITY if op == "=" else _RANGE_SELECTIVITY
+        # the column is compared with a constant, read as "<column> <op> <constant>"
+        if left[0] == "column":
+            column, value = left, right[1]
+        else:
+            column, value, op = right, left[1], _MIRRORED_OPERATORS.get(op, op)
+        statistics = relation.get_statistics()
+        if statistics is not None:
+            selectivity = statistics.estimate_selectivity(column[2], op, value)
+            if selectivity is not None:
+                return selectivity
+        if op != "=":
+            return _RANGE_SELECTIVITY
+        if _is_unique(relation.get_table(), column[2]):
+            return 1 / max(relation.get_cardinality(), 1)
+        return _EQUALITY_SELECTIVITY
+
+    def __distinct_values(self, column: tuple) -> float:
+        """
+        The estimated number of distinct values of a column in the records of its scan.
+        """
+        relation = self.__relations[column[1]]
+        rows = self.__scans[column[1]].get_rows()
+        if _is_unique(relation.get_table(), column[2]):
+            return max(rows, 1.0)
+        statistics = relation.get_statistics()
+        column_statistics = statistics.get_column(column[2]) if statistics is not None else None
+        if column_statistics is not None:
+            return max(min(rows, column_statistics.get_distinct_count()), 1.0)
+        return max(min(rows, relation.get_cardinality() * _EQUALITY_SELECTIVITY), 1.0)
+
+    def __join_candidates(self, outer: PlanNode, scan: ScanNode, connected_only: bool) -> list[PlanNode]:
+        """
+        The plans that join a subplan with the scan of one more relation, with every method that applies.
+        :param connected_only: only join by the join predicates between them, no nested loop join
+        """
+        relations = outer.get_relations() | scan.get_relations()
+        join_predicates = []  # (<predicate>, <column of the outer>, <column of the scan>) tuples
+        for predicate in self.__join_predicates:
+            left, _, right = predicate
+            left_column, right_column = (left[1], left[2]), (right[1], right[2])
+            if left[1] in outer.get_relations() and right[1] in scan.get_relations():
+                join_predicates.append((predicate, left_column, right_column))
+            elif right[1] in outer.get_relations() and left[1] in scan.get_relations():
+                join_predicates.append((predicate, right_column, left_column))
+        residual = [predicate for predicate in self.__residual_predicates
+                    if predicate_relations(predicate) <= relations
+                    and not predicate_relations(predicate) <= outer.get_relations()]
+        if connected_only and not join_predicates:
+            return []
+
+        rows = outer.get_rows() * scan.get_rows()
+        for predicate, _, _ in join_predicates:
+            left, _, right = predicate
+            rows /= max(self.__distinct_values(left), self.__distinct_values(right))
+        rows *= _RANGE_SELECTIVITY ** len(residual)
+        rows = _at_least_one(rows, outer.get_rows() * scan.get_rows())
+
+        if not join_predicates:
+            cost = outer.get_cost() + scan.get_cost() + outer.get_rows() * scan.get_rows()
+            return [JoinNode("nested_loop", outer, scan, None, None, rows, cost, residual)]
+
+        candidates = []
+        for predicate, outer_key, scan_key in join_predicates:
+            # the join predicates that do not drive the join are evaluated on the joined records
+            predicates = [other for other, _, _ in join_predicates if other is not predicate] + residual
+            candidates.append(JoinNode("hash", outer, scan, outer_key, scan_key, rows,
+                                       _hash_join_cost(outer, scan, rows), predicates))
+            candidates.append(JoinNode("hash", scan, outer, scan_key, outer_key, rows,
+                                       _hash_join_cost(scan, outer, rows), predicates))
+            table = scan.get_relation().get_table()
+            if table.is_leading_indexed(scan_key[1]):
+                primary_key = table.get_primary_key()
+                probe_cost = _PRIMARY_KEY_PROBE_COST if primary_key is not None and \
+                    primary_key.get_column_names()[0] == scan_key[1] else _INDEX_PROBE_COST
+                cost = outer.get_cost() + outer.get_rows() * probe_cost + rows
+                candidates.append(JoinNode("index_nested_loop", outer, scan, outer_key, scan_key, rows, cost,
+                                           predicates))
+            if outer.get_order() == outer_key and scan.get_order() == scan_key and \
+                    self.__column_type(outer_key) == self.__column_type(scan_key):
+                # a single pass over both inputs, which are read anyway
+                cost = outer.get_cost() + scan.get_cost() + rows
+                candidates.append(JoinNode("merge", outer, scan, outer_key, scan_key, rows, cost, predicates))
+        return candidates
+
+    def __column_type(self, column: tuple[str, str]) -> str:
+        return self.__relations[column[0]].get_table().get_column(column[1]).get_type()
+
+
+def _hash_join_cost(probe: PlanNode, build: PlanNode, rows: float) -> float:
+    cost = probe.get_cost() + build.get_cost() + probe.get_rows() + _HASH_BUILD_COST * build.get_rows() + rows
+    if build.get_rows() * len(build.get_layout()) * _VALUE_SIZE > config.JOIN_MEMORY_BUDGET:
+        # both inputs are written to the partition files and read back
+        cost += 2 * (probe.get_rows() + build.get_rows())
+    return cost
+
+
+def _cheapest(plans: list[PlanNode | None]) -> PlanNode | None:
+    best = None
+    for plan in plans:
+        if plan is not None and (best is None or plan.get_cost() < best.get_cost()):
+            best = plan
+    return best
+
+
+def _is_unique(table: Table, col_name: str) -> bool:
+    if table.has_primary_key() and table.get_primary_key().get_column_names() == [col_name]:
+        return True
+    return table.is_unique([col_name])
+
+
+def _at_least_one(rows: float, upper_bound: float) -> float:
+    """
+    An estimate is kept at one record at least, unless there can be no records at all.
+    """
+    return max(rows, min(1.0, upper_bound))
+
+
+def _compile_operand(operand: tuple, layout: list[tuple[str, str]]):
+    """
+    :return: the position of a column in the layout, or the value of a constant wrapped in a tuple
+    """
+    if operand[0] == "column":
+        return layout.index((operand[1], operand[2]))
+    return (operand[1],)
+
+
+def _filter(operator: Operator, predicate: Callable[[list], bool] | None) -> Operator:
+    if predicate is None:
+        return operator
+    return Filter(operator, predicate)
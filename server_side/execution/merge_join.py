@@ -0,0 +1,49 @@
+"""
+Equi-join of two streams of records that are both sorted by their join values.
+
+The inputs are read side by side, only the records of the right input that share the current join value are held in
+memory. Records with null join values never match.
+"""
+from typing import Iterable, Iterator
+
+
+def merge_join(left_records: Iterable[list],
+               right_records: Iterable[list],
+               left_position: int,
+               right_position: int) -> Iterator[list]:
+    """
+    Generator of the joined records: the left record followed by the right record, for every pair with equal values at
+    the given positions. The records come in the order of the left input.
+
+    :param left_records: records sorted in ascending order by the value at 'left_position'
+    :param right_records: records sorted in ascending order by the value at 'right_position'
+    """
+    right_iterator = iter(right_records)
+    right_record = _next_not_null(right_iterator, right_position)
+    group_value = None
+    group: list[list] = []  # the right records with the value 'group_value'
+    for left_record in left_records:
+        value = left_record[left_position]
+        if value is None:
+            continue
+        if not group or group_value != value:
+            # skip the right records before the value, then gather the ones with the value
+            while right_record is not None and right_record[right_position] < value:
+                right_record = _next_not_null(right_iterator, right_position)
+            group_value = value
+            group = []
+            while right_record is not None and right_record[right_position] == value:
+                group.append(right_record)
+                right_record = _next_not_null(right_iterator, right_position)
+        for match in group:
+            yield left_record + match
+
+
+def _next_not_null(records: Iterator[list], position: int) -> list | None:
+    """
+    The next record whose value at the position is not null, None at the end of the records.
+    """
+    for record in records:
+        if record[position] is not None:
+            return record
+    return None
@@ -0,0 +1,487 @@
+"""
+Physical operators that evaluate a query as a tree, in the iterator (Volcano) model.
+
+Every operator pulls batches of records from its children, processes them, and hands its own batches to its parent when
+asked for the next one. The records flow through the tree as they are read from the storage: only the operators that
+have to see all of their input before giving the first record (the aggregation, the sort, the build side of a hash
+join) hold it. A parent that needs no more records stops pulling, and closing the root releases the reads of the whole
+tree.
+
+An operator is used as:
+    operator.open()
+    while (batch := operator.next_batch()) is not None:
+        ...
+    operator.close()
+or simply iterated, which does the same record by record.
+"""
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, as_completed
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+from server_side import config
+from server_side.database_objects import Table
+from server_side.execution.access_path import AccessPath
+from server_side.execution.aggregates import Accumulator, aggregate_records, create_accumulators, merge_groups
+from server_side.execution.distinct import adjacent_distinct, hash_distinct
+from server_side.execution.external_sort import external_sort
+from server_side.execution.hash_join import hash_join
+from server_side.execution.merge_join import merge_join
+from server_side.execution import parallel
+
+_PARTS_PER_WORKER = 4  # the number of parts a range of keys is split into for each worker of a parallel scan
+
+
+class Operator(ABC):
+    def __init__(self, *children: 'Operator'):
+        self.__children: list[Operator] = list(children)
+
+    def get_children(self) -> list['Operator']:
+        return self.__children
+
+    def open(self):
+        """
+        Prepare the operator and its children to give records.
+        """
+        for child in self.__children:
+            child.open()
+
+    @abstractmethod
+    def next_batch(self) -> list[list] | None:
+        """
+        :return: the next records, never an empty list; None when there are no more records
+        """
+        pass
+
+    def close(self):
+        """
+        Release what the operator and its children hold. It can be called more than once.
+        """
+        for child in self.__children:
+            child.close()
+
+    def __iter__(self) -> Iterator[list]:
+        self.open()
+        try:
+            while (batch := self.next_batch()) is not None:
+                yield from batch
+        finally:
+            self.close()
+
+
+def pull(operator: Operator) -> Iterator[list]:
+    """
+    The records of an opened operator, one by one.
+    """
+    while (batch := operator.next_batch()) is not None:
+        yield from batch
+
+
+class _StreamOperator(Operator):
+    """
+    An operator whose records are produced by a generator, they are handed on in batches of READ_BATCH_SIZE.
+    """
+
+    def __init__(self, *children: Operator):
+        super().__init__(*children)
+        self.__records: Iterator[list] | None = None
+
+    @abstractmethod
+    def _records(self) -> Iterator[list]:
+        """
+        The records of the operator, the children are already opened.
+        """
+        pass
+
+    def open(self):
+        super().open()
+        self.__records = iter(self._records())
+
+    def next_batch(self) -> list[list] | None:
+        if self.__records is None:
+            return None
+        batch = list(islice(self.__records, config.READ_BATCH_SIZE))
+        return batch if batch else None
+
+    def close(self):
+        if self.__records is not None:
+            close = getattr(self.__records, "close", None)
+            if close is not None:
+                # a generator stops reading, its cursors are released
+                close()
+            self.__records = None
+        super().close()
+
+
+class Values(_StreamOperator):
+    """
+    Records that are already in memory.
+    """
+
+    def __init__(self, records: Iterable[list]):
+        super().__init__()
+        self.__values = records
+
+    def _records(self) -> Iterator[list]:
+        return iter(self.__values)
+
+
+class Scan(_StreamOperator):
+    """
+    Every record of a table, in the order of the primary key.
+    """
+
+    def __init__(self, dbm, db_name: str, table_name: str, column_names: list[str] | None = None):
+        """
+        :param column_names: the columns to read, all of them if not given
+        """
+        super().__init__()
+        self.__dbm = dbm
+        self.__db_name = db_name
+        self.__table_name = table_name
+        self.__column_names = column_names
+
+    def _records(self) -> Iterator[list]:
+        return self.__dbm.find_all(self.__db_name, self.__table_name, self.__column_names)
+
+
+class IndexScan(_StreamOperator):
+    """
+    The records of a table in the key range of an access path.
+    """
+
+    def __init__(self, dbm, db_name: str, table_name: str, access_path: AccessPath):
+        super().__init__()
+        self.__dbm = dbm
+        self.__db_name = db_name
+        self.__table_name = table_name
+        self.__access_path = access_path
+
+    def get_access_path(self) -> AccessPath:
+        return self.__access_path
+
+    def _records(self) -> Iterator[list]:
+        return self.__dbm.find_by_access_path(self.__db_name, self.__table_name, self.__access_path)
+
+
+class Filter(Operator):
+    """
+    The records of the child that the predicate accepts.
+    """
+
+    def __init__(self, child: Operator, predicate: Callable[[list], bool]):
+        super().__init__(child)
+        self.__child = child
+        self.__predicate = predicate
+
+    def next_batch(self) -> list[list] | None:
+        predicate = self.__predicate
+        while (batch := self.__child.next_batch()) is not None:
+            kept = [record for record in batch if predicate(record)]
+            if kept:
+                return kept
+        return None
+
+
+class Project(Operator):
+    """
+    The values at the given positions of the records of the child.
+    """
+
+    def __init__(self, child: Operator, positions: list[int]):
+        super().__init__(child)
+        self.__child = child
+        self.__positions = positions
+
+    def next_batch(self) -> list[list] | None:
+        batch = self.__child.next_batch()
+        if batch is None:
+            return None
+        positions = self.__positions
+        return [[record[position] for position in positions] for record in batch]
+
+
+class Limit(Operator):
+    """
+    The first records of the child. The child is not pulled anymore once they are given.
+    """
+
+    def __init__(self, child: Operator, count: int):
+        super().__init__(child)
+        self.__child = child
+        self.__count = count
+        self.__remaining = count
+
+    def open(self):
+        super().open()
+        self.__remaining = self.__count
+
+    def next_batch(self) -> list[list] | None:
+        if self.__remaining <= 0:
+            return None
+        batch = self.__child.next_batch()
+        if batch is None:
+            return None
+        batch = batch[:self.__remaining]
+        self.__remaining -= len(batch)
+        if self.__remaining <= 0:
+            # nothing more is needed from the tree below
+            self.__child.close()
+        return batch
+
+
+class Distinct(_StreamOperator):
+    """
+    The records of the child without the duplicates. Nulls are equal to each other.
+    The records are deduplicated by a hash set that is partitioned to the disk above DISTINCT_MEMORY_BUDGET, or, if
+    the duplicates of the child follow each other (e.g. it is ordered by the columns of the records), by comparing each
+    record with the one before it.
+    """
+
+    def __init__(self, child: Operator, grouped: bool = False):
+        """
+        :param grouped: whether the duplicates of the child follow each other
+        """
+        super().__init__(child)
+        self.__child = child
+        self.__grouped = grouped
+
+    def _records(self) -> Iterator[list]:
+        if self.__grouped:
+            return adjacent_distinct(pull(self.__child))
+        return hash_distinct(pull(self.__child), config.DISTINCT_MEMORY_BUDGET, config.SPILL_DIR)
+
+
+class Sort(_StreamOperator):
+    """
+    The records of the child sorted by the values at the given positions. Nulls are smaller than all the other values.
+    The records are sorted in memory up to SORT_MEMORY_BUDGET, above it sorted runs are written to the disk and merged.
+    """
+
+    def __init__(self, child: Operator, keys: list[tuple[int, bool]]):
+        """
+        :param keys: (<position>, <descending>) pairs, from the most significant
+        """
+        super().__init__(child)
+        self.__child = child
+        self.__keys = keys
+
+    def _records(self) -> Iterator[list]:
+        return external_sort(pull(self.__child), self.__keys, config.SORT_MEMORY_BUDGET, config.SPILL_DIR)
+
+
+class HashAggregate(_StreamOperator):
+    """
+    The records of the child grouped by the values at the key positions, with the results of the aggregate functions
+    over each group. A group is made of its key values followed by the results. The records are consumed as a stream,
+    only an accumulator per aggregate function and group is held.
+
+    Without key positions there is a single group, even if the child has no records.
+    """
+
+    def __init__(self, child: Operator, key_positions: list[int], aggregates: list[tuple[str, int | None]]):
+        """
+        :param aggregates: (<function name>, <position of its argument>) pairs, the position is None for COUNT(*)
+        """
+        super().__init__(child)
+        self.__child = child
+        self.__key_positions = key_positions
+        self.__aggregates = aggregates
+
+    def _records(self) -> Iterator[list]:
+        groups = aggregate_records(pull(self.__child), self.__key_positions, self.__aggregates)
+        yield from group_records(groups, self.__key_positions, self.__aggregates)
+
+
+class ParallelAggregate(_StreamOperator):
+    """
+    Hash aggregation of the records of a table that satisfy the conditions, in a range of its primary keys. The range
+    is split into parts that worker processes read and aggregate at the same time; their partial groups are merged.
+    The groups come in the order of a serial scan.
+    """
+
+    def __init__(self, dbm, db_name: str, table: Table, key_condition: dict | None,
+                 conditions: list[tuple[int, str, object]], key_positions: list[int],
+                 aggregates: list[tuple[str, int | None]], degree: int):
+        """
+        :param key_condition: the range of the primary keys, all of them if not given
+        :param conditions: (<position of a column>, <operator>, <constant>) tuples
+        :param degree: the number of parts the range is split into, and of worker processes
+        """
+        super().__init__()
+        self.__dbm = dbm
+        self.__db_name = db_name
+        self.__table = table
+        self.__key_condition = key_condition
+        self.__conditions = conditions
+        self.__key_positions = key_positions
+        self.__aggregates = aggregates
+        self.__degree = degree
+
+    def _records(self) -> Iterator[list]:
+        key_ranges = self.__dbm.partition_key_range(self.__db_name, self.__table.get_name(), self.__degree,
+                                                    self.__key_condition)
+        pool = parallel.get_pool(self.__degree)
+        futures = [pool.submit(parallel.aggregate_key_range, self.__dbm.get_storage_engine(), self.__db_name,
+                               self.__table.__dict__(), key_range, self.__conditions, self.__key_positions,
+                               self.__aggregates)
+                   for key_range in key_ranges]
+        groups: dict[tuple, list[Accumulator]] = {}
+        try:
+            # the ranges are merged in the order of the keys
+            for future in futures:
+                merge_groups(groups, future.result())
+        finally:
+            for future in futures:
+                future.cancel()
+        yield from group_records(groups, self.__key_positions, self.__aggregates)
+
+
+class ParallelScan(_StreamOperator):
+    """
+    The records of a table that satisfy the conditions, in a range of its primary keys. The range is split into parts
+    that worker processes read and filter at the same time; a few parts per worker, so that the records of only a
+    few parts wait in memory at once.
+    """
+
+    def __init__(self, dbm, db_name: str, table: Table, key_condition: dict | None,
+                 conditions: list[tuple[int, str, object]], degree: int, ordered: bool = True):
+        """
+        :param key_condition: the range of the primary keys, all of them if not given
+        :param conditions: (<position of a column>, <operator>, <constant>) tuples
+        :param degree: the number of worker processes
+        :param ordered: whether the records come in the order of their primary keys, else in the order the parts are
+            read in
+        """
+        super().__init__()
+        self.__dbm = dbm
+        self.__db_name = db_name
+        self.__table = table
+        self.__key_condition = key_condition
+        self.__conditions = conditions
+        self.__degree = degree
+        self.__ordered = ordered
+
+    def _records(self) -> Iterator[list]:
+        key_ranges = iter(self.__dbm.partition_key_range(self.__db_name, self.__table.get_name(),
+                                                         self.__degree * _PARTS_PER_WORKER, self.__key_condition))
+        pool = parallel.get_pool(self.__degree)
+        engine = self.__dbm.get_storage_engine()
+        table_data = self.__table.__dict__()
+
+        def submit(key_range: dict) -> Future:
+            return pool.submit(parallel.filter_key_range, engine, self.__db_name, table_data, key_range,
+                               self.__conditions)
+
+        # two parts per worker are read ahead
+        pending = deque(submit(key_range) for key_range in islice(key_ranges, self.__degree * 2))
+        try:
+            while pending:
+                if self.__ordered:
+                    future = pending.popleft()
+                else:
+                    future = next(as_completed(pending))
+                    pending.remove(future)
+                records = future.result()
+                key_range = next(key_ranges, None)
+                if key_range is not None:
+                    pending.append(submit(key_range))
+                yield from records
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def group_records(groups: dict[tuple, list[Accumulator]], key_positions: list[int],
+                  aggregates: list[tuple[str, int | None]]) -> Iterator[list]:
+    """
+    The records of aggregated groups: the key values followed by the results of the aggregates.
+    Without key positions there is a single group, even if no records were aggregated.
+    """
+    if not groups and not key_positions:
+        groups = {(): create_accumulators(aggregates)}
+    for key, accumulators in groups.items():
+        yield list(key) + [accumulator.result() for accumulator in accumulators]
+
+
+class HashJoin(_StreamOperator):
+    """
+    Equi-join of the records of two children: the left record followed by the right record. The right child is put into
+    the hash table and the left one is streamed, unless 'build_left' is set.
+    """
+
+    def __init__(self, left: Operator, right: Operator, left_position: int, right_position: int,
+                 build_left: bool = False):
+        super().__init__(left, right)
+        self.__left = left
+        self.__right = right
+        self.__left_position = left_position
+        self.__right_position = right_position
+        self.__build_left = build_left
+
+    def _records(self) -> Iterator[list]:
+        if self.__build_left:
+            return hash_join(pull(self.__left), pull(self.__right), self.__left_position, self.__right_position,
+                             config.JOIN_MEMORY_BUDGET, build_is_left=True, spill_dir=config.SPILL_DIR)
+        return hash_join(pull(self.__right), pull(self.__left), self.__right_position, self.__left_position,
+                         config.JOIN_MEMORY_BUDGET, build_is_left=False, spill_dir=config.SPILL_DIR)
+
+
+class MergeJoin(_StreamOperator):
+    """
+    Equi-join of the records of two children that are both sorted by their join values.
+    """
+
+    def __init__(self, left: Operator, right: Operator, left_position: int, right_position: int):
+        super().__init__(left, right)
+        self.__left = left
+        self.__right = right
+        self.__left_position = left_position
+        self.__right_position = right_position
+
+    def _records(self) -> Iterator[list]:
+        return merge_join(pull(self.__left), pull(self.__right), self.__left_position, self.__right_position)
+
+
+class IndexNestedLoopJoin(_StreamOperator):
+    """
+    Join of the records of the child with the records of a table that are looked up by the join value, through the
+    primary key or an index of the table. The records of the child come first.
+    """
+
+    def __init__(self, child: Operator, dbm, db_name: str, position: int, inner: Table, inner_col_name: str,
+                 inner_filter: Callable[[list], bool] | None = None):
+        """
+        :param position: the position of the join value in the records of the child
+        :param inner_filter: only the records of the table it accepts are joined
+        """
+        super().__init__(child)
+        self.__child = child
+        self.__dbm = dbm
+        self.__db_name = db_name
+        self.__position = position
+        self.__inner = inner
+        self.__inner_col_name = inner_col_name
+        self.__inner_filter = inner_filter
+
+    def _records(self) -> Iterator[list]:
+        return self.__dbm.index_nested_loop_join(self.__db_name, pull(self.__child), self.__position, self.__inner,
+                                                 self.__inner_col_name, inner_filter=self.__inner_filter)
+
+
+class NestedLoopJoin(_StreamOperator):
+    """
+    Every pair of the records of two children. The records of the inner child are held in memory.
+    """
+
+    def __init__(self, outer: Operator, inner: Operator):
+        super().__init__(outer, inner)
+        self.__outer = outer
+        self.__inner = inner
+
+    def _records(self) -> Iterator[list]:
+        inner_records = list(pull(self.__inner))
+        for outer_record in pull(self.__outer):
+            for inner_record in inner_records:
+                yield outer_record + inner_record
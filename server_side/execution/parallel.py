@@ -0,0 +1,100 @@
+"""
+Parallel evaluation of the parts of a query over ranges of the primary keys of a table.
+
+The range of keys a table is read in is split into ranges holding about the same number of rows. Each range is read by
+a worker process of a process pool with its own cursor; the worker evaluates the conditions, and aggregates the rows if
+the query does, so the work is spread over the processors and the server's process only merges the results. The
+workers open their own connections to the storage and read the data that is already written to it.
+
+The number of workers a query uses is its degree of parallelism: MAX_DEGREE_OF_PARALLELISM of the server, or the
+one the query asks for with OPTION (MAXDOP <n>).
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from server_side import config
+from server_side.database_objects import Table, StorageEngine
+from server_side.execution.aggregates import Accumulator, aggregate_records
+from server_side.execution.predicates import compile_condition, compile_conjunction
+
+_pool: ProcessPoolExecutor | None = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def degree_of_parallelism(requested: int | None = None) -> int:
+    """
+    The number of worker processes a query uses: the requested number, or MAX_DEGREE_OF_PARALLELISM if none was
+    requested; 0 stands for the number of processors. 1 means the query is evaluated by the server's process alone.
+    """
+    degree = requested if requested is not None else config.MAX_DEGREE_OF_PARALLELISM
+    if degree == 0:
+        degree = os.cpu_count() or 1
+    return max(degree, 1)
+
+
+def get_pool(worker_count: int) -> ProcessPoolExecutor:
+    """
+    The process pool shared by the queries, with 'worker_count' workers at least.
+    The workers are spawned, they don't inherit the connections and the threads of the server.
+    """
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size < worker_count:
+            if _pool is not None:
+                # the tasks already submitted to the smaller pool still finish
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(worker_count, mp_context=multiprocessing.get_context("spawn"))
+            _pool_size = worker_count
+        return _pool
+
+
+def aggregate_key_range(engine: StorageEngine, db_name: str, table_data: dict, key_condition: dict,
+                        conditions: list[tuple[int, str, object]], key_positions: list[int],
+                        aggregates: list[tuple[str, int | None]]) -> dict[tuple, list[Accumulator]]:
+    """
+    Read the records of a range of the primary keys of a table, keep the ones that satisfy the conditions, and
+    aggregate them. It runs in a worker process.
+
+    :param engine: a closed copy of the storage engine of the server, the worker opens it
+    :param table_data: the table, as it is saved in the structure file
+    :param conditions: (<position of a column>, <operator>, <constant>) tuples
+    :return: the partial states of the groups of the range
+    """
+    from server_side.dbmanager import scan_key_range
+    table = Table().from_dict(table_data)
+    predicate = compile_conjunction([compile_condition(position, op, (value,)) for position, op, value in conditions])
+    engine.set_up()
+    try:
+        records = scan_key_range(engine, db_name, table, key_condition)
+        if predicate is not None:
+            records = (record for record in records if predicate(record))
+        return aggregate_records(records, key_positions, aggregates)
+    finally:
+        engine.close_down()
+
+
+def filter_key_range(engine: StorageEngine, db_name: str, table_data: dict, key_condition: dict,
+                     conditions: list[tuple[int, str, object]]) -> list[list]:
+    """
+    Read the records of a range of the primary keys of a table and keep the ones that satisfy the conditions. It runs in
+    a worker process.
+
+    :param engine: a closed copy of the storage engine of the server, the worker opens it
+    :param table_data: the table, as it is saved in the structure file
+    :param conditions: (<position of a column>, <operator>, <constant>) tuples
+    :return: the records, in the order of their primary keys
+    """
+    from server_side.dbmanager import scan_key_range
+    table = Table().from_dict(table_data)
+    predicate = compile_conjunction([compile_condition(position, op, (value,)) for position, op, value in conditions])
+    engine.set_up()
+    try:
+        records = scan_key_range(engine, db_name, table, key_condition)
+        if predicate is None:
+            return list(records)
+        return [record for record in records if predicate(record)]
+    finally:
+        engine.close_down()
@@ -0,0 +1,91 @@
+"""
+Compilation of the conditions of a query into functions that evaluate them on records.
+
+A condition is compiled once per query: the positions of its columns in the records are resolved, the comparison is
+looked up as a function of the operator module, and the function that evaluates it is specialized for the kinds of its
+operands, so evaluating it on a record does no more than index the record and compare. A comparison with a null value
+is never satisfied.
+
+An operand of a condition is either the position of a column in the records or a constant wrapped in a tuple.
+"""
+import operator
+from typing import Callable
+
+COMPARISON_OPERATORS: dict[str, Callable] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "=": operator.eq
+}
+
+_MIRRORED = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+# the types of the values of the columns, as they are loaded from the storage
+_VALUE_TYPES = {"int": int, "float": float, "varchar": str}
+
+
+def check_type(value, col_type: str):
+    """
+    Raise a ValueError if a constant can't be compared with the values of a column of the type.
+    """
+    if type(value) is not _VALUE_TYPES.get(col_type):
+        raise ValueError(f"Type of '{value}' differs from type '{col_type}' of the column")
+
+
+def compile_condition(left: int | tuple, op: str, right: int | tuple) -> Callable[[list], bool]:
+    """
+    The function that tells if a record satisfies "<left> <op> <right>".
+    :param left: the position of a column, or a constant wrapped in a tuple
+    :param right: the position of a column, or a constant wrapped in a tuple
+    """
+    compare = COMPARISON_OPERATORS.get(op)
+    if compare is None:
+        raise NotImplementedError(f"Invalid operator'{op}'")
+    left_is_column, right_is_column = isinstance(left, int), isinstance(right, int)
+    if left_is_column and right_is_column:
+        def satisfies(record: list) -> bool:
+            left_value, right_value = record[left], record[right]
+            return left_value is not None and right_value is not None and compare(left_value, right_value)
+    elif left_is_column or right_is_column:
+        position, constant = (left, right[0]) if left_is_column else (right, left[0])
+        if constant is None:
+            return lambda record: False
+        if not left_is_column:
+            # compare the column with the constant, from the side of the column
+            compare = COMPARISON_OPERATORS[_MIRRORED.get(op, op)]
+        if op == "=":
+            # a null is not equal to any constant, it needs no check
+            def satisfies(record: list) -> bool:
+                return record[position] == constant
+        else:
+            def satisfies(record: list) -> bool:
+                value = record[position]
+                return value is not None and compare(value, constant)
+    else:
+        # a constant condition decides for every record at once
+        result = left[0] is not None and right[0] is not None and compare(left[0], right[0])
+        return lambda record: result
+    return satisfies
+
+
+def compile_conjunction(conditions: list[Callable[[list], bool]]) -> Callable[[list], bool] | None:
+    """
+    The function that tells if a record satisfies all the compiled conditions, None if there are none.
+    """
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    if len(conditions) == 2:
+        first, second = conditions
+        return lambda record: first(record) and second(record)
+    conditions = tuple(conditions)
+
+    def satisfies(record: list) -> bool:
+        for condition in conditions:
+            if not condition(record):
+                return False
+        return True
+
+    return satisfies
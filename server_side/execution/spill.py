@@ -0,0 +1,72 @@
+"""
+Temporary files of the operators that do not fit into their memory budget.
+
+Records are written to the files in pickled batches and read back one by one, in the order they were written.
+"""
+import os
+import pickle
+import sys
+import tempfile
+from typing import Iterator
+
+_WRITE_BATCH_SIZE = 1000  # the number of records pickled together
+
+
+def record_size(record: list) -> int:
+    """
+    Estimate the memory taken by a record: the list and its values, shared values are counted every time.
+    """
+    return sys.getsizeof(record) + sum(sys.getsizeof(value) for value in record)
+
+
+def make_spill_dir(spill_dir: str | None = None) -> tempfile.TemporaryDirectory:
+    """
+    Create a temporary directory for the files of an operator, removed when it is cleaned up.
+    :param spill_dir: the directory to create it in, the system default if not given
+    """
+    if spill_dir is not None:
+        os.makedirs(spill_dir, exist_ok=True)
+    return tempfile.TemporaryDirectory(prefix="spill_", dir=spill_dir)
+
+
+class SpillWriter:
+    """
+    Writes records into a number of files, records are buffered and pickled in batches.
+    """
+
+    def __init__(self, dir_path: str, name: str, file_count: int):
+        self.__paths = [os.path.join(dir_path, f"{name}_{i}") for i in range(file_count)]
+        self.__files = [open(path, "wb") for path in self.__paths]
+        self.__buffers: list[list] = [[] for _ in range(file_count)]
+
+    def write(self, file_nr: int, record):
+        buffer = self.__buffers[file_nr]
+        buffer.append(record)
+        if len(buffer) >= _WRITE_BATCH_SIZE:
+            pickle.dump(buffer, self.__files[file_nr], pickle.HIGHEST_PROTOCOL)
+            buffer.clear()
+
+    def close(self) -> list[str]:
+        """
+        Write the buffered records and close the files.
+        :return: the paths of the files
+        """
+        for buffer, file in zip(self.__buffers, self.__files):
+            if buffer:
+                pickle.dump(buffer, file, pickle.HIGHEST_PROTOCOL)
+                buffer.clear()
+            file.close()
+        return self.__paths
+
+
+def read_records(path: str) -> Iterator:
+    """
+    Generator of the records of a file, in the order they were written.
+    """
+    with open(path, "rb") as file:
+        while True:
+            try:
+                batch = pickle.load(file)
+            except EOFError:
+                return
+            yield from batch
@@ -11,7 +11,8 @@ from server_side.interpreter.tree_objects import (
     InsertInto,
     DeleteFrom,
     ColumnDefinition,
-    Select
+    Select,
+    Analyze
 )
 from server_side.interpreter.token_objects import (
     TOptionalCommandEnd,
@@ -76,6 +77,8 @@ class Parser:
                 return self.__parse_update(token_list)
             case "delete":
                 return self.__parse_delete(token_list)
+            case "analyze":
+                return self.__parse_analyze(token_list)
             case _:
                 raise NotImplementedError(f"No implementation for '{token}''")
 
@@ -258,4 +261,15 @@ class Parser:
         tree.set_condition({str(column_name): value})
         return tree
 
-
+    def __parse_analyze(self, token_list: TokenList):
+        # Example use: analyze [table_name1, table_name2]
+        table_names = []
+        while token_list.has_next() and token_list.peek_type() == TokenType.IDENTIFIER:
+            table_name = token_list.consume_of_type(TokenType.IDENTIFIER)
+            table_names.append(str(table_name))
+            if token_list.has_next() and token_list.peek() == ",":
+                token_list.consume_concrete(",")
+        token_list.consume_group(TOptionalCommandEnd())
+        if token_list.has_next():
+            raise SyntaxError(f"Unexpected token at {token_list.peek()}")
+        return Analyze(table_names)
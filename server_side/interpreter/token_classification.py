@@ -21,7 +21,8 @@ class Literal:
         "insert",
         "select",
         "update",
-        "delete"
+        "delete",
+        "analyze"
     )
 
     KEYWORDS = (
@@ -57,8 +58,10 @@ class Literal:
         "like",
         "limit",
         "on",
+        "option",
         "min",
         "max",
+        "maxdop",
         "no",
         "not",
         "null",
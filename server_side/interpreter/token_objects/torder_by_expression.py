@@ -0,0 +1,39 @@
+from server_side.interpreter.token_list import TokenList
+from server_side.interpreter.token_objects.tobj import TObj
+
+
+class TOrderByExpression(TObj):
+    """
+    Consumes:
+        <column_reference> [ASC | DESC] [, ...n]
+    """
+    def __init__(self):
+        self.__order_by_items = []
+
+    def consume(self, token_list: TokenList):
+        from .tcolumn_reference import TColumnReference
+        while token_list.has_next():
+            col_ref = token_list.consume_group(TColumnReference()).__dict__()
+            is_descending = False
+            if token_list.check_token("asc"):
+                token_list.consume()
+            elif token_list.check_token("desc"):
+                token_list.consume()
+                is_descending = True
+            self.__order_by_items.append({"column_reference": col_ref, "is_descending": is_descending})
+            if token_list.check_token(","):
+                token_list.consume()
+            else:
+                break
+
+    def get_order_by_items(self):
+        """
+        Representation:
+            [
+                {
+                    "column_reference": <column_reference>,
+                    "is_descending": True | False
+                } [, ...n]
+            ]
+        """
+        return self.__order_by_items
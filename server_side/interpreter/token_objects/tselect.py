@@ -9,10 +9,12 @@ class TSelect(TObj):
 
     Syntax:
         <query> ::=
-            SELECT [DISTINCT] <select_list>
+            SELECT [DISTINCT] [TOP ( <number> ) | TOP <number>] <select_list>
             [FROM <table_source>]
             [WHERE <search_condition>]
             [GROUP BY <group_by_expression>]
+            [ORDER BY <order_by_expression>]
+            [OPTION ( MAXDOP <number> )]
 
     :param consume_select_keyword: Whether to consume the "SELECT" keyword or not.
     """
@@ -20,16 +22,21 @@ class TSelect(TObj):
         self.__consume_select_keyword = consume_select_keyword
 
         self.__is_distinct = False
+        self.__top = None
         self.__select_list = None
         self.__table_source = None
         self.__search_condition = None
         self.__group_by_expression = None
+        self.__order_by_expression = None
+        self.__max_degree_of_parallelism = None
 
     def consume(self, token_list: TokenList):
         from .tselect_list import TSelectList
         from .ttable_source import TTableSource
         from .tlogical_expression import TLogicalExpression
         from .tgroup_by_expression import TGroupByExpression
+        from .torder_by_expression import TOrderByExpression
+        from .tvalue import TValue
 
         if self.__consume_select_keyword:
             token_list.consume_concrete("select")
@@ -37,6 +44,17 @@ class TSelect(TObj):
         if token_list.check_token("distinct"):
             token_list.consume()
             self.__is_distinct = True
+
+        if token_list.check_token("top"):
+            token_list.consume()
+            has_parentheses = token_list.check_token("(")
+            if has_parentheses:
+                token_list.consume()
+            self.__top = token_list.consume_group(TValue()).get_value()
+            if not isinstance(self.__top, int) or self.__top < 0:
+                raise SyntaxError("TOP must be a non-negative number")
+            if has_parentheses:
+                token_list.consume_concrete(")")
         self.__select_list = token_list.consume_group(TSelectList())
 
         if token_list.check_token("from"):
@@ -52,15 +70,32 @@ class TSelect(TObj):
             token_list.consume_concrete("by")
             self.__group_by_expression = token_list.consume_group(TGroupByExpression()).get_column_references()
 
+        if token_list.check_token("order"):
+            token_list.consume_concrete("order")
+            token_list.consume_concrete("by")
+            self.__order_by_expression = token_list.consume_group(TOrderByExpression()).get_order_by_items()
+
+        if token_list.check_token("option"):
+            token_list.consume_concrete("option")
+            token_list.consume_concrete("(")
+            token_list.consume_concrete("maxdop")
+            self.__max_degree_of_parallelism = token_list.consume_group(TValue()).get_value()
+            if not isinstance(self.__max_degree_of_parallelism, int) or self.__max_degree_of_parallelism < 0:
+                raise SyntaxError("MAXDOP must be a non-negative number")
+            token_list.consume_concrete(")")
+
     def __dict__(self):
         """
         Representation:
             {
                 "is_distinct": True | False,
+                ["top": <number> [,] ]
                 "select_list": <select_list> [,]
                 ["table_source": <table_source> [,] ]
                 ["search_condition": <search_condition> [,] ]
                 ["group_by_expression": <group_by_expression> [,] ]
+                ["order_by_expression": <order_by_expression> [,] ]
+                ["max_degree_of_parallelism": <number> ]
             }
         """
 
@@ -71,10 +106,16 @@ class TSelect(TObj):
         }
 
         # optional arguments
+        if self.__top is not None:
+            d["top"] = self.__top
         if self.__table_source:
             d["table_source"] = self.__table_source.__dict__()
         if self.__search_condition:
             d["search_condition"] = self.__search_condition.__dict__()
         if self.__group_by_expression:
             d["group_by_expression"] = self.__group_by_expression
+        if self.__order_by_expression:
+            d["order_by_expression"] = self.__order_by_expression
+        if self.__max_degree_of_parallelism is not None:
+            d["max_degree_of_parallelism"] = self.__max_degree_of_parallelism
         return d
@@ -11,3 +11,4 @@ from .drop_index import DropIndex
 from .insert_into import InsertInto
 from .delete_from import DeleteFrom
 from .select import Select
+from .analyze import Analyze
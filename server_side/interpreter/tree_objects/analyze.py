@@ -0,0 +1,32 @@
+from server_side.interpreter.tree_objects.executable_tree import ExecutableTree
+
+
+class Analyze(ExecutableTree):
+    """
+    An ExecutableTree subclass that represents an ANALYZE statement.
+    Computes the statistics of the given tables, or of all the tables of the working database if none is given.
+
+    Syntax:
+        ANALYZE [ table_name [ ,...n ] ] [;]
+    """
+    def __init__(self, table_names: list[str]):
+        super().__init__()
+        self.__table_names = table_names
+
+    def _execute(self, dbm):
+        db = dbm.get_working_db()
+        table_names = self.__table_names if self.__table_names else [tb.get_name() for tb in db.get_tables()]
+        for table_name in table_names:
+            dbm.analyze_table(db.get_name(), table_name)
+        resp_message = f"Table(s) [{', '.join(table_names)}] analyzed successfully."
+        self.get_result().set_response_message(resp_message)
+        print(resp_message)
+
+    def validate(self, dbm, **kwargs):
+        db = dbm.get_working_db()
+        for table_name in self.__table_names:
+            if db.get_table(table_name) is None:
+                raise ValueError(f"Table '{table_name}' does not exist")
+
+    def get_table_names(self) -> list[str]:
+        return self.__table_names
@@ -1,4 +1,5 @@
 from server_side.interpreter.tree_objects.executable_tree import ExecutableTree
+from server_side.database_objects import key_codec
 
 
 class DeleteFrom(ExecutableTree):
@@ -20,7 +21,7 @@ class DeleteFrom(ExecutableTree):
         db = dbm.get_working_db()
         table = db.get_tables()[table_idx]
         pr = table.get_primary_key()
-        key = self.__make_key(pr.get_column_names(), self.__condition)
+        key = self.__make_key(table, pr.get_column_names(), self.__condition)
         del_count = dbm.delete(db, table, key)
         self.get_result().set_nr_rows_affected(del_count)
 
@@ -65,15 +66,13 @@ class DeleteFrom(ExecutableTree):
     def get_condition(self) -> dict:
         return self.__condition
 
-    def __make_key(self, primary_key_columns: list[str], condition: dict) -> str:
+    def __make_key(self, table, primary_key_columns: list[str], condition: dict) -> str:
         """
-        Concatenates the values of the primary key columns in the condition to make a key.
-        Separator character is "#".
+        Encodes the values of the primary key columns in the condition into a key, with the order-preserving key
+        encoding.
         """
-        key = ""
-        for col in primary_key_columns:
-            key += condition[col] + "#"
-        return key[:-1]  # leave out the last separator character
+        values = [condition[col] for col in primary_key_columns]
+        return key_codec.encode_key(values, table.get_column_types(primary_key_columns))
 
     def __validate_foreign_keys(self, dbm):
         """
@@ -20,7 +20,7 @@ class InsertInto(ExecutableTree):
         self.__rest_of_column_names: list[str] = []
 
         # - a list of identity values that are to be inserted
-        # - the list is built up during validation and utilized in execution
+        # - the values of all records are reserved at once during validation and utilized in execution
         # - once the identity value has been incremented it will not ever take on a lower value, even if the validation
         # fails
         # - this can result in gaps between successfully inserted values (e.g.: 1, 2, 4, 5, ...)
@@ -59,8 +59,8 @@ class InsertInto(ExecutableTree):
             # column names are specified, validate them
             self.__validate_column_names(existing_column_names, self.__identity_column_name)
         else:
-            # column names are not specified, use the existing column names
-            self.__column_names = existing_column_names
+            # column names are not specified, use the existing column names (a copy, the list of the table is shared)
+            self.__column_names = list(existing_column_names)
 
         # remove identity column name from the column names that will be inserted into
         if self.__identity_column_name in self.__column_names:
@@ -111,12 +111,19 @@ class InsertInto(ExecutableTree):
         columns = [table.get_column(col_name) for col_name in self.__column_names]
         rest_of_columns = [table.get_column(col_name) for col_name in self.__rest_of_column_names]
 
-        check_column_names = [chk.get_column_name() for chk in table.get_checks()]
+        # [key=<column name>, value=<position of its first check constraint>]
+        check_indexes: dict[str, int] = {}
+        for chk_index, chk in enumerate(table.get_checks()):
+            check_indexes.setdefault(chk.get_column_name(), chk_index)
 
         for rest_col in rest_of_columns:
             if not rest_col.get_allow_nulls():
                 raise ValueError(f"Column [{rest_col.get_name()}] does not allow NULL values, it must be specified.")
 
+        # reserve the identity values of all records at once
+        if identity_column:
+            self.__identity_values = dbm.reserve_identity_values(db.get_name(), table.get_name(), len(self.__values))
+
         required_nr_values = len(self.__column_names)
         for record_idx, record in enumerate(self.__values):
             if len(record) != required_nr_values:
@@ -129,18 +136,10 @@ class InsertInto(ExecutableTree):
                     raise ValueError(
                         f"Value [{to_insert}] does not match the type of column [{col_name}].")
                 # if column has check constraint, validate it
-                chk_index = None
-                try:
-                    chk_index = check_column_names.index(col_name)
-                except ValueError:
-                    pass
+                chk_index = check_indexes.get(col_name)
                 if chk_index is not None:
                     self.__validate_check_constraint(table, col_name, chk_index, self.__cast_value(to_insert, columns[i]))
 
-            # get identity value, and append to list
-            if identity_column:
-                self.__identity_values.append(dbm.get_next_identity_value(db.get_name(), table.get_name()))
-
             self.__validate_integrity(dbm, db, table, record, record_idx, identity_column)
 
     def __validate_check_constraint(self, table, col_name: str, check_index: int, to_insert):
@@ -191,7 +190,7 @@ class InsertInto(ExecutableTree):
                 return
 
         # if an entry with the same primary key exists in the table, raise an error
-        pk_col_values, pk_col_positions = self.__get_column_values(pk_col_names, record, identity_column)
+        pk_col_values, pk_col_positions = self.__get_column_values(pk_col_names, record, record_idx, identity_column)
         if self.__exists_key(pk_col_values, pk_col_positions, record_idx):
             raise ValueError(
                 f"Primary key [{pk_col_values}] already exists in one of the previous values being inserted."
@@ -206,7 +205,7 @@ class InsertInto(ExecutableTree):
         # if an entry with the same unique key exists in the table, raise an error
         for uq in table.get_unique_keys():
             col_names = uq.get_column_names()
-            col_values, col_positions = self.__get_column_values(col_names, record, identity_column)
+            col_values, col_positions = self.__get_column_values(col_names, record, record_idx, identity_column)
             if self.__exists_key(col_values, col_positions, record_idx):
                 raise ValueError(
                     f"Unique key [{col_values}] already exists in one of the previous values being inserted."
@@ -221,7 +220,8 @@ class InsertInto(ExecutableTree):
         # upon inserting into a child table, if the inserted key does not exist in the parent table, raise an error
         for fk in table.get_foreign_keys():
             to_insert_col_names = fk.get_source_column_names()
-            to_insert_col_values, _ = self.__get_column_values(to_insert_col_names, record, identity_column)
+            to_insert_col_values, _ = self.__get_column_values(to_insert_col_names, record, record_idx,
+                                                                   identity_column)
             ref_table_name = fk.get_referenced_table_name()
             ref_col_names = fk.get_referenced_column_names()
 
@@ -241,7 +241,7 @@ class InsertInto(ExecutableTree):
                      f"referenced table [{ref_table_name}].")
                 )
 
-    def __get_column_values(self, column_names, record, identity_column=None) -> tuple:
+    def __get_column_values(self, column_names, record, record_idx, identity_column=None) -> tuple:
         """
         Get the positions and values of the columns specified in the column_names list from the record.
         """
@@ -253,8 +253,8 @@ class InsertInto(ExecutableTree):
                 col_positions.append(i)
             elif identity_column:
                 if self.__column_names[i] == identity_column.get_name():
-                    # the identity value corresponding to this record was queried and saved in the main validate method
-                    col_values.append(self.__identity_values[-1])
+                    # the identity value corresponding to this record was reserved in the main validate method
+                    col_values.append(self.__identity_values[record_idx])
                     col_positions.append(i)
         return col_values, col_positions
 
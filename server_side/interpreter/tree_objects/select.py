@@ -1,20 +1,24 @@
 from server_side.interpreter.tree_objects.executable_tree import ExecutableTree
-from server_side.interpreter import datatypes
 from datetime import datetime
 
 
 class Select(ExecutableTree):
     """
     Syntax:
-        SELECT [DISTINCT] <select_list>
+        SELECT [DISTINCT] [TOP ( <number> )] <select_list>
         [FROM <table_source>]
         [WHERE <search_condition>]
         [GROUP BY <group_by_expression>]
+        [ORDER BY <column_reference> [ASC | DESC] [, ...n]]
+        [OPTION ( MAXDOP <number> )]
 
     Arguments (implementation details; see TObj subclasses for more syntax specification, e.g.: TSelectList)
         DISTINCT
             Specifies that only unique rows can appear in the result set. Null values are considered equal for the
             purposes of the DISTINCT keyword.
+        TOP ( <number> )
+            Limits the rows of the result set to the first <number> rows, in the order of the ORDER BY clause if it is
+            given. The parentheses can be left out. The rows after them are not read.
         <select_list>
             The columns to be selected for the result set. The select list is a series of expressions separated by
             commas.
@@ -69,6 +73,14 @@ class Select(ExecutableTree):
             columns and comparison operators are frequently used.
 
             When the condition specifies columns, the columns don't have to have the same name.
+        ORDER BY <column_reference> [ASC | DESC]
+            Specifies the order of the rows of the result set, by the columns one after the other. A column of the
+            select list can be referenced by its alias. The rows of a grouped query, and the rows of a SELECT DISTINCT,
+            can only be sorted by the columns of the select list. Null values are lower than all the other values.
+        MAXDOP <number>
+            Overrides the max degree of parallelism of the server for the query: the number of worker processes that
+            read and aggregate the rows of a large table at the same time. 0 stands for the number of processors, 1
+            turns the parallel evaluation off.
 
     References:
         https://learn.microsoft.com/en-us/sql/t-sql/queries/select-transact-sql?view=sql-server-ver16
@@ -83,9 +95,12 @@ class Select(ExecutableTree):
         super().__init__()
         self.__select_parsed = select_parsed.__dict__()
 
-        # the result set's header and values: represents the current state of this command's result set
+        # the result set's header, and the root of the tree of physical operators that produces its values: represents
+        # the current state of this command's result set; every stage puts its operator on top of the tree, the rows are
+        # pulled through the whole tree at once at the end
+        from server_side.execution.operators import Operator
         self.__result_header: list[str] = []
-        self.__result_values: list[list] = []
+        self.__result_operator: Operator | None = None
 
         # hold all table aliases in one place [key=<alias>, value=<table_name>]
         self.__table_aliases: dict = {}
@@ -93,8 +108,19 @@ class Select(ExecutableTree):
         # hold all table structures in one place [key=<table_name>, value=<table_dbo>]
         self.__tables: dict = {}
 
-        # store in a dict (<primary_key>, list[ (<column_reference>, <value>), ... ]) pairs
-        self.__queried_values: dict = {}
+        # the tables of a joined table source in the order of the FROM clause, under their aliases (a table can appear
+        # more than once): list[(<alias or table_name>, <table_dbo>)]
+        self.__join_relations: list[tuple] = []
+        # the (<alias or table_name>, <column_name>) pairs of the values in the joined records
+        self.__join_layout: list[tuple[str, str]] = []
+
+        # how the rows of a single table source are read: the access path, the statistics of the table, and the
+        # search condition as (<position of the column>, <operator>, <constant>) tuples
+        from server_side.execution.access_path import AccessPath
+        from server_side.database_objects import TableStatistics
+        self.__access_path: AccessPath | None = None
+        self.__table_statistics: TableStatistics | None = None
+        self.__scan_conditions: list[tuple[int, str, object]] = []
 
         # save the DbManager and the working db to simplify code
         from server_side.dbmanager import DbManager
@@ -111,11 +137,14 @@ class Select(ExecutableTree):
         self.__process_from(dbm)
         self.__process_where(dbm)
         self.__process_group_by()
+        self.__process_order_by()
         self.__process_select_list()
         self.__process_distinct()
+        self.__process_top()
 
-        # set the result set tuple for the client to receive
-        self.get_result().set_result_set((self.__result_header, self.__result_values))
+        # set the result set tuple for the client to receive, the rows are read from the storage here
+        result_values = list(self.__result_operator) if self.__result_operator is not None else []
+        self.get_result().set_result_set((self.__result_header, result_values))
 
     def validate(self, dbm, **kwargs):
         self.__setup(dbm)
@@ -151,6 +180,10 @@ class Select(ExecutableTree):
                 if tb is None:
                     raise ValueError(f"Table '{table_name}' not found in database")
                 self.__tables[table_name] = tb
+                relation_name = table_alias if table_alias else table_name
+                if any(name == relation_name for name, _ in self.__join_relations):
+                    raise ValueError(f"The name '{relation_name}' is used more than once in the FROM clause")
+                self.__join_relations.append((relation_name, tb))
             case "joined":
                 left: dict = table_source.get("left_table")
                 right: dict = table_source.get("right_table")
@@ -161,16 +194,13 @@ class Select(ExecutableTree):
 
     def __process_where(self, dbm):
         """
-        Performs filtering on the tables according to the search condition by creating a result set for each expression
-        containing indexed columns, then intersecting them, and filtering the obtained result set with the remaining
-        expressions which do not contain indexed columns.
-        If none of the expressions contain indexed columns, then iterate through the entire table.
+        Performs filtering on the tables according to the search condition.
+        If WHERE is not specified, all the rows of the table source are loaded.
 
         ! Current implementation:
          - only considers logical expressions that contain a column reference on one side and a value on the other side
-         - only works with single column indexes (no composite indexes)
 
-        Sets the attributes '__result_header' and '__result_values' only if WHERE is not specified.
+        Sets the attributes '__result_header' and '__result_operator'.
         """
         # is FROM specified
         table_source_type = self.__get_table_source_type()
@@ -181,68 +211,14 @@ class Select(ExecutableTree):
         search_condition = self.__select_parsed.get("search_condition")
         if search_condition is None:
             # no filtering is done => load all data
-            self.__load_all_values(dbm)
-            return
-
-        indexed_conditions, not_indexed_conditions = self.__split_indexed_not_indexed(search_condition)
+            search_condition = []
 
         match table_source_type:
             case "database":
-                pk_key_set = None  # this is a set that contains pk values that make a set of unique values
-                if indexed_conditions:
-                    # only ONE table is involved
-                    # - go through each indexed condition and create a set of PKs and intersect it with the previous one
-                    # - store in a dict (<primary_key>, list[ (<column_reference>, <value>), ... ]) pairs
-                    # TODO group op cond_val - range query
-                    for ic in indexed_conditions:
-                        col_ref, col_name, table_name, op, cond_val = self.__parse_dict_expression(ic)
-                        result: list[tuple] | None = self.__dbm.query_index_collection(self.__db.get_name(), table_name,
-                                                                                       col_name, op, cond_val)
-                        if result is None:
-                            # TODO all set is empty, shouldn't continue
-                            self.__queried_values = {}
-                            self.__result_header = self.__tables[table_name].get_column_names()
-                            self.__result_values = []
-                            return
-                        else:
-                            pk_set = set()
-                            for kv_pair in result:
-                                pk_list = kv_pair[1]
-                                val = kv_pair[0]
-                                pk_set.update(pk_list)
-
-                                for pk_key in pk_list:
-                                    val_tp_list: list = self.__queried_values.get(pk_key, None)
-                                    tupp = ({"table": table_name, "column": col_name}, val)
-                                    if val_tp_list is None:
-                                        self.__queried_values[pk_key] = [tupp]
-                                    else:
-                                        self.__queried_values[pk_key].append(tupp)
-
-                        if pk_key_set is not None:
-                            pk_key_set = pk_key_set.intersection(pk_set)
-                        else:
-                            pk_key_set = pk_set
-                    new_queried_values = {}
-                    for qvk in self.__queried_values.keys():
-                        if qvk in pk_key_set:
-                            new_queried_values[qvk] = self.__queried_values[qvk]  # filter out the non-intersecting keys
-                    self.__queried_values = new_queried_values
-                if not_indexed_conditions:
-                    table_name = self.__get_table_source_name()
-                    if pk_key_set is None:
-                        # no indexed conditions => iterate through the entire table
-                        results: list[list] = self.__dbm.find_all(self.__db.get_name(), table_name)
-                    else:
-                        results = self.__dbm.find_by_primary_keys(self.__db.get_name(), table_name, list(pk_key_set))
-                    column_names = self.__tables[table_name].get_column_names()
-                    self.__result_header = column_names
-                    for res in results:
-                        if self.__satisfies_conditions(res, not_indexed_conditions, column_names):
-                            self.__result_values.append(res)
-                    self.__queried_values = {}
+                self.__load_table_values(dbm, search_condition)
             case "joined":
-                raise NotImplementedError("Table joins are not supported yet")
+                # the search condition is pushed down into the joins
+                self.__load_joined_values(dbm, search_condition)
             case "derived":
                 raise NotImplementedError("Derived tables are not supported yet")
 
@@ -251,104 +227,197 @@ class Select(ExecutableTree):
         Search through every given table's columns find the table corresponding to the given column name.
         :return: database object of type Table
         """
-        for table in list(self.__tables.values()):
+        for table in self.__tables.values():
             if table.has_index_with(column_name):
                 return table
-            if column_name in table.get_column_names():
+            if table.exists_column(column_name):
                 return table
         raise ValueError(f"Table with column '{column_name}' not found")
 
-    def __load_all_values(self, dbm):
+    def __load_table_values(self, dbm, search_condition: list[dict]):
         """
-        Sets the attribute '__result_header' and '__result_values' by loading all values from the table source.
+        Read the rows of a single table that fulfill the search condition.
+
+        The expressions whose columns start the primary key or an index, and that keep the fewest rows by the
+        statistics of the table, drive the scan: only the rows in their range of keys are read. If the index holds every
+        column the query reads, the rows are built from the index entries alone and the table is not read. Every
+        expression is evaluated on the rows that are read. If no key range is selective enough, the entire table is
+        read.
+
+        If the statistics of the table tell that the scan reads at least PARALLEL_MIN_ROWS rows of a range of the
+        primary key, the range is split into parts that worker processes read and filter at the same time.
+
+        Sets the attributes '__result_header' and '__result_operator'.
         """
-        table_source_type = self.__get_table_source_type()
-        if table_source_type is None:
-            # table source not given
+        from server_side.execution import parallel
+        from server_side.execution.access_path import choose_access_path
+        from server_side.execution.operators import Scan, IndexScan, Filter, ParallelScan
+        from server_side.execution.predicates import compile_condition, compile_conjunction
+        table = self.__tables[self.__get_table_source_name()]
+        db_name = self.__db.get_name()
+        column_names = self.__get_referenced_column_names()
+        self.__result_header = list(table.get_column_names())
+        order = self.__get_scan_order()
+        if not search_condition and column_names is None and order is None:
+            # every column of every row is needed
+            self.__result_operator = Scan(dbm, db_name, table.get_name())
             return
-        match table_source_type:
-            case "database":
-                # load all data in the table directly from the database
-                table = self.__tables[self.__get_table_source_name()]
-                self.__result_header = table.get_column_names()
-                self.__result_values = dbm.find_all(dbm.get_working_db().get_name(), table.get_name())
-            case "joined":
-                right_table_source: dict = self.__select_parsed.get("table_source").get("right_table")
-                if right_table_source.get("table_type") != "database":
-                    raise RecursionError("Wrongly implemented JOIN, right table must be a database table")
-
-                left_table_source: dict = self.__select_parsed.get("table_source").get("left_table")
-                if left_table_source.get("table_type") != "database":
-                    raise NotImplementedError("Left table must be a database table in the current implementation")
-
-                condition: dict = self.__select_parsed["table_source"]["join_condition"][0]
-                left_table_name = left_table_source.get("table_name")
-                right_table_name = right_table_source.get("table_name")
-                left_table = self.__tables[left_table_name]
-                right_table = self.__tables[right_table_name]
-                left_side = condition.get("left")
-                right_side = condition.get("right")
-                op = condition.get("op")
-                if self.__get_table_name_by_alias(left_side.get("table")) == left_table_name:
-                    left_table_column_name = left_side.get("column")
-                    right_table_column_name = right_side.get("column")
-                else:
-                    left_table_column_name = right_side.get("column")
-                    right_table_column_name = left_side.get("column")
-                self.__result_header = left_table.get_column_names() + right_table.get_column_names()
-                self.__result_values = dbm.join_tables(dbm.get_working_db_index(),
-                                                       left_table,
-                                                       right_table,
-                                                       op,
-                                                       left_table_column_name,
-                                                       right_table_column_name)
-
-                # raise NotImplementedError("Table joins are not supported yet")
-            case "derived":
-                raise NotImplementedError("Derived tables are not supported yet")
+        conditions = []
+        for expression in search_condition:
+            _, col_name, _, op, cond_val = self.__parse_dict_expression(expression)
+            conditions.append((col_name, op, cond_val))
+        self.__table_statistics = dbm.get_table_statistics(db_name, table.get_name())
+        self.__access_path = choose_access_path(table, conditions, dbm.count_records(db_name, table.get_name()),
+                                                self.__table_statistics, column_names, order)
+        self.__scan_conditions = self.__resolve_search_condition(search_condition, table)
+        degree = parallel.degree_of_parallelism(self.__select_parsed.get("max_degree_of_parallelism"))
+        if search_condition and self.__is_parallel_scan(degree):
+            # the rows come in the order of the primary key, as from a serial scan
+            self.__result_operator = ParallelScan(dbm, db_name, table, self.__access_path.get_key_condition(),
+                                                  self.__scan_conditions, degree, ordered=True)
+            return
+        self.__result_operator = IndexScan(dbm, db_name, table.get_name(), self.__access_path)
+        if search_condition:
+            self.__result_operator = Filter(self.__result_operator, compile_conjunction(
+                [compile_condition(position, op, (value,)) for position, op, value in self.__scan_conditions]))
 
-    def __split_indexed_not_indexed(self, search_condition: list) -> tuple[list, list]:
+    def __get_referenced_column_names(self) -> set[str] | None:
         """
-        Split a list of expressions into two lists: one that contains only indexed columns and one that contains not
-        indexed columns.
+        The names of the columns the query reads in the select list, the search condition, the GROUP BY and the ORDER BY
+        clauses.
+        None if it reads all of them.
         """
-        indexed: list[dict] = []
-        not_indexed: list[dict] = []
-        for expression in search_condition:
-            # determine if the column has index
-            is_indexed = False
-            left = expression.get("left")
-            col_name = left.get("column")
-            table_name = left.get("table")  # can be None
-            table_name = self.__get_table_name_by_alias(table_name)  # resolve alias
-            if table_name:
-                # table name is given => search through the table's indexes list
-                if self.__tables[table_name].has_index_with(col_name):
-                    is_indexed = True
-            else:
-                # table name not given => search through every given table's indexes list
-                for table in list(self.__tables.values()):
-                    if table.has_index_with(col_name):
-                        is_indexed = True
-                        break
-            if is_indexed:
-                indexed.append(expression)
-            else:
-                not_indexed.append(expression)
-        return indexed, not_indexed
+        column_names = set()
+        for projection in self.__select_parsed.get("select_list"):
+            match projection.get("type"):
+                case "*":
+                    return None
+                case "column":
+                    column_names.add(projection.get("column_reference").get("column"))
+                case "expression":
+                    value = projection.get("value")
+                    if value.get("type") == "function" and value.get("value").get("type") == "aggregate":
+                        col_ref = value.get("value").get("function").get("column_reference")
+                        if isinstance(col_ref, dict):  # COUNT(*) reads no column
+                            column_names.add(col_ref.get("column"))
+                    elif value.get("type") != "constant" and value.get("type") != "function":
+                        return None
+        for expression in self.__select_parsed.get("search_condition") or []:
+            column_names.add(expression.get("left").get("column"))
+        for col_ref in self.__select_parsed.get("group_by_expression") or []:
+            column_names.add(col_ref.get("column"))
+        for item in self.__select_parsed.get("order_by_expression") or []:
+            column_names.add(self.__resolve_column_alias(item.get("column_reference")).get("column"))
+        return column_names
+
+    def __load_joined_values(self, dbm, search_condition: list[dict]):
+        """
+        Join the tables of the FROM clause and filter the joined records by the search condition.
+
+        The conditions of the ON clauses and the search condition are handed to the join planner together: the
+        conditions on a single table are evaluated while that table is read, the equalities between the columns of two
+        tables drive the joins. The planner chooses the join order and the join methods by the estimated costs.
+
+        Sets the attributes '__result_header' and '__result_operator', the columns are ordered by table as the tables
+        are written in the FROM clause.
+        """
+        from server_side.execution import join_planner
+        from server_side.execution.operators import Project
+        table_source = self.__select_parsed.get("table_source")
+        expressions = self.__collect_join_conditions(table_source) + list(search_condition)
+        predicates = [(self.__resolve_join_operand(expression.get("left")),
+                       expression.get("op"),
+                       self.__resolve_join_operand(expression.get("right"))) for expression in expressions]
+        self.__check_predicate_types(predicates)
+        db_name = dbm.get_working_db().get_name()
+        relations = [join_planner.Relation(name, table, dbm.count_records(db_name, table.get_name()),
+                                           dbm.get_table_statistics(db_name, table.get_name()))
+                     for name, table in self.__join_relations]
+        plan = join_planner.plan_joins(relations, predicates)
+        operator = join_planner.build_operator(plan, dbm, db_name)
+
+        self.__join_layout = [(name, col_name) for name, table in self.__join_relations
+                              for col_name in table.get_column_names()]
+        plan_layout = plan.get_layout()
+        positions = [plan_layout.index(column) for column in self.__join_layout]
+        self.__result_header = [col_name for _, col_name in self.__join_layout]
+        if positions != list(range(len(plan_layout))):
+            operator = Project(operator, positions)
+        self.__result_operator = operator
+
+    def __check_predicate_types(self, predicates: list[tuple]):
+        """
+        Raise a ValueError if a predicate compares values of different types. The predicates are compiled without
+        checks, the types are checked only once here.
+        """
+        from server_side.execution.predicates import check_type
+        relations = dict(self.__join_relations)
+        for left, _, right in predicates:
+            types = [relations[operand[1]].get_column(operand[2]).get_type() for operand in (left, right)
+                     if operand[0] == "column"]
+            constants = [operand[1] for operand in (left, right) if operand[0] == "constant"]
+            if len(types) == 2 and types[0] != types[1]:
+                raise ValueError(f"Type '{types[0]}' differs from type '{types[1]}'")
+            if len(types) == 1:
+                check_type(constants[0], types[0])
+            if len(constants) == 2 and type(constants[0]) is not type(constants[1]):
+                raise ValueError(f"Type of '{constants[0]}' differs from type of '{constants[1]}'")
+
+    def __collect_join_conditions(self, table_source: dict) -> list[dict]:
+        """
+        The expressions of the ON clauses of a joined table source and of the table sources inside it.
+        """
+        if table_source.get("table_type") != "joined":
+            return []
+        return (self.__collect_join_conditions(table_source.get("left_table")) +
+                self.__collect_join_conditions(table_source.get("right_table")) +
+                list(table_source.get("join_condition")))
+
+    def __resolve_join_operand(self, operand) -> tuple:
+        """
+        Turn a side of a condition into an operand of the join planner: a column reference is resolved to the table
+        it belongs to, anything else is a constant.
+        """
+        if isinstance(operand, dict):
+            relation_name, col_name = self.__resolve_join_column(operand)
+            return "column", relation_name, col_name
+        return "constant", operand
+
+    def __resolve_join_column(self, col_ref: dict) -> tuple[str, str]:
+        """
+        Find the table of the FROM clause that a column reference belongs to, by its alias or name if it is given.
+        :return: the (<alias or table_name>, <column_name>) pair of the column
+        """
+        col_name = col_ref.get("column")
+        qualifier = col_ref.get("table")
+        if qualifier is not None:
+            candidates = [(name, table) for name, table in self.__join_relations if name == qualifier]
+            if not candidates:
+                candidates = [(name, table) for name, table in self.__join_relations if table.get_name() == qualifier]
+            if not candidates:
+                raise ValueError(f"Table '{qualifier}' not found in the FROM clause")
+        else:
+            candidates = self.__join_relations
+        candidates = [(name, table) for name, table in candidates if table.exists_column(col_name)]
+        if not candidates:
+            raise ValueError(f"Column '{col_name}' not found")
+        if len(candidates) > 1:
+            raise ValueError(f"Ambiguous column reference: {col_name}")
+        return candidates[0][0], col_name
 
     def __process_select_list(self):
         """
-        Updates the attributes '__result_header' and '__result_values'.
+        Updates the attributes '__result_header' and '__result_operator'.
         """
-        if self.__has_group_by():
-            # result_values and result_header are already set in the handling of the GROUP BY clause
+        if self.__is_aggregate_query() and self.__get_table_source_type() is not None:
+            # result_operator and result_header are already set in the handling of the GROUP BY clause
             return
         table_source_type = self.__get_table_source_type()
         if table_source_type is None:
             self.__select_list_no_table_source()
             return
         if table_source_type == "joined":
+            self.__select_list_joined_table_source()
             return
         self.__select_list_database_table_source()
 
@@ -356,9 +425,9 @@ class Select(ExecutableTree):
         """
         Special case when there is no table source given.
         """
+        from server_side.execution.operators import Values
         select_list = self.__select_parsed.get("select_list")
         self.__result_header = []
-        self.__result_values = []
         record = []
         for projection in select_list:
             # only expressions can appear here
@@ -368,64 +437,42 @@ class Select(ExecutableTree):
                 self.__result_header.append(alias)
             else:
                 self.__result_header.append("")
-        self.__result_values.append(record)
+        self.__result_operator = Values([record])
 
-    def __select_list_database_table_source(self):
+    def __select_list_joined_table_source(self):
         """
+        Project the joined records onto the select list.
         ! Current version:
             - only works for column references and '*'
         """
+        from server_side.execution.operators import Project
         select_list = self.__select_parsed.get("select_list")
-        if self.__queried_values:
-            self.__select_list_database_table_source_with_queried_values(select_list)
-        else:
-            self.__select_list_database_table_source_no_queried_values(select_list)
-
-    def __select_list_database_table_source_with_queried_values(self, select_list):
-        # get only the first value, because all of them contain the same column references
-        query_value: list[tuple] = list(self.__queried_values.values())[0]
-        query_col_refs: list[dict] = [val[0] for val in query_value]
-
-        # check if the select list contains only column references
-        query_keys: list = list(self.__queried_values.keys())
-        if self.__projection_matches_queried_col_refs(select_list, query_col_refs):
-            # use query values
-            self.__result_values = [[None for _ in range(len(select_list))] for _ in range(len(query_keys))]  # it has the number of rows as query keys
-            for projection in select_list:
-                match projection.get("type"):
-                    case "*":
-                        positions = self.__get_positions_by_col_refs_select_star(query_col_refs)
-                        for i, key in enumerate(query_keys):
-                            for j, tupp in enumerate(self.__queried_values[key]):
-                                self.__result_values[i][positions[j]] = tupp[1]
-                        self.__result_header = [col_ref.get("column") for col_ref in self.__build_all_col_refs()]
-                    case "column":
-                        # TODO might polish in the future
-                        self.__result_values = self.__dbm.find_by_primary_keys(self.__db.get_name(), self.__get_table_source_name(), query_keys)
-                        self.__select_list_database_table_source_no_queried_values(select_list)
-        else:
-            # load all values
-            self.__result_values = self.__dbm.find_by_primary_keys(self.__db.get_name(), self.__get_table_source_name(), query_keys)
-            self.__select_list_database_table_source_no_queried_values(select_list)
-
-
-    def __get_positions_by_col_refs_select_star(self, col_refs: list[dict]) -> list[int]:
-        all_col_refs = self.__build_all_col_refs()
         positions = []
-        for col_ref in col_refs:
-            col_name = col_ref.get("column")
-            table_name = col_ref.get("table")
-            if table_name is None:
-                table_name = self.__find_table_by_column(col_name).get_name()
-            else:
-                table_name = self.__get_table_name_by_alias(table_name)
-            for i, ref in enumerate(all_col_refs):
-                if ref["column"] == col_name and ref["table"] == table_name:
-                    positions.append(i)
-                    break
-        return positions
+        result_header = []
+        for projection in select_list:
+            match projection.get("type"):
+                case "*":
+                    positions.extend(range(len(self.__join_layout)))
+                    result_header.extend(col_name for _, col_name in self.__join_layout)
+                case "column":
+                    col_ref = projection.get("column_reference")
+                    positions.append(self.__join_layout.index(self.__resolve_join_column(col_ref)))
+                    result_header.append(projection.get("alias", col_ref.get("column")))
+                case "expression":
+                    raise NotImplementedError("Expressions in SELECT clause are not supported yet")
+        if positions == list(range(len(self.__join_layout))):
+            # every column in its place, the records are kept as they are
+            return
+        self.__result_operator = Project(self.__result_operator, positions)
+        self.__result_header = result_header
 
-    def __select_list_database_table_source_no_queried_values(self, select_list):
+    def __select_list_database_table_source(self):
+        """
+        ! Current version:
+            - only works for column references and '*'
+        """
+        from server_side.execution.operators import Project
+        select_list = self.__select_parsed.get("select_list")
         all_col_refs = self.__build_all_col_refs()
         proj_positions_in_all = []
         result_header = [] # temporary result header, only used when there is a column reference
@@ -455,7 +502,7 @@ class Select(ExecutableTree):
                     result_header.append(projection.get("alias", proj_col_ref_col_name))
                 case "expression":
                     raise NotImplementedError("Expressions in SELECT clause are not supported yet")
-        self.__result_values = [[res[pos] for pos in proj_positions_in_all] for res in self.__result_values]
+        self.__result_operator = Project(self.__result_operator, proj_positions_in_all)
         self.__result_header = result_header
 
     def __build_all_col_refs(self) -> list[dict]:
@@ -533,15 +580,193 @@ class Select(ExecutableTree):
             return table_source.get("table_name")
         return None
 
-    def __has_group_by(self):
-        return self.__select_parsed.get("group_by_expression") is not None
-
     def __process_distinct(self):
         """
         Filter duplicates in the result values.
+
+        The rows of a single table are unique if the select list holds the columns of the primary key, nothing has to
+        be done. If the rows are read in the order of a key that starts with the selected columns, the duplicates
+        follow each other and each row is only compared with the one before it. Otherwise, the rows are put into a
+        hash set that is partitioned to the disk if it grows over DISTINCT_MEMORY_BUDGET.
+
+        Updates the attribute '__result_operator'.
+        """
+        from server_side.execution.operators import Distinct
+        if not self.__select_parsed.get("is_distinct"):
+            return
+        if self.__has_unique_rows():
+            return
+        if self.__select_parsed.get("order_by_expression") and self.__get_table_source_type() is not None:
+            # sorted by every selected column in the handling of the ORDER BY clause
+            grouped = True
+        else:
+            distinct_column_names = self.__get_distinct_column_names()
+            grouped = (distinct_column_names is not None and self.__access_path is not None and
+                       self.__access_path.gives_order(distinct_column_names))
+        self.__result_operator = Distinct(self.__result_operator, grouped)
+
+    def __get_distinct_column_names(self) -> set[str] | None:
+        """
+        The names of the columns selected from a single table by a SELECT DISTINCT. None if it is another kind of query,
+        or if the select list holds anything else than columns.
+        """
+        if not self.__select_parsed.get("is_distinct") or self.__get_table_source_type() != "database":
+            return None
+        if self.__is_aggregate_query():
+            return None
+        table = self.__tables[self.__get_table_source_name()]
+        column_names = set()
+        for projection in self.__select_parsed.get("select_list"):
+            match projection.get("type"):
+                case "*":
+                    column_names.update(table.get_column_names())
+                case "column":
+                    column_names.add(projection.get("column_reference").get("column"))
+                case _:
+                    return None
+        return column_names
+
+    def __has_unique_rows(self) -> bool:
+        """
+        Whether the rows of a SELECT DISTINCT are unique without deduplication: the columns of the primary key of the
+        single table are selected.
+        """
+        column_names = self.__get_distinct_column_names()
+        if column_names is None:
+            return False
+        table = self.__tables[self.__get_table_source_name()]
+        primary_key = table.get_primary_key()
+        return primary_key is not None and set(primary_key.get_column_names()) <= column_names
+
+    def __process_top(self):
+        """
+        Keep the first rows of the result values. The operators below are not pulled anymore once they are given.
+        Updates the attribute '__result_operator'.
+        """
+        from server_side.execution.operators import Limit
+        top = self.__select_parsed.get("top")
+        if top is None or self.__result_operator is None:
+            return
+        self.__result_operator = Limit(self.__result_operator, top)
+
+    def __process_order_by(self):
         """
-        if self.__select_parsed.get("is_distinct"):
-            raise NotImplementedError("DISTINCT not supported yet")
+        Sort the rows by the columns of the ORDER BY clause.
+
+        The rows of a grouped query are sorted after they are grouped, by the values of the select list. The rows of
+        any other query are sorted before they are projected onto the select list, so they can be sorted by columns
+        that are not selected. The rows are sorted in memory up to SORT_MEMORY_BUDGET, and by merging sorted runs
+        written to the disk above it.
+
+        If the rows of a single table are read in the order of the primary key or of an index that starts with the
+        sorted columns, they are already in order and they are not sorted again.
+
+        Updates the attribute '__result_operator'.
+        """
+        from server_side.execution.operators import Sort
+        if not self.__select_parsed.get("order_by_expression") or self.__get_table_source_type() is None:
+            return
+        keys = self.__get_sort_keys()
+        if self.__access_path is not None and not self.__is_aggregate_query():
+            scan_order = self.__get_scan_order()
+            if scan_order is not None and self.__access_path.gives_order(scan_order):
+                return
+        self.__result_operator = Sort(self.__result_operator, keys)
+
+    def __get_sort_keys(self) -> list[tuple[int, bool]]:
+        """
+        The keys of the ORDER BY clause as (<position>, <descending>) pairs: the positions in the rows of the table
+        source, or in the values of the select list for a grouped query.
+        With DISTINCT, the other values of the select list follow in ascending order, so that the duplicates end up
+        next to each other.
+        """
+        is_aggregate_query = self.__is_aggregate_query()
+        keys = []
+        for item in self.__select_parsed.get("order_by_expression"):
+            col_ref = item.get("column_reference")
+            if is_aggregate_query:
+                position = self.__find_select_list_position(col_ref)
+            else:
+                position = self.__find_column_position(self.__resolve_column_alias(col_ref))
+            if all(position != key_position for key_position, _ in keys):
+                keys.append((position, item.get("is_descending")))
+        if self.__select_parsed.get("is_distinct") and not self.__has_unique_rows():
+            if is_aggregate_query:
+                selected_positions = list(range(len(self.__select_parsed.get("select_list"))))
+            else:
+                selected_positions = self.__get_selected_positions()
+            sorted_positions = [position for position, _ in keys]
+            if any(position not in selected_positions for position in sorted_positions):
+                raise ValueError("ORDER BY items must appear in the select list if SELECT DISTINCT is specified")
+            keys.extend((position, False) for position in selected_positions if position not in sorted_positions)
+        return keys
+
+    def __get_scan_order(self) -> list[str] | set[str] | None:
+        """
+        The order a single table is best read in, see AccessPath.gives_order: the columns of the ORDER BY clause, or
+        the columns of a SELECT DISTINCT, whose duplicates are then next to each other. None if no order helps.
+        """
+        if self.__get_table_source_type() != "database" or self.__is_aggregate_query():
+            return None
+        if self.__select_parsed.get("order_by_expression"):
+            keys = self.__get_sort_keys()
+            if any(descending for _, descending in keys):
+                # the keys are only read in ascending order
+                return None
+            col_names = self.__tables[self.__get_table_source_name()].get_column_names()
+            return [col_names[position] for position, _ in keys]
+        distinct_column_names = self.__get_distinct_column_names()
+        if distinct_column_names and not self.__has_unique_rows():
+            return distinct_column_names
+        return None
+
+    def __resolve_column_alias(self, col_ref: dict) -> dict:
+        """
+        The column reference of the select list whose alias an unqualified column reference is, else the column
+        reference itself.
+        """
+        if col_ref.get("table") is not None:
+            return col_ref
+        for projection in self.__select_parsed.get("select_list"):
+            if projection.get("type") == "column" and projection.get("alias") == col_ref.get("column"):
+                return projection.get("column_reference")
+        return col_ref
+
+    def __find_select_list_position(self, col_ref: dict) -> int:
+        """
+        The position of a referenced column in the values of the select list, by its alias or by the column.
+        """
+        select_list = self.__select_parsed.get("select_list")
+        if col_ref.get("table") is None:
+            for i, projection in enumerate(select_list):
+                if projection.get("alias") == col_ref.get("column"):
+                    return i
+        position = self.__find_column_position(col_ref)
+        for i, projection in enumerate(select_list):
+            if (projection.get("type") == "column" and
+                    self.__find_column_position(projection.get("column_reference")) == position):
+                return i
+        raise ValueError(f"Column '{col_ref.get('column')}' is invalid in the ORDER BY clause because it is not "
+                         f"contained in the select list")
+
+    def __get_selected_positions(self) -> list[int]:
+        """
+        The positions of the columns of the select list in the rows of the table source, each one once.
+        """
+        positions = []
+        for projection in self.__select_parsed.get("select_list"):
+            match projection.get("type"):
+                case "*":
+                    if self.__get_table_source_type() == "joined":
+                        selected = range(len(self.__join_layout))
+                    else:
+                        selected = range(len(self.__tables[self.__get_table_source_name()].get_column_names()))
+                case "column":
+                    selected = [self.__find_column_position(projection.get("column_reference"))]
+                case _:
+                    raise NotImplementedError("Expressions in SELECT clause are not supported yet")
+            positions.extend(position for position in selected if position not in positions)
+        return positions
 
     def __get_table_name_by_alias(self, alias: str) -> str:
         """If the alias is not found, return the alias itself."""
@@ -559,201 +784,130 @@ class Select(ExecutableTree):
         cond_val = expression.get("right")
         return col_ref, col_name, table_name, op, cond_val
 
-    def __satisfies_conditions(self, res: list, conditions: list[dict], column_names: list[str]):
+    def __resolve_search_condition(self, conditions: list[dict], table) -> list[tuple[int, str, object]]:
+        """
+        Resolve the columns of the expressions of the search condition to their positions in the rows of a table, and
+        check the types of the constants, once for all the rows. The expressions can then be compiled into a function.
+        :return: (<position of the column>, <operator>, <constant>) tuples
+        """
+        from server_side.execution.predicates import check_type
+        resolved = []
         for condition in conditions:
             col_ref, col_name, table_name, op, cond_val = self.__parse_dict_expression(condition)
-            idx = column_names.index(col_name)
-            col_type = self.__tables[table_name].get_column(col_name).get_type()
-            val = datatypes.cast_value(res[idx], col_type)
-            if not datatypes.eval_logical_expression(val, op, cond_val):
-                return False
-        return True
-
-    def __projection_matches_queried_col_refs(self, select_list, query_col_refs) -> bool:
-        for projection in select_list:
+            idx = table.find_column(col_name)
+            if idx == -1:
+                raise ValueError(f"Column '{col_name}' not found in table '{table.get_name()}'")
+            # the values are loaded with the type of their column
+            check_type(cond_val, table.get_column(col_name).get_type())
+            resolved.append((idx, op, cond_val))
+        return resolved
+
+    def __process_group_by(self):
+        """
+        Group the rows by the columns of the GROUP BY clause and evaluate the aggregate functions of the select list
+        over each group. Without a GROUP BY clause, the aggregate functions are evaluated over all the rows as a single
+        group.
+
+        The rows are consumed as a stream by a hash aggregate: it holds the key of every group and an accumulator for
+        each aggregate function of the group, updated once per row. The rows are loaded with the types of their
+        columns, their values are not cast again.
+
+        Updates the attributes '__result_header' and '__result_operator', the values are in the order of the select
+        list.
+        """
+        from server_side.execution.operators import HashAggregate, ParallelAggregate, Project
+        from server_side.execution import parallel
+        if not self.__is_aggregate_query() or self.__get_table_source_type() is None:
+            return
+        group_by_expression = self.__select_parsed.get("group_by_expression") or []
+        key_positions = [self.__find_column_position(col_ref) for col_ref in group_by_expression]
+        aggregates: list[tuple[str, int | None]] = []  # (<function name>, <position of its argument>)
+        positions = []  # the positions of the values of the select list in the aggregated rows
+        result_header = []
+        for projection in self.__select_parsed.get("select_list"):
             match projection.get("type"):
                 case "*":
-                    all_col_refs = self.__build_all_col_refs()
-                    ok = False
-                    for col_ref in all_col_refs:
-                        for qcr in query_col_refs:
-                            if self.__match_col_refs(col_ref, qcr):
-                                ok = True
-                                break
-                        if not ok:
-                            return False
-                    return True
-
+                    raise ValueError("'*' cannot be selected together with aggregate functions or GROUP BY")
                 case "column":
                     col_ref = projection.get("column_reference")
-                    ok = False
-                    for qcr in query_col_refs:
-                        if self.__match_col_refs(col_ref, qcr):
-                            ok = True
-                            break
-                    if not ok:
-                        return False
-        return True
-
-    def __match_col_refs(self, col_ref1, col_ref2):
-        col_name1 = col_ref1.get("column")
-        col_name2 = col_ref2.get("column")
-        if col_name1 != col_name2:
-            return False
-        table1 = col_ref1.get("table", None)
-        if table1 is None:
-            table1 = self.__find_table_by_column(col_name1).get_name()
-        else:
-            table1 = self.__get_table_name_by_alias(table1)
-        table2 = col_ref2.get("table", None)
-        if table2 is None:
-            table2 = self.__find_table_by_column(col_name2).get_name()
+                    position = self.__find_column_position(col_ref)
+                    if position not in key_positions:
+                        raise ValueError(f"Column '{col_ref.get('column')}' is invalid in the select list because it "
+                                         f"is not contained in either an aggregate function or the GROUP BY clause")
+                    positions.append(key_positions.index(position))
+                    result_header.append(projection.get("alias", col_ref.get("column")))
+                case "expression":
+                    function = self.__get_aggregate_function(projection)
+                    if function.get("is_distinct"):
+                        raise NotImplementedError("DISTINCT inside aggregate functions is not supported yet")
+                    col_ref = function.get("column_reference")
+                    # COUNT(*) takes no column
+                    argument = self.__find_column_position(col_ref) if isinstance(col_ref, dict) else None
+                    positions.append(len(key_positions) + len(aggregates))
+                    aggregates.append((function.get("name"), argument))
+                    alias = projection.get("alias")
+                    result_header.append(alias if alias is not None else " ")
+        degree = parallel.degree_of_parallelism(self.__select_parsed.get("max_degree_of_parallelism"))
+        if self.__is_parallel_scan(degree):
+            # the rows are read and aggregated by worker processes, the rows of the scan built in WHERE are not read
+            table = self.__tables[self.__get_table_source_name()]
+            operator = ParallelAggregate(self.__dbm, self.__db.get_name(), table,
+                                         self.__access_path.get_key_condition(), self.__scan_conditions, key_positions,
+                                         aggregates, degree)
         else:
-            table2 = self.__get_table_name_by_alias(table2)
-        if table1 != table2:
-            return False
-        return True
+            operator = HashAggregate(self.__result_operator, key_positions, aggregates)
+        if positions != list(range(len(key_positions) + len(aggregates))):
+            operator = Project(operator, positions)
+        self.__result_operator = operator
+        self.__result_header = result_header
 
-    def __process_group_by(self):
+    def __is_parallel_scan(self, degree: int) -> bool:
         """
-        Group the result set by the specified columns.
+        Whether the rows of the table source can be read by 'degree' worker processes in parallel: a single table read
+        in a range of its primary key, with at least PARALLEL_MIN_ROWS rows to read by the statistics of the table.
         """
-        group_by_expression = self.__select_parsed.get("group_by_expression")
-        if not group_by_expression:
-            return
-        if len(group_by_expression) > 1:
-            raise NotImplementedError("GROUP BY with multiple columns not supported yet")
+        from server_side import config
+        if degree <= 1 or self.__access_path is None or self.__table_statistics is None:
+            return False
+        if self.__access_path.get_method() not in ("full_scan", "primary_key"):
+            return False
+        rows = self.__access_path.get_selectivity() * self.__table_statistics.get_row_count()
+        return rows >= config.PARALLEL_MIN_ROWS
 
-        select_list = self.__select_parsed.get("select_list")
-        col_aliases = [projection.get("alias") for projection in select_list if projection.get("type") == "column" and projection.get("alias") is not None]
-        expr_aliases = []
-        for proj in select_list:
-            if proj.get("type") == "expression":
-                if proj.get("alias") is None:
-                    expr_aliases.append(" ")
-                else:
-                    expr_aliases.append(proj.get("alias"))
-
-        # set of col refs of columns we apply aggregation function(s) on
-        aggregating_col_refs = self.__get_aggregating_col_refs(select_list)
-
-        # create dict of form (key=<group_by_key>, value=list[(<aggregating_col_ref>, <value>)])
-        group_by_col_ref = group_by_expression[0]
-        grouped_values = self.__group_values(group_by_col_ref, aggregating_col_refs)
-
-        # set the result header
-        self.__result_header = [col_aliases if col_aliases else group_by_col_ref.get("column")]
-        self.__result_header.extend(expr_aliases)
-
-        # evaluate the aggregate functions
-        aggregate_functions: list[dict] = self.__get_aggregate_functions_from_select_list(select_list)
-        aggr_col_types: list[str] = [self.__find_table_by_column(func.get("column_reference").get("column")).get_column(
-                func.get("column_reference").get("column")).get_type() for func in aggregate_functions]
-        new_result_values = []
-        for group_key, val_list in grouped_values.items():
-            aggregate_results = []
-            for i, func in enumerate(aggregate_functions):
-                is_distinct = func.get("is_distinct")
-                func_name = func.get("name")
-                aggregating_col_ref = func.get("column_reference")
-                cur_aggr_res = self.__eval_aggretate_function(func_name, val_list, aggregating_col_ref, aggr_col_types[i])
-                aggregate_results.append(cur_aggr_res)
-            new_result_values.append([group_key] + aggregate_results)
-        self.__result_values = new_result_values
-
-    def __parse_column_reference_with_table_name(self, col_ref):
-        col_name = col_ref.get("column")
-        table_name = col_ref.get("table")
-        if table_name is None:
-            table_name = self.__find_table_by_column(col_name).get_name()
-        else:
-            table_name = self.__get_table_name_by_alias(table_name)
-        return table_name, col_name
-
-    def __get_column_reference_from_aggregate_projection(self, projection: dict) -> dict:
-        if projection.get("type") != "expression":
-            raise ValueError("Projection must be 'expression'")
-        if projection.get("value").get("type") != "function":
-            raise ValueError("Projection must be 'function'")
-        function = projection.get("value").get("value")
-        if function.get("type") != "aggregate":
-            raise ValueError("Projection must be function of type 'aggregate'")
-        return function.get("function").get("column_reference")
-
-    def __get_aggregating_col_refs(self, select_list: list[dict]) -> list[dict]:
-        col_refs = []
-        for projection in select_list:
+    def __is_aggregate_query(self) -> bool:
+        """
+        Whether the rows are grouped: there is a GROUP BY clause or an aggregate function in the select list.
+        """
+        if self.__select_parsed.get("group_by_expression"):
+            return True
+        for projection in self.__select_parsed.get("select_list"):
             if projection.get("type") == "expression":
-                col_ref = self.__get_column_reference_from_aggregate_projection(projection)
-                if col_ref not in col_refs:
-                    # only add unique column references
-                    col_refs.append(col_ref)
-        return col_refs
+                value = projection.get("value")
+                if value.get("type") == "function" and value.get("value").get("type") == "aggregate":
+                    return True
+        return False
 
-    def __group_values(self, group_by_col_ref, aggregating_col_refs) -> dict:
-        table_name, col_name = self.__parse_column_reference_with_table_name(group_by_col_ref)
-        pos_grouped_by_col: int = self.__result_header.index(col_name)
-        pos_aggregating_cols: list[int] = [self.__result_header.index(col_ref.get("column")) for col_ref in aggregating_col_refs]
-        grouped_values = {}
-        for res in self.__result_values:
-            key = res[pos_grouped_by_col]
-            if grouped_values.get(key) is None:
-                grouped_values[key] = []
-            col_val_list: list[tuple] = []
-            for i, aggr_pos in enumerate(pos_aggregating_cols):
-                col_val_list.append((aggregating_col_refs[i], res[aggr_pos]))
-            grouped_values[key].extend(col_val_list)
-        return grouped_values
-
-    def __get_aggregate_functions_from_select_list(self, select_list: list[dict]) -> list[dict]:
-        aggregate_functions = []
-        for projection in select_list:
-            if projection.get("type") != "expression":
-                continue
-            function = projection["value"]["value"]["function"]
-            aggregate_functions.append(function)
-        return aggregate_functions
-
-    def __eval_aggretate_function(self, func_name: str, val_list: dict, aggregating_col_ref: dict,
-                                  col_type: str):
-        """Returns a single value."""
-        aggregation_result = None
-        match func_name:
-            case "count":
-                aggregation_result = 0
-                for val in val_list:
-                    if val[0] == aggregating_col_ref:
-                        aggregation_result += 1
-            case "sum":
-                aggregation_result = 0
-                for val in val_list:
-                    casted_val = datatypes.cast_value(val[1], col_type)
-                    if val[0] == aggregating_col_ref:
-                        aggregation_result += casted_val
-            case "avg":
-                aggregation_result = 0
-                cnt = 0
-                for val in val_list:
-                    casted_val = datatypes.cast_value(val[1], col_type)
-                    if val[0] == aggregating_col_ref:
-                        aggregation_result += casted_val
-                        cnt += 1
-                aggregation_result /= cnt
-            case "min":
-                aggregation_result = None
-                for val in val_list:
-                    casted_val = datatypes.cast_value(val[1], col_type)
-                    if val[0] == aggregating_col_ref:
-                        if aggregation_result is None or casted_val < aggregation_result:
-                            aggregation_result = casted_val
-            case "max":
-                aggregation_result = None
-                for val in val_list:
-                    casted_val = datatypes.cast_value(val[1], col_type)
-                    if val[0] == aggregating_col_ref:
-                        if aggregation_result is None or casted_val > aggregation_result:
-                            aggregation_result = casted_val
-            case _:
-                raise NotImplementedError(f"Aggregate function '{func_name}' not supported")
+    def __get_aggregate_function(self, projection: dict) -> dict:
+        """
+        The aggregate function of an expression of the select list of a grouped query.
+        """
+        value = projection.get("value")
+        if value.get("type") != "function" or value.get("value").get("type") != "aggregate":
+            raise NotImplementedError("Only aggregate functions are supported in the select list of a grouped query")
+        return value.get("value").get("function")
 
-        return aggregation_result
+    def __find_column_position(self, col_ref: dict) -> int:
+        """
+        The position of a referenced column in the rows of the table source.
+        """
+        col_name = col_ref.get("column")
+        if self.__get_table_source_type() == "joined":
+            return self.__join_layout.index(self.__resolve_join_column(col_ref))
+        table = self.__tables[self.__get_table_source_name()]
+        qualifier = col_ref.get("table")
+        if qualifier is not None and self.__get_table_name_by_alias(qualifier) != table.get_name():
+            raise ValueError(f"Table '{qualifier}' not found in the FROM clause")
+        position = table.find_column(col_name)
+        if position == -1:
+            raise ValueError(f"Column '{col_name}' not found in table '{table.get_name()}'")
+        return position
@@ -0,0 +1,72 @@
+from server_side.database_objects import StorageEngine
+
+
+class UndoLog:
+    """
+    Records the changes that the current request made in the storage, so that they can be undone if the request fails.
+
+    Only the modified documents are recorded:
+        - inserted documents by their keys
+        - deleted documents as they were
+        - documents updated in place (e.g. by pushing into an array) by the update that reverses the change
+    Collections created by the request are recorded as a whole, the changes made inside them are not recorded, because
+    undoing the request drops them anyway.
+    """
+
+    def __init__(self):
+        self.__entries: list[tuple] = []  # (<action>, <db_name>, <collection_name>, <keys or documents>) tuples
+        self.__created_collections: set[tuple[str, str]] = set()  # (<db_name>, <collection_name>) pairs
+
+    def log_create_collection(self, db_name: str, collection_name: str):
+        self.__created_collections.add((db_name, collection_name))
+        self.__entries.append(("create", db_name, collection_name, None))
+
+    def log_insert(self, db_name: str, collection_name: str, keys: list):
+        """
+        :param keys: the keys of the inserted documents
+        """
+        if keys and (db_name, collection_name) not in self.__created_collections:
+            self.__entries.append(("insert", db_name, collection_name, list(keys)))
+
+    def log_delete(self, db_name: str, collection_name: str, documents: list[dict]):
+        """
+        :param documents: the deleted documents
+        """
+        if documents and (db_name, collection_name) not in self.__created_collections:
+            self.__entries.append(("delete", db_name, collection_name, list(documents)))
+
+    def log_update_in_place(self, db_name: str, collection_name: str, key, undo_update: dict):
+        """
+        :param key: the key of the updated document
+        :param undo_update: the update that reverses the change
+        """
+        if (db_name, collection_name) not in self.__created_collections:
+            self.__entries.append(("update_in_place", db_name, collection_name, (key, undo_update)))
+
+    def is_empty(self) -> bool:
+        return not self.__entries
+
+    def clear(self):
+        """
+        Forget the recorded changes, they are permanent from now on.
+        """
+        self.__entries = []
+        self.__created_collections = set()
+
+    def rollback(self, engine: StorageEngine):
+        """
+        Undo the recorded changes in reverse order, then forget them.
+        """
+        for action, db_name, collection_name, data in reversed(self.__entries):
+            match action:
+                case "create":
+                    engine.drop_collection(db_name, collection_name)
+                case "insert":
+                    engine.delete(db_name, collection_name, {"_id": {"$in": data}})
+                case "delete":
+                    # write back the deleted documents
+                    engine.replace_many(db_name, collection_name, data)
+                case "update_in_place":
+                    key, undo_update = data
+                    engine.update_one(db_name, collection_name, {"_id": key}, undo_update)
+        self.clear()
@@ -0,0 +1,61 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from server_side.dbmanager import DbManager
+from server_side.database_objects.embedded_db import EmbeddedEngine
+from server_side.interpreter.parser import Parser
+from server_side.interpreter.executor import Executor
+
+
+class TempDirTestCase(TestCase):
+    """
+    A test with a temporary directory for its files, removed after the test.
+    """
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+
+class EmbeddedTestCase(TempDirTestCase):
+    """
+    A test that runs commands against a DbManager over an embedded storage engine, kept in a temporary directory.
+    The tests set up their own databases and tables.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.engine = EmbeddedEngine(os.path.join(self.data_dir, "data"))
+        self.dbm = DbManager(self.engine, os.path.join(self.data_dir, "databases.json"))
+        self.parser = Parser()
+        self.executor = Executor(self.dbm)
+
+    def execute(self, commands: str) -> list:
+        """
+        Execute the commands and save their changes.
+        :return: the results of the commands
+        """
+        self.parser.parse(commands)
+        self.executor.execute(self.parser.get_ast_list())
+        self.dbm.save_changes()
+        return self.executor.get_results()
+
+    def query(self, command: str) -> tuple[list, list]:
+        """
+        Execute the commands.
+        :return: the header and the rows of the result set of the last command
+        """
+        return self.execute(command)[-1].get_result_set()
+
+    def insert_rows(self, table_name: str, rows: list[dict]):
+        """
+        Insert rows into a table of the working database in one batch, without parsing them, and save them.
+        :param rows: the values of the rows by column names, as they are written in an INSERT statement
+        """
+        db = self.dbm.get_working_db()
+        self.dbm.insert(db, db.get_table(table_name), rows)
+        self.dbm.save_changes()
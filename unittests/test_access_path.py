@@ -0,0 +1,109 @@
+from embedded_test_case import EmbeddedTestCase
+from server_side.execution.access_path import choose_access_path
+
+
+class TestAccessPath(EmbeddedTestCase):
+    """
+    Test the choice of the access path of a single table by the selectivity of the conditions.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.execute("create database test_db;"
+                     "use test_db;"
+                     "create table t (id int primary key, status int, kind int, other int);"
+                     "create index idx_status on t(status);"
+                     "create index idx_kind_other on t(kind, other);")
+        # 'status' is 0 in 900 of the 1000 rows
+        self.records = [[i, 0 if i < 900 else i, i % 20, i % 7] for i in range(1000)]
+        self.insert_rows("t", [{"id": str(r[0]), "status": str(r[1]), "kind": str(r[2]), "other": str(r[3])}
+                               for r in self.records])
+        self.table = self.dbm.get_working_db().get_table("t")
+        self.statistics = self.dbm.get_table_statistics("test_db", "t")
+
+    def choose(self, conditions: list[tuple]):
+        return choose_access_path(self.table, conditions, 1000, self.statistics)
+
+    def test_choice(self):
+        # a rare value is looked up in the index, a frequent one is read in a full scan
+        self.assertEqual("index", self.choose([("status", "=", 950)]).get_method())
+        self.assertEqual("full_scan", self.choose([("status", "=", 0)]).get_method())
+        self.assertEqual("full_scan", self.choose([("status", ">=", 0)]).get_method())
+        # the most selective condition drives the scan
+        path = self.choose([("status", ">=", 0), ("kind", "=", 3), ("id", ">", 10)])
+        self.assertEqual(("index", ["kind"], "idx_kind_other"),
+                         (path.get_method(), path.get_column_names(), path.get_index().get_name()))
+        # a range of the primary key is read in order, even a wide one is cheaper than a full scan
+        self.assertEqual("primary_key", self.choose([("id", "<", 900), ("status", "=", 0)]).get_method())
+        # the bounds on one column narrow one range
+        path = self.choose([("status", ">", 940), ("status", "<", 950)])
+        self.assertEqual("index", path.get_method())
+        self.assertAlmostEqual(0.01, path.get_selectivity(), delta=0.01)
+        # a column without an index can't drive the scan
+        self.assertEqual("full_scan", self.choose([("other", "=", 3)]).get_method())
+        # nor a value that does not fit the type of the column
+        self.assertEqual("full_scan", self.choose([("status", "=", "'a'")]).get_method())
+
+    def test_query(self):
+        queries = [
+            ("status = 950", lambda r: r[1] == 950),
+            ("status = 0 and kind = 3", lambda r: r[1] == 0 and r[2] == 3),
+            ("status >= 0 and id > 990", lambda r: r[1] >= 0 and r[0] > 990),
+            ("status > 940 and status < 950 and other = 1", lambda r: 940 < r[1] < 950 and r[3] == 1),
+            ("kind < 2 and other = 0", lambda r: r[2] < 2 and r[3] == 0),
+            ("id = 5 and status = 1", lambda r: False),
+        ]
+        for condition, predicate in queries:
+            header, rows = self.query(f"select * from t where {condition}")
+            self.assertEqual(["id", "status", "kind", "other"], header)
+            self.assertEqual([r for r in self.records if predicate(r)], sorted(rows), condition)
+
+    def test_composite_keys(self):
+        # equality on the first column of the index and a range on the second one
+        path = self.choose([("kind", "=", 3), ("other", ">", 4)])
+        self.assertEqual(("index", ["kind", "other"]), (path.get_method(), path.get_column_names()))
+        # a range on the second column alone can't use the index
+        self.assertEqual("full_scan", self.choose([("other", ">", 4)]).get_method())
+
+        self.execute("create table pairs (a int, b int, c int, primary key (a, b));")
+        pairs = [[a, b, a * b] for a in range(30) for b in range(30)]
+        self.insert_rows("pairs", [{"a": str(a), "b": str(b), "c": str(c)} for a, b, c in pairs])
+        table = self.dbm.get_working_db().get_table("pairs")
+        path = choose_access_path(table, [("a", "=", 3), ("b", ">=", 10), ("b", "<", 13)], 900)
+        self.assertEqual(("primary_key", ["a", "b"]), (path.get_method(), path.get_column_names()))
+        path = choose_access_path(table, [("a", "=", 3), ("b", "=", 10)], 900)
+        self.assertEqual(1 / 900, path.get_selectivity())
+
+        queries = [
+            ("pairs", "a = 3 and b >= 10 and b < 13", lambda r: r[0] == 3 and 10 <= r[1] < 13),
+            ("pairs", "a = 3 and b = 10", lambda r: r[0] == 3 and r[1] == 10),
+            ("pairs", "a <= 1 and c > 5", lambda r: r[0] <= 1 and r[2] > 5),
+            ("t", "kind = 3 and other > 4", lambda r: r[2] == 3 and r[3] > 4),
+            ("t", "kind = 3 and other = 5 and id < 100", lambda r: r[2] == 3 and r[3] == 5 and r[0] < 100),
+        ]
+        for table_name, condition, predicate in queries:
+            records = pairs if table_name == "pairs" else self.records
+            _, rows = self.query(f"select * from {table_name} where {condition}")
+            self.assertEqual([r for r in records if predicate(r)], sorted(rows), condition)
+
+    def test_index_only(self):
+        # the query reads no other columns than the ones of the index and of the primary key
+        path = choose_access_path(self.table, [("status", "=", 950)], 1000, self.statistics, {"id", "status"})
+        self.assertEqual("index_only", path.get_method())
+        path = choose_access_path(self.table, [("kind", "=", 3)], 1000, self.statistics, {"kind", "other", "id"})
+        self.assertEqual(("index_only", "idx_kind_other"), (path.get_method(), path.get_index().get_name()))
+        # the whole index is cheaper to read than the whole table
+        self.assertEqual("index_only", choose_access_path(self.table, [], 1000, self.statistics, {"other"}).get_method())
+        # a column outside of the index needs the rows
+        path = choose_access_path(self.table, [("status", "=", 950)], 1000, self.statistics, {"status", "kind"})
+        self.assertEqual("index", path.get_method())
+
+        queries = [
+            ("id, status", "where status > 940", lambda r: r[1] > 940, [0, 1]),
+            ("other, id", "where kind = 3 and other < 3", lambda r: r[2] == 3 and r[3] < 3, [3, 0]),
+            ("kind", "", lambda r: True, [2]),
+        ]
+        for select_list, where, predicate, positions in queries:
+            _, rows = self.query(f"select {select_list} from t {where}")
+            expected = [[r[pos] for pos in positions] for r in self.records if predicate(r)]
+            self.assertEqual(sorted(expected), sorted(rows), where)
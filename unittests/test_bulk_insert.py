@@ -0,0 +1,116 @@
+import os
+
+from embedded_test_case import EmbeddedTestCase
+from server_side import config
+from server_side.dbmanager import DbManager
+from server_side.database_objects import key_codec
+from server_side.database_objects.embedded_db import EmbeddedEngine
+
+
+class TestBulkInsert(EmbeddedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.execute("create database test_db;"
+                     "use test_db;"
+                     "create table t1 ("
+                     "  col1 int primary key,"
+                     "  col2 int,"
+                     "  col3 varchar"
+                     ");"
+                     "create index idx1 on t1(col2);")
+
+    def test_many_records(self):
+        values = ", ".join(f"({i}, {i % 10}, 'name')" for i in range(200))
+        self.assertEqual(200, self.execute(f"insert into t1 values {values}")[0].get_nr_rows_affected())
+
+        # every record is in the index, merged under its index key
+        self.assertEqual(20, len(self.dbm.find_conditional_indexed_by_value("test_db", "t1", "col2", "int", "=", 3)))
+        self.execute("insert into t1 values (200, 3, 'name')")
+        self.assertEqual(21, len(self.dbm.find_conditional_indexed_by_value("test_db", "t1", "col2", "int", "=", 3)))
+        # the index of the primary key is unique, a document per record
+        entries = self.engine.select("test_db", "__t1#i_pk_t1_col1")
+        self.assertEqual(201, len(entries))
+        self.assertTrue(all(isinstance(entry["value"], str) for entry in entries))
+
+    def test_duplicate_key_names_the_record(self):
+        db = self.dbm.get_working_db()
+        table = db.get_table("t1")
+        self.dbm.insert(db, table, [{"col1": "1", "col2": "2", "col3": "'a'"}])
+        with self.assertRaises(ValueError) as context:
+            self.dbm.insert(db, table, [{"col1": "2", "col2": "2", "col3": "'b'"},
+                                        {"col1": "1", "col2": "5", "col3": "'c'"}])
+        self.assertIn("'c'", str(context.exception))
+        # the duplicated key is decoded, not shown as it is stored
+        self.assertIn("duplicate value (1) of the columns (col1) in the primary key of table [t1]",
+                      str(context.exception))
+
+    def test_typed_rows(self):
+        self.execute("insert into t1 values (1, 2, 'a#b'), (2, 10, 'c')")
+        self.assertEqual([[1, 2, "'a#b'"], [2, 10, "'c'"]], list(self.dbm.find_all("test_db", "t1")))
+        self.assertEqual([["'a#b'", 1], ["'c'", 2]], list(self.dbm.find_all("test_db", "t1", ["col3", "col1"])))
+
+    def test_posting_list_buckets(self):
+        bucket_size = config.INDEX_BUCKET_SIZE
+        config.INDEX_BUCKET_SIZE = 3
+        try:
+            self.execute("insert into t1 values (1, 7, 'a'), (2, 7, 'a'), (3, 7, 'a'), (4, 7, 'a')")
+            self.execute("insert into t1 values (5, 7, 'a'), (6, 7, 'a'), (7, 8, 'a')")
+            self.execute("delete from t1 where col1 = 2")
+        finally:
+            config.INDEX_BUCKET_SIZE = bucket_size
+        buckets = self.engine.select("test_db", "__t1#idx1")
+        self.assertEqual([2, 3, 1], [bucket["n"] for bucket in buckets])
+        result = self.dbm.find_conditional_indexed_by_value("test_db", "t1", "col2", "int", "=", 7)
+        self.assertEqual([[1], [3], [4], [5], [6]], sorted(result))
+
+    def test_find_by_value(self):
+        self.execute("create table t2 (col1 int primary key, col2 int, col3 varchar unique, col4 int);"
+                     "insert into t2 values (1, 5, 'a', 7), (2, 5, 'b', 8), (3, 6, 'c', 8)")
+        # unique index
+        self.assertIsNotNone(self.dbm.find_by_value("test_db", "t2", ["col3"], ["'b'"]))
+        self.assertIsNone(self.dbm.find_by_value("test_db", "t2", ["col3"], ["'d'"]))
+        # no index
+        self.assertEqual(self.dbm.find_by_value("test_db", "t2", ["col3"], ["'b'"]),
+                         self.dbm.find_by_value("test_db", "t2", ["col4", "col2"], ["8", "5"]))
+        self.assertIsNone(self.dbm.find_by_value("test_db", "t2", ["col2", "col4"], ["6", "7"]))
+        self.assertIsNotNone(self.dbm.find_by_value("test_db", "t2", ["col1", "col4"], ["3", "8"]))
+        # columns of the primary key after the first one
+        self.execute("create table t3 (col1 int, col2 int, col3 int, primary key (col1, col2));"
+                     "insert into t3 values (1, 1, 5), (1, 2, 6), (2, 2, 7)")
+        self.assertEqual(key_codec.encode_key([1, 2], ["int", "int"]),
+                         self.dbm.find_by_value("test_db", "t3", ["col2"], ["2"]))
+        self.assertEqual(key_codec.encode_key([2, 2], ["int", "int"]),
+                         self.dbm.find_by_value("test_db", "t3", ["col3", "col2"], ["7", "2"]))
+        self.assertIsNone(self.dbm.find_by_value("test_db", "t3", ["col2", "col3"], ["1", "6"]))
+
+    def test_identity_reservation(self):
+        identity_cache_size = config.IDENTITY_CACHE_SIZE
+        config.IDENTITY_CACHE_SIZE = 5
+        try:
+            self.execute("create table t2 (col1 int primary key identity(1,2), col2 int);"
+                         "insert into t2(col2) values (1), (2), (3);"
+                         "insert into t2(col2) values (4);")
+            # one reservation covers both inserts, the counter is past the cached values
+            self.assertEqual([[1, 1], [3, 2], [5, 3], [7, 4]], list(self.dbm.find_all("test_db", "t2")))
+            self.assertEqual(17, self.engine.find_one("test_db", "__next_identity", {"_id": "t2"})["value"])
+        finally:
+            config.IDENTITY_CACHE_SIZE = identity_cache_size
+        self.assertEqual([9, 11], self.dbm.reserve_identity_values("test_db", "t2", 2))
+        self.assertEqual([13, 15, 17], self.dbm.reserve_identity_values("test_db", "t2", 3))
+        self.assertEqual(19, self.engine.find_one("test_db", "__next_identity", {"_id": "t2"})["value"])
+
+    def test_storage_format(self):
+        self.execute("insert into t1 values (1, 2, 'a')")
+        db_file = os.path.join(self.data_dir, "databases.json")
+        # the data of a database without a recorded format is stored in the first format
+        self.engine.drop_collection("test_db", "__storage_format")
+        with self.assertRaises(ValueError) as context:
+            DbManager(EmbeddedEngine(os.path.join(self.data_dir, "data")), db_file)
+        self.assertIn("Database [test_db] is stored in format version 1", str(context.exception))
+        # the format of empty tables doesn't matter, it is recorded
+        self.engine.delete("test_db", "t1", {})
+        self.engine.delete("test_db", "__t1#idx1", {})
+        self.engine.delete("test_db", "__t1#i_pk_t1_col1", {})
+        DbManager(EmbeddedEngine(os.path.join(self.data_dir, "data")), db_file)
+        self.assertEqual(2, self.engine.find_one("test_db", "__storage_format", {"_id": "version"})["value"])
@@ -0,0 +1,31 @@
+from embedded_test_case import EmbeddedTestCase
+from server_side.execution.distinct import hash_distinct, adjacent_distinct
+
+
+class TestDistinct(EmbeddedTestCase):
+    """
+    Test SELECT DISTINCT against a direct evaluation.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.rows = [[i, i % 5, i % 3] for i in range(200)]
+        self.execute("create database test_db;"
+                     "use test_db;"
+                     "create table tb (id int primary key, a int, b int);"
+                     "create index idx_a_b on tb(a, b);")
+        self.insert_rows("tb", [{"id": str(i), "a": str(a), "b": str(b)} for i, a, b in self.rows])
+
+    def test_distinct(self):
+        _, values = self.query("select distinct b, a from tb;")
+        self.assertEqual(sorted({(b, a) for _, a, b in self.rows}), sorted(tuple(value) for value in values))
+        _, values = self.query("select distinct a from tb where a > 1 and b = 2;")
+        self.assertEqual([[2], [3], [4]], sorted(values))
+        _, values = self.query("select distinct id, a from tb where id < 5;")
+        self.assertEqual([[i, i % 5] for i in range(5)], sorted(values))
+
+    def test_spill(self):
+        records = [[i % 500, "'x'"] for i in range(3000)]
+        self.assertEqual(sorted({tuple(record) for record in records}),
+                         sorted(tuple(record) for record in hash_distinct(records, 1000, self.data_dir)))
+        self.assertEqual([[1], [2], [1]], list(adjacent_distinct([[1], [1], [2], [1], [1]])))
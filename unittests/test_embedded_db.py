@@ -0,0 +1,105 @@
+from embedded_test_case import TempDirTestCase
+from server_side.database_objects.embedded_db import EmbeddedEngine
+
+
+class TestEmbeddedDB(TempDirTestCase):
+    """
+    Test the embedded storage engine.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.engine = EmbeddedEngine(self.data_dir)
+        self.engine.set_up()
+
+    def tearDown(self) -> None:
+        self.engine.close_down()
+        super().tearDown()
+
+    def test_insert_one(self):
+        key = self.engine.insert_one("test_db", "test_collection", ("key", "value"))
+        self.assertEqual("key", key)
+        self.assertEqual([{"_id": "key", "value": "value"}], self.engine.select("test_db", "test_collection"))
+        with self.assertRaises(ValueError):
+            self.engine.insert_one("test_db", "test_collection", ("key", "other value"))
+
+    def test_create_and_drop_collection(self):
+        self.engine.create_collection("test_db", "test_collection1")
+        self.engine.create_collection("test_db", "test_collection2")
+        with self.assertRaises(ValueError):
+            self.engine.create_collection("test_db", "test_collection1")
+        self.engine.drop_collection("test_db", "test_collection1")
+        self.assertEqual(["test_collection2"], self.engine.get_collection_names("test_db"))
+
+    def test_drop_database(self):
+        self.engine.create_collection("test_db", "test_collection")
+        self.assertIn("test_db", self.engine.get_database_names())
+        self.engine.drop_database("test_db")
+        self.assertNotIn("test_db", self.engine.get_database_names())
+        self.assertEqual([], self.engine.select("test_db", "test_collection"))
+
+    def test_select_by_key(self):
+        for i in range(10):
+            self.engine.insert_one_int("test_db", "test_collection", (f"k{i}", i))
+        result = self.engine.select("test_db", "test_collection", {"_id": {"$gte": "k3", "$lt": "k5"}})
+        self.assertEqual(["k3", "k4"], [doc["_id"] for doc in result])
+        result = self.engine.select("test_db", "test_collection", {"$or": [{"_id": "k1"}, {"_id": "k8"}]})
+        self.assertEqual(["k1", "k8"], [doc["_id"] for doc in result])
+
+    def test_select_by_value(self):
+        for i in range(10):
+            self.engine.insert_one_int("test_db", "test_collection", (f"k{i}", i % 3))
+        result = self.engine.select("test_db", "test_collection", {"value": 1})
+        self.assertEqual(["k1", "k4", "k7"], [doc["_id"] for doc in result])
+        result = self.engine.select("test_db", "test_collection", {"_id": {"$gt": "k4"}, "value": {"$lt": 2}})
+        self.assertEqual(["k6", "k7", "k9"], [doc["_id"] for doc in result])
+
+    def test_update_and_delete(self):
+        self.engine.insert_one_int("test_db", "__next_identity", ("t1", 1))
+        self.engine.increment_identity("test_db", "t1", 5)
+        self.engine.update_one("test_db", "__next_identity", {"_id": "t1"}, {"$inc": {"value": 1}})
+        self.assertEqual(7, self.engine.select("test_db", "__next_identity", {"_id": "t1"})[0]["value"])
+        with self.assertRaises(ValueError):
+            self.engine.increment_identity("test_db", "t2", 1)
+        self.assertEqual(1, self.engine.delete("test_db", "__next_identity", {"value": 7}))
+        self.assertEqual([], self.engine.select("test_db", "__next_identity"))
+
+    def test_select_projection(self):
+        self.engine.insert_many("test_db", "test_collection", [{"_id": "k1", "a": 1, "b": "x", "c": [1, 2]},
+                                                               {"_id": "k2", "a": None, "b": "y"}])
+        result = self.engine.select("test_db", "test_collection", {}, ["a", "c"])
+        self.assertEqual([{"_id": "k1", "a": 1, "c": [1, 2]}, {"_id": "k2", "a": None}], result)
+        result = self.engine.select("test_db", "test_collection", {"b": "y"}, ["b"])
+        self.assertEqual([{"_id": "k2", "b": "y"}], result)
+
+    def test_find_one(self):
+        for i in range(10):
+            self.engine.insert_one_int("test_db", "test_collection", (f"k{i}", i % 3))
+        self.assertEqual({"_id": "k2", "value": 2}, self.engine.find_one("test_db", "test_collection", {"value": 2}))
+        self.assertEqual({"_id": "k4"}, self.engine.find_one("test_db", "test_collection", {"_id": {"$gt": "k3"}}, []))
+        self.assertIsNone(self.engine.find_one("test_db", "test_collection", {"value": 3}))
+        self.assertIsNone(self.engine.find_one("test_db", "other_collection"))
+
+    def test_select_iter(self):
+        self.engine.insert_many("test_db", "test_collection", [{"_id": f"k{i}", "value": i} for i in range(10)])
+        documents = self.engine.select_iter("test_db", "test_collection", {"value": {"$gte": 3}}, batch_size=4)
+        self.assertEqual({"_id": "k3", "value": 3}, next(documents))
+        self.assertEqual(["k4", "k5", "k6", "k7", "k8", "k9"], [doc["_id"] for doc in documents])
+        documents = self.engine.select_iter("test_db", "test_collection", {"_id": {"$lt": "k2"}}, [], batch_size=1)
+        self.assertEqual([{"_id": "k0"}, {"_id": "k1"}], list(documents))
+        self.assertEqual([], list(self.engine.select_iter("test_db", "other_collection")))
+
+    def test_find_one_and_update(self):
+        self.engine.insert_one_int("test_db", "__next_identity", ("t1", 1))
+        before = self.engine.find_one_and_update("test_db", "__next_identity", {"_id": "t1"}, {"$inc": {"value": 10}})
+        self.assertEqual({"_id": "t1", "value": 1}, before)
+        self.assertEqual(11, self.engine.find_one("test_db", "__next_identity", {"_id": "t1"})["value"])
+        self.assertIsNone(self.engine.find_one_and_update("test_db", "__next_identity", {"_id": "t2"},
+                                                          {"$inc": {"value": 1}}))
+
+    def test_count(self):
+        self.engine.insert_many("test_db", "test_collection", [{"_id": f"k{i}", "value": i % 3} for i in range(10)])
+        self.assertEqual(10, self.engine.count("test_db", "test_collection"))
+        self.assertEqual(3, self.engine.count("test_db", "test_collection", {"_id": {"$gte": "k7"}}))
+        self.assertEqual(2, self.engine.count("test_db", "test_collection", {"_id": {"$gte": "k5"}, "value": 0}))
+        self.assertEqual(0, self.engine.count("test_db", "other_collection"))
@@ -0,0 +1,44 @@
+from embedded_test_case import EmbeddedTestCase
+
+
+class TestGroupBy(EmbeddedTestCase):
+    """
+    Test the grouping and the aggregate functions of SELECT against a direct evaluation.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.rows = [[i, i % 3, i % 2, float(i) / 4] for i in range(60)]
+        self.execute("create database test_db;"
+                     "use test_db;"
+                     "create table tb (id int primary key, a int, b int, c float);"
+                     "create table other (id int primary key, name varchar);"
+                     "insert into other values (0, 'zero'), (1, 'one'), (2, 'two');")
+        self.insert_rows("tb", [{"id": str(i), "a": str(a), "b": str(b), "c": str(c)} for i, a, b, c in self.rows])
+
+    def test_multiple_columns(self):
+        header, values = self.query("select b, a, count(*) as cnt, sum(id) as total, avg(c), min(id), max(c) "
+                                    "from tb where id >= 6 group by a, b;")
+        self.assertEqual(["b", "a", "cnt", "total", " ", " ", " "], header)
+        expected = []
+        for a in range(3):
+            for b in range(2):
+                group = [row for row in self.rows if row[0] >= 6 and row[1] == a and row[2] == b]
+                expected.append([b, a, len(group), sum(row[0] for row in group),
+                                 sum(row[3] for row in group) / len(group), min(row[0] for row in group),
+                                 max(row[3] for row in group)])
+        self.assertEqual(sorted(expected), sorted(values))
+
+    def test_without_group_by(self):
+        _, values = self.query("select count(*), sum(a), max(id) from tb where id < 10;")
+        self.assertEqual([[10, sum(row[1] for row in self.rows[:10]), 9]], values)
+        _, values = self.query("select count(id), avg(c) from tb where id > 100;")
+        self.assertEqual([[0, None]], values)
+
+    def test_joined(self):
+        _, values = self.query("select o.name, count(*) as cnt from tb t join other o on t.a = o.id "
+                               "group by o.name;")
+        self.assertEqual(sorted([["'zero'", 20], ["'one'", 20], ["'two'", 20]]), sorted(values))
+
+    def test_invalid_column(self):
+        self.assertRaises(ValueError, self.query, "select b, count(*) from tb group by a;")
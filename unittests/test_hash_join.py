@@ -0,0 +1,33 @@
+import random
+from unittest import TestCase
+
+from server_side.execution import hash_join
+
+
+class TestHashJoin(TestCase):
+    """
+    Test the hash join against a nested loop join.
+    """
+
+    def setUp(self):
+        rnd = random.Random(7)
+        self.left = [[i, rnd.randrange(50), f"l{i}"] for i in range(300)] + [[300, None, "null"]]
+        self.right = [[rnd.randrange(60), i] for i in range(200)] + [[None, 200]]
+
+    def __nested_loop(self) -> list:
+        return [l_rec + r_rec for l_rec in self.left for r_rec in self.right
+                if l_rec[1] is not None and l_rec[1] == r_rec[0]]
+
+    def test_in_memory(self):
+        result = list(hash_join(self.right, self.left, 0, 1, 10 ** 9))
+        # the records come in the order of the probe input
+        self.assertEqual(self.__nested_loop(), result)
+        result = list(hash_join(self.left, self.right, 1, 0, 10 ** 9, build_is_left=True))
+        self.assertEqual(sorted(self.__nested_loop()), sorted(result))
+
+    def test_partitioned(self):
+        # a budget of a few records makes every level of partitioning spill
+        result = list(hash_join(self.left, self.right, 1, 0, 500, build_is_left=True))
+        self.assertEqual(sorted(self.__nested_loop()), sorted(result))
+        result = list(hash_join(self.right, self.left, 0, 1, 2000))
+        self.assertEqual(sorted(self.__nested_loop()), sorted(result))
@@ -0,0 +1,115 @@
+from embedded_test_case import EmbeddedTestCase
+from server_side import config
+from server_side.execution import join_planner
+
+
+class TestJoinTables(EmbeddedTestCase):
+    """
+    Test the join methods of the join planner against a nested loop join.
+    """
+
+    def setUp(self):
+        super().setUp()
+        parents = ", ".join(f"({i}, {i % 7}, {i % 5})" for i in range(40))
+        children = ", ".join(f"({i}, {i % 45}, {i % 9})" for i in range(120))
+        self.execute("create database test_db;"
+                     "use test_db;"
+                     "create table parent (id int primary key, a int, b int);"
+                     "create table child (id int primary key, parent_id int, c int);"
+                     "create index idx_a on parent(a);"
+                     "create index idx_c_parent on child(c, parent_id);"
+                     f"insert into parent values {parents};"
+                     f"insert into child values {children};")
+        self.db_idx = self.dbm.get_working_db_index()
+        self.parent = self.dbm.get_table(self.db_idx, "parent")
+        self.child = self.dbm.get_table(self.db_idx, "child")
+
+    def __nested_loop(self, tb_1, tb_2, col_name_1, col_name_2) -> list:
+        records_1 = list(self.dbm.find_all("test_db", tb_1.get_name()))
+        records_2 = list(self.dbm.find_all("test_db", tb_2.get_name()))
+        pos_1, pos_2 = tb_1.find_column(col_name_1), tb_2.find_column(col_name_2)
+        return sorted(r_1 + r_2 for r_1 in records_1 for r_2 in records_2 if r_1[pos_1] == r_2[pos_2])
+
+    def __assert_join(self, method, tb_1, tb_2, col_name_1, col_name_2):
+        scans = [join_planner.ScanNode(join_planner.Relation(tb.get_name(), tb, count), count, [])
+                 for tb in (tb_1, tb_2) for count in [self.dbm.count_records("test_db", tb.get_name())]]
+        plan = join_planner.JoinNode(method, scans[0], scans[1], (tb_1.get_name(), col_name_1),
+                                     (tb_2.get_name(), col_name_2), 0, 0, [])
+        result = list(join_planner.execute_plan(plan, self.dbm, "test_db"))
+        self.assertEqual(self.__nested_loop(tb_1, tb_2, col_name_1, col_name_2), sorted(result))
+
+    def test_index_nested_loop_join(self):
+        read_batch_size = config.READ_BATCH_SIZE
+        config.READ_BATCH_SIZE = 16
+        try:
+            # primary key of the inner table
+            self.__assert_join("index_nested_loop", self.child, self.parent, "parent_id", "id")
+            self.__assert_join("index_nested_loop", self.parent, self.child, "b", "id")
+            # non-unique index of the inner table
+            self.__assert_join("index_nested_loop", self.child, self.parent, "parent_id", "a")
+            # first column of a composite index
+            self.__assert_join("index_nested_loop", self.parent, self.child, "b", "c")
+        finally:
+            config.READ_BATCH_SIZE = read_batch_size
+
+    def test_hash_join(self):
+        self.__assert_join("hash", self.parent, self.child, "b", "parent_id")
+        self.__assert_join("hash", self.child, self.parent, "parent_id", "b")
+
+    def test_multi_table_join(self):
+        header, rows = self.query("create table grade (id int primary key, child_id int, score int);"
+                                  "insert into grade values " +
+                                  ", ".join(f"({i}, {i % 130}, {i % 10})" for i in range(200)) + ";"
+                                  "select p.id, c.id, g.score from grade g "
+                                  "join child c on g.child_id = c.id "
+                                  "join parent p on c.parent_id = p.id "
+                                  "where p.a = 3 and g.score > 4")
+        expected = sorted([p, c, g % 10] for g in range(200) for c in range(120) for p in range(40)
+                          if g % 130 == c and c % 45 == p and p % 7 == 3 and g % 10 > 4)
+        self.assertEqual(["id", "id", "score"], header)
+        self.assertEqual(expected, sorted(rows))
+
+    def test_self_join(self):
+        header, rows = self.query("select * from parent p1 join parent p2 on p1.a = p2.b where p1.id < 10")
+        expected = sorted([i, i % 7, i % 5, j, j % 7, j % 5] for i in range(10) for j in range(40) if i % 7 == j % 5)
+        self.assertEqual(["id", "a", "b"] * 2, header)
+        self.assertEqual(expected, sorted(rows))
+
+    def test_primary_key_join(self):
+        # both tables are read in the order of the join column, so they can be merged
+        header, rows = self.query("select c.id, p.a from child c join parent p on p.id = c.id where c.c < 4")
+        self.assertEqual(["id", "a"], header)
+        self.assertEqual([[i, i % 7] for i in range(40) if i % 9 < 4], sorted(rows))
+
+    def test_spilled_hash_join_order(self):
+        # a hash join over its memory budget returns its records partition by partition, a merge join can't take them
+        self.execute("create table a (id int primary key, b int);"
+                     "create table b (id int primary key, s varchar);"
+                     "create table c (id int primary key, c int);")
+        self.insert_rows("a", [{"id": str(i), "b": str(i % 10)} for i in range(1000)])
+        self.insert_rows("b", [{"id": str(i), "s": "'" + "x" * 700 + "'"} for i in range(10)])
+        self.insert_rows("c", [{"id": str(i), "c": str(i)} for i in range(1000)])
+        db = self.dbm.get_working_db()
+        join_memory_budget = config.JOIN_MEMORY_BUDGET
+        config.JOIN_MEMORY_BUDGET = 1000
+        try:
+            relations = [join_planner.Relation(name, db.get_table(name), 1000 if name != "b" else 10)
+                         for name in ("a", "b", "c")]
+            predicates = [(("column", "a", "b"), "=", ("column", "b", "id")),
+                          (("column", "a", "id"), "=", ("column", "c", "id")),
+                          (("column", "b", "id"), "<", ("constant", 7))]
+            plan = join_planner.plan_joins(relations, predicates)
+            nodes = [plan]
+            while nodes:
+                node = nodes.pop()
+                if isinstance(node, join_planner.JoinNode):
+                    if node.get_method() == "hash":
+                        self.assertIsNone(node.get_order())
+                    if node.get_method() == "merge":
+                        for child in (node.get_outer(), node.get_inner()):
+                            self.assertFalse(isinstance(child, join_planner.JoinNode) and child.get_method() == "hash")
+                    nodes.extend((node.get_outer(), node.get_inner()))
+            _, rows = self.query("select a.id, c.c from a join b on a.b = b.id join c on a.id = c.id where b.id < 7")
+        finally:
+            config.JOIN_MEMORY_BUDGET = join_memory_budget
+        self.assertEqual([[i, i] for i in range(1000) if i % 10 < 7], sorted(rows))
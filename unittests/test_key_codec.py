@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+from embedded_test_case import EmbeddedTestCase
+from server_side.database_objects import key_codec
+from server_side.execution.access_path import choose_access_path
+
+
+class TestKeyCodec(TestCase):
+    """
+    Test the order-preserving key encoding.
+    """
+
+    def test_order_is_preserved(self):
+        ints = [-2 ** 40, -10, -1, 0, 1, 9, 10, 100, 2 ** 40]
+        keys = [key_codec.encode_key([v], ["int"]) for v in ints]
+        self.assertEqual(keys, sorted(keys))
+        floats = [-1e10, -2.5, -0.5, 0.0, 0.25, 9.0, 10.0, 1e10]
+        keys = [key_codec.encode_key([v], ["float"]) for v in floats]
+        self.assertEqual(keys, sorted(keys))
+        strings = ["", "a", "a\x00", "a\x00b", "ab", "b", "é"]
+        keys = [key_codec.encode_key([v], ["varchar"]) for v in strings]
+        self.assertEqual(keys, sorted(keys))
+        # the first column decides, even if the second one would not
+        composite = [["a", 9], ["a", 10], ["a#", 1], ["b", -1]]
+        keys = [key_codec.encode_key(v, ["varchar", "int"]) for v in composite]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_decode_and_split(self):
+        types = ["int", "varchar", "float", "int"]
+        values = [-5, "'a#b'", 1.5, None]
+        key = key_codec.encode_key(values, types)
+        self.assertEqual(values, key_codec.decode_key(key, types))
+        self.assertEqual([7], key_codec.decode_key(key_codec.encode_key(["7"], ["int"]), ["int"]))
+        keys = [key_codec.encode_key([v, f"'{v}'"], ["int", "varchar"]) for v in range(5)]
+        self.assertEqual(keys, key_codec.split_keys("".join(keys), ["int", "varchar"]))
+
+    def test_range_condition(self):
+        key = key_codec.encode_key([10], ["int"])
+        self.assertEqual({"$lt": key}, key_codec.key_range_condition("<", key))
+        self.assertEqual({"$gte": key, "$lt": key_codec.prefix_successor(key)}, key_codec.key_range_condition("=", key))
+        self.assertIsNone(key_codec.prefix_successor("\xff\xff"))
+
+
+class TestKeyRanges(EmbeddedTestCase):
+    """
+    Test range queries on encoded keys through the DbManager.
+    """
+
+    def setUp(self):
+        super().setUp()
+        values = ", ".join(f"({i}, {i % 12}, 'n{i}')" for i in range(1, 21))
+        self.execute("create database test_db;"
+                     "use test_db;"
+                     "create table t1 ("
+                     "  col1 int primary key,"
+                     "  col2 int,"
+                     "  col3 varchar"
+                     ");"
+                     "create index idx1 on t1(col2);"
+                     f"insert into t1 values {values};")
+
+    def test_primary_key_range(self):
+        result = self.dbm.find_conditional_indexed_by_primary_key("test_db", "t1", "<", 10)
+        self.assertEqual(9, len(result))
+        result = self.dbm.find_conditional_indexed_by_primary_key("test_db", "t1", ">=", 9)
+        self.assertEqual(12, len(result))
+
+    def test_index_range(self):
+        result = self.dbm.find_conditional_indexed_by_value("test_db", "t1", "col2", "int", ">", 9)
+        self.assertEqual([[10], [11]], sorted(result))
+        table = self.dbm.get_table(self.dbm.get_working_db_index(), "t1")
+        access_path = choose_access_path(table, [("col2", "<=", 1)], 20, column_names={"col1", "col2"})
+        self.assertEqual("index_only", access_path.get_method())
+        result = list(self.dbm.find_by_access_path("test_db", "t1", access_path))
+        self.assertEqual([[12, 0, None], [1, 1, None], [13, 1, None]], result)
+
+    def test_delete_from_index(self):
+        db = self.dbm.get_working_db()
+        self.assertIn([13, 1, "'n13'"], list(self.dbm.find_all("test_db", "t1")))
+        self.assertEqual(1, self.dbm.delete(db, db.get_table("t1"), key_codec.encode_key([13], ["int"])))
+        self.assertEqual([[1]], self.dbm.find_conditional_indexed_by_value("test_db", "t1", "col2", "int", "=", 1))
+
+    def test_separator_in_varchar_key(self):
+        self.execute("create table t2 (col1 varchar primary key, col2 int);"
+                     "insert into t2 values ('a#b', 1), ('a', 2);")
+        self.assertEqual([["'a#b'", 1], ["'a'", 2]], list(self.dbm.find_all("test_db", "t2")))
+        self.assertIsNotNone(self.dbm.find_by_primary_key("test_db", "t2", ["'a#b'"]))
@@ -0,0 +1,80 @@
+from embedded_test_case import EmbeddedTestCase
+from server_side import config
+from server_side.execution.operators import (Values, Scan, Filter, Project, Limit, Distinct, Sort, HashAggregate,
+                                             HashJoin, MergeJoin, NestedLoopJoin)
+
+
+class TestOperators(EmbeddedTestCase):
+    """
+    Test the physical operators and the trees built of them.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.records = [[i, i % 3, f"'{i % 4}'"] for i in range(20)]
+        self.batch_size = config.READ_BATCH_SIZE
+        config.READ_BATCH_SIZE = 4
+
+    def tearDown(self):
+        config.READ_BATCH_SIZE = self.batch_size
+        super().tearDown()
+
+    def test_filter_project(self):
+        operator = Project(Filter(Values(self.records), lambda record: record[1] == 0), [2, 0])
+        self.assertEqual([[r[2], r[0]] for r in self.records if r[1] == 0], list(operator))
+
+    def test_limit(self):
+        pulled = []
+
+        def records():
+            for record in self.records:
+                pulled.append(record)
+                yield record
+
+        self.assertEqual(self.records[:5], list(Limit(Values(records()), 5)))
+        # the records of the batches after the limit are not pulled
+        self.assertEqual(8, len(pulled))
+        self.assertEqual([], list(Limit(Values(self.records), 0)))
+
+    def test_distinct(self):
+        result = list(Distinct(Project(Values(self.records + [[None, None, None]]), [1])))
+        self.assertEqual([[0], [1], [2]], result[:3])
+        self.assertEqual(4, len(result))
+
+    def test_sort(self):
+        records = self.records + [[None, None, None]]
+        result = list(Sort(Values(records), [(1, False), (0, True)]))
+        self.assertEqual(sorted(records, key=lambda r: (r[1] is not None, r[1] or 0, -(r[0] or 0))), result)
+
+    def test_hash_aggregate(self):
+        result = list(HashAggregate(Values(self.records), [1, 2], [("count", None), ("sum", 0), ("min", 0)]))
+        expected = {}
+        for record in self.records:
+            count, total, minimum = expected.get((record[1], record[2]), (0, 0, None))
+            expected[(record[1], record[2])] = (count + 1, total + record[0],
+                                                record[0] if minimum is None else min(minimum, record[0]))
+        self.assertEqual(sorted([list(key) + list(value) for key, value in expected.items()]), sorted(result))
+        # without grouping columns there is a single group, even of no records
+        self.assertEqual([[0, None, None]], list(HashAggregate(Values([]), [], [("count", None), ("avg", 0),
+                                                                                ("max", 0)])))
+
+    def test_joins(self):
+        left = [[i, i % 5] for i in range(12)]
+        right = [[i, i * 10] for i in range(5)]
+        expected = sorted(l + r for l in left for r in right if l[1] == r[0])
+        self.assertEqual(expected, sorted(HashJoin(Values(left), Values(right), 1, 0)))
+        self.assertEqual(expected, sorted(HashJoin(Values(left), Values(right), 1, 0, build_left=True)))
+        self.assertEqual(expected, sorted(MergeJoin(Sort(Values(left), [(1, False)]), Values(right), 1, 0)))
+        self.assertEqual(len(left) * len(right), len(list(NestedLoopJoin(Values(left), Values(right)))))
+
+    def test_scan(self):
+        values = ", ".join(f"({i}, {i % 3})" for i in range(30))
+        self.execute("create database test_db;"
+                     "use test_db;"
+                     "create table tb (id int primary key, a int);"
+                     f"insert into tb values {values};")
+        operator = Limit(Filter(Scan(self.dbm, "test_db", "tb"), lambda record: record[1] == 1), 3)
+        self.assertEqual([[1, 1], [4, 1], [7, 1]], list(operator))
+        # the tree can be evaluated again
+        self.assertEqual([[1, 1], [4, 1], [7, 1]], list(operator))
+        self.assertEqual([[i] for i in range(30)], list(Scan(self.dbm, "test_db", "tb", ["id"])))
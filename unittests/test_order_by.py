@@ -0,0 +1,56 @@
+from embedded_test_case import EmbeddedTestCase
+from server_side.execution.external_sort import external_sort
+
+
+class TestOrderBy(EmbeddedTestCase):
+    """
+    Test the ORDER BY clause of SELECT against a direct evaluation.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.rows = [[i, i * 7 % 5, i % 3] for i in range(100)]
+        self.execute("create database test_db;"
+                     "use test_db;"
+                     "create table tb (id int primary key, a int, b int);"
+                     "create index idx_a_b on tb(a, b);")
+        self.insert_rows("tb", [{"id": str(i), "a": str(a), "b": str(b)} for i, a, b in self.rows])
+
+    def test_order_by(self):
+        _, values = self.query("select id, a from tb where id >= 10 order by b desc, id;")
+        expected = sorted((row for row in self.rows if row[0] >= 10), key=lambda row: (-row[2], row[0]))
+        self.assertEqual([[i, a] for i, a, _ in expected], values)
+        _, values = self.query("select a as x, b from tb where id < 50 order by x, b;")
+        self.assertEqual(sorted([a, b] for i, a, b in self.rows if i < 50), values)
+        _, values = self.query("select id from tb where a = 2 order by b, id;")
+        self.assertEqual([[i] for i, a, b in sorted(self.rows, key=lambda row: (row[2], row[0])) if a == 2], values)
+
+    def test_top(self):
+        _, values = self.query("select top 3 id from tb order by b desc, id;")
+        self.assertEqual([[2], [5], [8]], values)
+        header, values = self.query("select top (4) * from tb where id >= 10;")
+        self.assertEqual(self.rows[10:14], values)
+        # the header is not the cached column list of the table
+        header.append("c")
+        self.assertEqual(["id", "a", "b"], self.dbm.get_working_db().get_table("tb").get_column_names())
+        _, values = self.query("select top (0) a from tb;")
+        self.assertEqual([], values)
+
+    def test_distinct_and_group_by(self):
+        _, values = self.query("select distinct b, a from tb order by b desc;")
+        self.assertEqual(sorted({(b, a) for _, a, b in self.rows}, key=lambda row: (-row[0], row[1])),
+                         [tuple(value) for value in values])
+        _, values = self.query("select b, count(*) as cnt from tb group by b order by cnt desc, b;")
+        self.assertEqual([[0, 34], [1, 33], [2, 33]], values)
+        self.assertRaises(ValueError, self.query, "select distinct a from tb order by b;")
+        self.assertRaises(ValueError, self.query, "select b, count(*) from tb group by b order by a;")
+
+    def test_external_sort(self):
+        records = [[i * 37 % 1000, None if i % 10 == 0 else i % 7, i] for i in range(5000)]
+        keys = [(1, False), (0, True)]
+        # the runs of a few records are merged in more than one pass
+        result = list(external_sort(records, keys, 2000, self.data_dir))
+        self.assertEqual(sorted(records, key=lambda record: (record[1] is not None, record[1] or 0, -record[0])),
+                         result)
+        self.assertEqual(sorted(records, key=lambda record: (record[0], record[2]), reverse=True),
+                         list(external_sort(records, [(0, True), (2, True)], 2000, self.data_dir)))
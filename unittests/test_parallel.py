@@ -0,0 +1,46 @@
+from embedded_test_case import EmbeddedTestCase
+from server_side import config
+from server_side.execution.operators import ParallelScan
+
+
+class TestParallel(EmbeddedTestCase):
+    """
+    Test the queries evaluated by worker processes against the same queries evaluated by the server's process.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.execute("create database test_db;"
+                     "use test_db;"
+                     "create table tb (id int primary key, a int, b int);")
+        self.insert_rows("tb", [{"id": str(i), "a": str(i % 7), "b": str(i * 13 % 101)} for i in range(3000)])
+        self.min_rows = config.PARALLEL_MIN_ROWS
+        config.PARALLEL_MIN_ROWS = 0
+
+    def tearDown(self):
+        config.PARALLEL_MIN_ROWS = self.min_rows
+        super().tearDown()
+
+    def test_partition_key_range(self):
+        key_ranges = self.dbm.partition_key_range("test_db", "tb", 4)
+        self.assertEqual(4, len(key_ranges))
+        counts = [self.dbm.get_storage_engine().count("test_db", "tb", {"_id": key_range} if key_range else {})
+                  for key_range in key_ranges]
+        self.assertEqual(3000, sum(counts))
+        self.assertTrue(all(count > 300 for count in counts))
+
+    def test_aggregate(self):
+        for query in ("select a, count(*), sum(b), avg(b), min(b), max(id) from tb group by a",
+                      "select b, count(id) from tb where a = 3 group by b",
+                      "select count(*), max(b) from tb where id >= 1000 and id < 2500"):
+            serial = self.query(f"{query} option (maxdop 1);")
+            self.assertEqual(serial, self.query(f"{query} option (maxdop 3);"))
+
+    def test_scan(self):
+        for query in ("select id, b from tb where b < 20",
+                      "select * from tb where id > 100 and id <= 2900 and a = 2"):
+            serial = self.query(f"{query} option (maxdop 1);")
+            self.assertEqual(serial, self.query(f"{query} option (maxdop 3);"))
+        table = self.dbm.get_working_db().get_table("tb")
+        records = list(ParallelScan(self.dbm, "test_db", table, None, [(2, ">=", 50)], 2, ordered=False))
+        self.assertEqual(sorted([i, i % 7, i * 13 % 101] for i in range(3000) if i * 13 % 101 >= 50), sorted(records))
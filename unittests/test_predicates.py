@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from server_side.execution.predicates import check_type, compile_condition, compile_conjunction
+
+
+class TestPredicates(TestCase):
+    """
+    Test the compiled conditions against a direct evaluation.
+    """
+
+    def setUp(self):
+        self.records = [[i % 7 if i % 5 else None, i % 3, float(i)] for i in range(50)]
+
+    def test_column_and_constant(self):
+        for op, compare in (("<", lambda a, b: a < b), ("<=", lambda a, b: a <= b), (">", lambda a, b: a > b),
+                            (">=", lambda a, b: a >= b), ("=", lambda a, b: a == b)):
+            expected = [r for r in self.records if r[0] is not None and compare(r[0], 3)]
+            self.assertEqual(expected, [r for r in self.records if compile_condition(0, op, (3,))(r)])
+            # the constant on the left side
+            expected = [r for r in self.records if r[0] is not None and compare(3, r[0])]
+            self.assertEqual(expected, [r for r in self.records if compile_condition((3,), op, 0)(r)])
+
+    def test_columns_and_conjunction(self):
+        condition = compile_conjunction([compile_condition(0, "<", 1), compile_condition(2, ">=", (10.0,)),
+                                         compile_condition(1, "=", (2,))])
+        expected = [r for r in self.records if r[0] is not None and r[0] < r[1] and r[2] >= 10.0 and r[1] == 2]
+        self.assertEqual(expected, [r for r in self.records if condition(r)])
+        self.assertIsNone(compile_conjunction([]))
+        self.assertFalse(compile_condition((1,), ">", (2,))([]))
+
+    def test_types(self):
+        check_type(1, "int")
+        check_type("'a'", "varchar")
+        self.assertRaises(ValueError, check_type, 1.5, "int")
+        self.assertRaises(ValueError, check_type, 1, "varchar")
+        self.assertRaises(NotImplementedError, compile_condition, 0, "!=", (1,))
@@ -0,0 +1,83 @@
+import json
+import os
+
+from embedded_test_case import EmbeddedTestCase
+from server_side import config
+from server_side.dbmanager import DbManager
+from server_side.database_objects.embedded_db import EmbeddedEngine
+
+
+class TestStatistics(EmbeddedTestCase):
+    """
+    Test the statistics of the tables and the ANALYZE statement.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.execute("create database test_db;"
+                     "use test_db;"
+                     "create table t (id int primary key, skewed int, name varchar);")
+        # 'skewed' is 0 in 900 of the 1000 rows, 'name' is null in every fourth row
+        records = [{"id": str(i), "skewed": str(0 if i < 900 else i), "name": f"'n{i % 50}'" if i % 4 else None}
+                   for i in range(1000)]
+        self.insert_rows("t", records)
+
+    def test_analyze(self):
+        self.execute("analyze t")
+        statistics = self.dbm.get_table_statistics("test_db", "t")
+        self.assertEqual(1000, statistics.get_row_count())
+        self.assertEqual(1000, statistics.get_column("id").get_distinct_count())
+        self.assertEqual(101, statistics.get_column("skewed").get_distinct_count())
+        self.assertEqual(50, statistics.get_column("name").get_distinct_count())
+        self.assertEqual(0.25, statistics.get_column("name").get_null_fraction())
+        self.assertEqual(config.STATISTICS_HISTOGRAM_BUCKETS + 1, len(statistics.get_column("id").get_histogram()))
+
+        self.assertAlmostEqual(0.9, statistics.estimate_selectivity("skewed", "=", 0), delta=0.02)
+        self.assertAlmostEqual(0.001, statistics.estimate_selectivity("skewed", "=", 950), delta=0.001)
+        self.assertEqual(0.0, statistics.estimate_selectivity("skewed", "=", 5000))
+        self.assertAlmostEqual(0.25, statistics.estimate_selectivity("id", "<", 250), delta=0.01)
+        self.assertAlmostEqual(0.5, statistics.estimate_selectivity("id", ">=", 500), delta=0.01)
+        self.assertAlmostEqual(0.75 / 50, statistics.estimate_selectivity("name", "=", "'n1'"), delta=0.01)
+        self.assertIsNone(statistics.estimate_selectivity("missing", "=", 1))
+
+    def test_sampled_statistics(self):
+        sample_size = config.STATISTICS_SAMPLE_SIZE
+        config.STATISTICS_SAMPLE_SIZE = 200
+        try:
+            statistics = self.dbm.analyze_table("test_db", "t")
+        finally:
+            config.STATISTICS_SAMPLE_SIZE = sample_size
+        self.assertEqual(1000, statistics.get_row_count())
+        # a unique column is recognized from the sample, the distinct values of the rest are extrapolated
+        self.assertEqual(1000, statistics.get_column("id").get_distinct_count())
+        self.assertAlmostEqual(50, statistics.get_column("name").get_distinct_count(), delta=5)
+        self.assertAlmostEqual(0.9, statistics.estimate_selectivity("skewed", "=", 0), delta=0.1)
+
+    def test_statistics_file(self):
+        self.execute("analyze")
+        with open(os.path.join(self.data_dir, "statistics.json")) as f:
+            data = json.load(f)
+        self.assertEqual(1000, data["test_db"]["t"]["row_count"])
+        # the statistics are loaded by the next session
+        dbm = DbManager(EmbeddedEngine(os.path.join(self.data_dir, "data")),
+                        os.path.join(self.data_dir, "databases.json"))
+        self.assertEqual(50, dbm.get_table_statistics("test_db", "t").get_column("name").get_distinct_count())
+        # and forgotten with the table
+        self.execute("drop table t")
+        with open(os.path.join(self.data_dir, "statistics.json")) as f:
+            self.assertEqual({}, json.load(f))
+
+    def test_automatic_analysis(self):
+        # the statistics are computed when they are needed first
+        self.assertEqual(1000, self.dbm.get_table_statistics("test_db", "t").get_row_count())
+        values = ", ".join(f"({i}, 0, 'a')" for i in range(1000, 1100))
+        self.execute(f"insert into t values {values}")
+        # 100 rows are not enough to compute them again, 160 are
+        self.assertEqual(1000, self.dbm.get_table_statistics("test_db", "t").get_row_count())
+        values = ", ".join(f"({i}, 0, 'a')" for i in range(1100, 1160))
+        self.execute(f"insert into t values {values}")
+        self.assertEqual(1160, self.dbm.get_table_statistics("test_db", "t").get_row_count())
+
+    def test_analyze_unknown_table(self):
+        with self.assertRaises(ValueError):
+            self.execute("analyze t, missing")
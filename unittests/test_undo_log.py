@@ -0,0 +1,79 @@
+import os
+
+from embedded_test_case import EmbeddedTestCase
+from server_side.dbmanager import DbManager
+from server_side.database_objects.embedded_db import EmbeddedEngine
+
+
+class TestUndoLog(EmbeddedTestCase):
+    """
+    Test that a failed request leaves the storage as it was before the request.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.__request("create database test_db;"
+                       "use test_db;"
+                       "create table t1 ("
+                       "  col1 int primary key,"
+                       "  col2 int,"
+                       "  col3 varchar unique"
+                       ");"
+                       "create index idx1 on t1(col2);"
+                       "insert into t1 values (1, 2, 'a'), (2, 2, 'b')")
+
+    def __request(self, commands: str):
+        """
+        Execute the commands the way the server does: save the changes on success, revert them on failure.
+        """
+        try:
+            self.parser.parse(commands)
+            self.executor.execute(self.parser.get_ast_list())
+            self.dbm.save_changes()
+        except Exception:
+            self.dbm.revert_changes()
+            raise
+
+    def __select_all(self) -> list:
+        self.__request("select * from t1")
+        return self.executor.get_results()[0].get_result_set()[1]
+
+    def test_failed_insert_is_undone(self):
+        with self.assertRaises(ValueError):
+            self.__request("insert into t1 values (3, 2, 'c');"
+                           "insert into t1 values (4, 5, 'a')")  # duplicate unique key
+        self.assertEqual([[1, 2, "'a'"], [2, 2, "'b'"]], self.__select_all())
+        # the index entries of the undone insert are gone too
+        self.assertEqual([[1], [2]], self.dbm.find_conditional_indexed_by_value("test_db", "t1", "col2", "int", "=", 2))
+        self.__request("insert into t1 values (3, 2, 'c')")
+        self.assertEqual(3, len(self.__select_all()))
+
+    def test_failed_delete_is_undone(self):
+        with self.assertRaises(ValueError):
+            self.__request("delete from t1 where col1 = 1;"
+                           "insert into t1 values (2, 2, 'x')")  # duplicate primary key
+        self.assertEqual([[1, 2, "'a'"], [2, 2, "'b'"]], self.__select_all())
+
+    def test_failed_create_table_is_undone(self):
+        with self.assertRaises(ValueError):
+            self.__request("create table t2 (col1 int primary key);"
+                           "insert into t1 values (2, 2, 'x')")  # duplicate primary key
+        self.assertFalse(self.dbm.catalog_changed())
+        self.assertIsNone(self.dbm.get_table(self.dbm.get_working_db_index(), "t2"))
+        self.__request("create table t2 (col1 int primary key)")
+        self.assertIsNotNone(self.dbm.get_table(self.dbm.get_working_db_index(), "t2"))
+
+    def test_structure_file_is_written_on_ddl_only(self):
+        db_file = os.path.join(self.data_dir, "databases.json")
+        version = self.dbm.get_catalog_version()
+        os.remove(db_file)
+        self.__request("insert into t1 values (3, 2, 'c')")
+        self.__select_all()
+        self.assertEqual(version, self.dbm.get_catalog_version())
+        self.assertFalse(os.path.exists(db_file))
+        self.__request("create table t2 (col1 int primary key)")
+        self.assertEqual(version + 1, self.dbm.get_catalog_version())
+        self.assertTrue(os.path.exists(db_file))
+        # the saved structure is loaded by a new manager
+        dbm = DbManager(EmbeddedEngine(os.path.join(self.data_dir, "data")), db_file)
+        self.assertEqual(["t1", "t2"], dbm.get_table_names(dbm.find_database("test_db")))